@@ -1,70 +1,352 @@
 # Main CLI entry 
 import argparse
-from tracker import HabitTracker
-from visualization import show_calendar, show_streak
-from notifications import HabitNotifications
-from rich.console import Console
+import os
+import sys
+from tracker import HabitTracker, parse_operation
+from config import DATA_FILE, SQLITE_FILE, BINARY_FILE, JOURNAL_FILE, USERS_DIR, SOCKET_FILE
+from timings import phase
 
-console = Console()
+# rich, visualization, notifications and NumPy are imported inside the
+# commands that need them, so quick commands like done/list start fast.
+console = None
 
-print("""
+# Data file of each storage when --file is not given
+DEFAULT_FILES = {"journal": JOURNAL_FILE, "sqlite": SQLITE_FILE, "binary": BINARY_FILE}
+
+BANNER = """
 ===============================
 🌟 Welcome to the CLI Habit Tracker! 🌟
 Track your habits and stay motivated!
 ===============================
-""")
+"""
+
+def say(text, style=None, plain=False):
+    """Print ``text``, styled through rich unless plain output was requested."""
+    global console
+    with phase("render"):
+        if plain:
+            print(text)
+            return
+        if console is None:
+            from rich.console import Console
+            console = Console()
+        console.print(f"[{style}]{text}[/{style}]" if style else text)
+
+def show_result(op, result, plain=False):
+    """Print the message of an add/done/remove the way the single commands do."""
+    if op == "done":
+        if "marked as done" in result and "already" not in result:
+            say(f"✅ {result}", "green", plain)
+        else:
+            say(result, "yellow", plain)
+    elif op == "remove":
+        say(result, "red", plain)
+    else:
+        say(result, "green", plain)
+
+def show_stats(stats, as_json=False, plain=False):
+    """Print habit_stats() output as JSON or one line per habit."""
+    if as_json:
+        import json
+        with phase("render"):
+            print(json.dumps(stats, indent=2))
+    elif not stats:
+        say("No habits found.", "yellow", plain)
+    else:
+        from analytics import WINDOWS
+        say(f"\n📊 You have {len(stats)} habits:", "bold blue", plain)
+        for entry in stats:
+            rates = ", ".join(f"{window}d {entry['rates'][f'{window}d']:.0%}" for window in WINDOWS)
+            best_day = max(entry['weekdays'], key=entry['weekdays'].get) if entry['total'] else "-"
+            say(f"  • {entry['habit']}: {entry['total']} completions | {rates} | "
+                f"streak {entry['current_streak']} (longest {entry['longest_streak']}) | "
+                f"best day {best_day}", plain=plain)
+
+def run_remote(args, tracker):
+    """Hand the command to a running serve daemon; returns False when it has to run here instead."""
+    remote = args.command in ("list", "stats") or (args.command in ("add", "done", "remove", "streak") and args.name)
+    # Checking for the socket first keeps the common no-daemon case free of any extra import
+    if not remote or not os.path.exists(args.socket):
+        return False
+    from server import request
+    reply = request({"command": args.command, "name": args.name, "show": list_filter(args),
+                     "file": os.path.abspath(tracker.file), "storage": args.storage}, args.socket)
+    if reply is None or "error" in reply:
+        return False  # no daemon, or one serving another file
+    if "result" in reply:
+        show_result(args.command, reply["result"], args.plain)
+    elif "names" in reply:
+        with phase("render"):
+            tracker.list_habits(reply["names"])
+    elif "stats" in reply:
+        show_stats(reply["stats"], args.json, args.plain)
+    else:
+        from visualization import render_streak
+        render_streak(args.name, reply["streak"], args.plain)
+    return True
+
+def list_filter(args):
+    """Which of today's habits ``list`` shows: "pending", "done" or None for all."""
+    if args.pending:
+        return "pending"
+    if args.done_today:
+        return "done"
+    return None
+
+def read_operations(args):
+    """Operations from --ops plus one per line of --input ('-' reads stdin)."""
+    lines = list(args.ops or [])
+    if args.input == "-":
+        lines.extend(sys.stdin)
+    elif args.input:
+        with open(args.input) as f:
+            lines.extend(f)
+    return [parse_operation(line) for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def non_negative_int(text):
+    """argparse type for counts that may be 0 but not negative."""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return value
 
 def main():
     parser = argparse.ArgumentParser(description="CLI Habit Tracker")
-    parser.add_argument("command", choices=["add", "done", "remove", "list", "calendar", "streak", "notify", "stats"])
+    parser.add_argument("command", choices=["add", "done", "remove", "list", "calendar", "streak", "notify", "stats", "compact", "migrate", "reindex", "batch", "users", "convert", "serve", "import", "export", "archive"])
     parser.add_argument("--name", help="Habit name")
+    parser.add_argument("--file", help=f"Data file (default: {DATA_FILE}, {SQLITE_FILE} with --storage sqlite, "
+                                       f"{BINARY_FILE} with --storage binary, {JOURNAL_FILE} with --storage journal)")
+    parser.add_argument("--ops", nargs="*", metavar="OP:NAME", help="batch operations, e.g. add:gym done:gym")
+    parser.add_argument("--input", metavar="FILE", help="batch operations, one 'OP NAME' per line, "
+                                                        "or import: rows to read ('-' for stdin)")
+    parser.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12", help="calendar: month to show")
+    parser.add_argument("--year", type=int, help="calendar: year to show")
+    parser.add_argument("--months", type=positive_int, default=1, help="calendar: number of months to show")
+    parser.add_argument("--pending", action="store_true", help="list: only habits not done today")
+    parser.add_argument("--done-today", action="store_true", help="list: only habits done today")
+    parser.add_argument("--json", action="store_true", help="Print stats as JSON")
+    parser.add_argument("--plain", action="store_true", help="Plain text output without rich")
+    parser.add_argument("--user", help=f"Work on this user's shard under {USERS_DIR}/")
+    parser.add_argument("--all-users", action="store_true", help="notify: serve every user's shard from one process")
+    parser.add_argument("--digest", action="store_true", help="notify: merge pending reminders into one notification")
+    parser.add_argument("--asyncio", action="store_true", help="notify: run reminders on one asyncio event loop")
+    parser.add_argument("--rate", type=float, metavar="PER_MINUTE", help="notify: at most this many notifications per minute")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite", "binary"], default="json",
+                        help="json rewrites habits.json on every change, journal appends to habits.journal.json.log, "
+                             "sqlite keeps habits.db, binary keeps a bitmap per habit and year in habits.bin")
+    parser.add_argument("--to", choices=["json", "journal", "sqlite", "binary"], help="convert: target storage")
+    parser.add_argument("--output", help="convert: target file; export: file to write (default stdout)")
+    parser.add_argument("--force", action="store_true", help="migrate/convert: overwrite a target that already has habits")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="import/export: row format (default: from the file name, else csv)")
+    parser.add_argument("--chunk-size", type=positive_int, default=50000, help="import: rows applied and saved together")
+    parser.add_argument("--socket", default=SOCKET_FILE, help="serve: socket to listen on; other commands use the daemon there if one is running")
+    parser.add_argument("--flush-interval", type=float, default=1.0, metavar="SECONDS",
+                        help="serve: how often changes are written to disk")
+    parser.add_argument("--no-notify", action="store_true", help="serve: do not send reminders from the daemon")
+    parser.add_argument("--no-daemon", action="store_true", help="Work on the data file directly even if a daemon is running")
+    parser.add_argument("--keep-years", type=non_negative_int, default=1,
+                        help="archive: full years before the current one that stay in the live file")
+    parser.add_argument("--timings", action="store_true",
+                        help="Report time per phase (load, compute, render, save), bytes read/written and peak memory")
+    parser.add_argument("--profile", metavar="FILE", help="Also dump cProfile stats to FILE (implies --timings)")
 
     args = parser.parse_args()
+    if args.timings or args.profile:
+        from timings import session
+        with session(profile=args.profile) as timings:
+            run(args, parser)
+        print(timings.report(), file=sys.stderr)
+    else:
+        run(args, parser)
 
-    # Initialize tracker and notifier
-    tracker = HabitTracker('habits.json')
-    notifier = HabitNotifications('habits.json')
+def run(args, parser):
+    """Carry out the command in ``args``."""
+    plain = args.plain
 
-    if args.command == "add" and args.name:
-        result = tracker.add_habit(args.name)
-        console.print(f"[green]{result}[/green]")
-    
-    elif args.command == "done" and args.name:
-        result = tracker.mark_as_done(args.name)
-        if "marked as done" in result:
-            console.print(f"[green]✅ {result}[/green]")
-        else:
-            console.print(f"[yellow]{result}[/yellow]")
-    
-    elif args.command == "remove" and args.name:
-        result = tracker.remove_habit(args.name)
-        console.print(f"[red]{result}[/red]")
+    if not plain and not args.json and sys.stdout.isatty():
+        print(BANNER)
+
+    # One tracker is shared by every command, so the data file is read at most once
+    tenants = None
+    if args.user or args.all_users or args.command == "users":
+        from tenants import TenantStore
+        tenants = TenantStore(USERS_DIR, storage=args.storage)
+    if args.user:
+        # Only commands that create habits register a new user; the rest refuse an unknown one
+        try:
+            tracker = tenants.tracker(args.user, create=args.command in ("add", "batch", "import"))
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+    else:
+        data_file = args.file or DEFAULT_FILES.get(args.storage, DATA_FILE)
+        try:
+            tracker = HabitTracker(data_file, storage=args.storage)
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+
+    if args.pending and args.done_today:
+        parser.error("--pending and --done-today cannot be combined")
+
+    if not args.user and not args.no_daemon and run_remote(args, tracker):
+        return
+
+    if args.command in ("add", "done", "remove") and args.name:
+        result = tracker.apply_many([(args.command, args.name)])[0]
+        show_result(args.command, result, plain)
     
     elif args.command == "list":
-        tracker.list_habits()
+        show = list_filter(args)
+        if show:
+            # Answered from the day index; histories are not read
+            index = tracker.today_index()
+            names = list(index.pending if show == "pending" else index.done)
+        else:
+            names = tracker.habit_names()
+        with phase("render"):
+            tracker.list_habits(names)
     
     elif args.command == "calendar" and args.name:
-        show_calendar(args.name)
+        from visualization import show_calendar
+        show_calendar(args.name, tracker, plain=plain, year=args.year, month=args.month, months=args.months)
     
     elif args.command == "streak" and args.name:
-        show_streak(args.name)
+        from visualization import show_streak
+        show_streak(args.name, tracker, plain=plain)
     
     elif args.command == "notify":
-        console.print("[bold green]🚀 Starting Habit Notifications...[/bold green]")
+        from notifications import AsyncHabitNotifications, HabitNotifications, TenantNotifications
+        say("🚀 Starting Habit Notifications...", "bold green", plain)
+        options = {"digest": args.digest, "rate": args.rate / 60 if args.rate else None}
+        if args.all_users:
+            notifier = TenantNotifications(tenants, **options)
+        elif args.asyncio:
+            notifier = AsyncHabitNotifications(tracker=tracker, **options)
+        else:
+            notifier = HabitNotifications(tracker=tracker, **options)
         if notifier.schedule_habit_reminders():
             notifier.run_scheduler()
         else:
-            console.print("[red]❌ No notifications to schedule[/red]")
+            say("❌ No notifications to schedule", "red", plain)
     
     elif args.command == "stats":
-        # Show basic stats
-        if not tracker.data:
-            console.print("[yellow]No habits found.[/yellow]")
+        from analytics import habit_stats
+        data = tracker.history()  # stats cover archived years too
+        with phase("compute"):
+            stats = habit_stats(data)
+        show_stats(stats, args.json, plain)
+    
+    elif args.command == "compact":
+        tracker.compact()
+        say("Habit log compacted into a fresh snapshot.", "green", plain)
+    
+    elif args.command == "migrate":
+        from storage import migrate_json_to_sqlite
+        target = args.file or SQLITE_FILE
+        try:
+            count = migrate_json_to_sqlite(DATA_FILE, target, force=args.force)
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+        say(f"Migrated {count} habits from {DATA_FILE} to {target}", "green", plain)
+    
+    elif args.command == "convert" and args.to:
+        from storage import convert
+        target = args.output or DEFAULT_FILES.get(args.to, DATA_FILE)
+        try:
+            count = convert(tracker.file, args.storage, target, args.to, force=args.force)
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+        say(f"Converted {count} habits from {tracker.file} to {target}", "green", plain)
+    
+    elif args.command == "reindex":
+        stale = tracker.rebuild_streaks()
+        if stale:
+            say(f"Streak index rebuilt; {len(stale)} habits were out of date: {', '.join(stale)}", "yellow", plain)
+        else:
+            say("Streak index rebuilt and matches the raw history.", "green", plain)
+    
+    elif args.command == "batch":
+        operations = read_operations(args)
+        try:
+            results = tracker.apply_many(operations)
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+        for (op, _), result in zip(operations, results):
+            show_result(op, result, plain)
+    
+    elif args.command == "serve":
+        import signal
+        from server import HabitServer
+        notifier = None
+        if not args.no_notify:
+            from notifications import HabitNotifications
+            notifier = HabitNotifications(tracker=tracker, digest=args.digest, rate=args.rate / 60 if args.rate else None)
+            notifier.schedule_habit_reminders()
+        server = HabitServer(tracker, storage=args.storage, path=args.socket,
+                             flush_interval=args.flush_interval, notifier=notifier)
+        try:
+            server.open()
+        except RuntimeError as e:
+            say(str(e), "red", plain)
+            sys.exit(1)
+        # Stopping with kill flushes pending changes just like Ctrl+C does
+        signal.signal(signal.SIGTERM, lambda *_: server.stop())
+        say(f"🚀 Serving {tracker.file} on {args.socket}; changes are written every {args.flush_interval:g}s", "bold green", plain)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            say("\n👋 Daemon stopped", plain=plain)
+    
+    elif args.command == "import" and args.input:
+        from bulk import guess_format, import_rows, read_rows
+        fmt = args.format or guess_format(args.input)
+        f = sys.stdin if args.input == "-" else open(args.input, newline="")
+        try:
+            stats = import_rows(tracker, read_rows(f, fmt), chunk_size=args.chunk_size)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        say(f"Imported {stats['rows']} rows: {stats['added']} new completions, {stats['duplicates']} already recorded, "
+            f"{stats['habits']} new habits", "green", plain)
+        if stats["skipped"]:
+            say(f"Skipped {stats['skipped']} malformed rows", "yellow", plain)
+    
+    elif args.command == "export":
+        from bulk import guess_format, write_rows
+        fmt = args.format or guess_format(args.output)
+        if args.output:
+            with open(args.output, "w", newline="") as f:
+                count = write_rows(tracker.iter_completions(), f, fmt)
+            say(f"Exported {count} rows to {args.output}", "green", plain)
         else:
-            console.print(f"\n[bold blue]📊 You have {len(tracker.data)} habits:[/bold blue]")
-            for habit in tracker.data:
-                total = len(tracker.data[habit])
-                console.print(f"  • {habit}: {total} completions")
+            write_rows(tracker.iter_completions(), sys.stdout, fmt)
+    
+    elif args.command == "archive":
+        try:
+            moved = tracker.archive_old(keep_years=args.keep_years)
+        except ValueError as e:
+            say(str(e), "red", plain)
+            sys.exit(2)
+        from archive import horizon_for
+        say(f"Archived {moved} completions from before {horizon_for(args.keep_years)}", "green", plain)
+    
+    elif args.command == "users":
+        users = tenants.users()
+        if not users:
+            say("No users found.", "yellow", plain)
+        for user in users:
+            say(f"- {user}", plain=plain)
     
     else:
         parser.print_help()
@@ -0,0 +1,19 @@
+import pytest
+import os
+import sys
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import HabitTracker
+
+STORAGES = ['json', 'journal', 'sqlite', 'binary']
+
+@pytest.fixture(params=STORAGES)
+def storage(request):
+    """Each storage backend, by name"""
+    return request.param
+
+@pytest.fixture
+def tracker(storage, tmp_path):
+    """A tracker on each storage backend"""
+    return HabitTracker(str(tmp_path / 'habits'), storage=storage)
@@ -0,0 +1,27 @@
+import os
+import sys
+import time
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import HabitTracker
+
+def ordinals(*days):
+    return [date.fromisoformat(day).toordinal() for day in days]
+
+def mark(tracker, habit, day):
+    with patch('tracker.datetime') as mock_datetime:
+        mock_datetime.now.return_value.strftime.return_value = day
+        return tracker.mark_as_done(habit)
+
+def on_disk(path, storage='json'):
+    """What a fresh tracker reads from ``path``, as plain lists"""
+    return {habit: list(dates) for habit, dates in HabitTracker(path, storage=storage).data.items()}
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
@@ -0,0 +1,87 @@
+import pytest
+import os
+import random
+import sys
+from datetime import date, timedelta
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import completion_arrays, habit_stats
+from completions import wrap
+
+TODAY = date(2025, 7, 10)
+
+@pytest.fixture
+def random_data():
+    """A few hundred habits with random, partly unsorted histories"""
+    rng = random.Random(7)
+    data = {}
+    for i in range(300):
+        days = {(date(2024, 1, 1) + timedelta(days=rng.randint(0, 560))).isoformat()
+                for _ in range(rng.randint(0, 200))}
+        data[f'habit{i}'] = sorted(days) if i % 3 else list(days)
+    return data
+
+
+class TestCompletionArrays:
+    def test_sorts_and_deduplicates(self):
+        """Test CSR arrays for out-of-order and duplicate dates"""
+        names, offsets, days = completion_arrays({'a': ['1970-01-03', '1970-01-02', '1970-01-03'], 'b': []})
+        assert names == ['a', 'b']
+        assert offsets.tolist() == [0, 2, 2]
+        assert days.tolist() == [1, 2]
+
+    def test_empty_first_habit(self):
+        """Test that an empty leading habit does not hide a later habit's disorder"""
+        names, offsets, days = completion_arrays({'a': [], 'b': ['1970-01-03', '1970-01-02']})
+        assert offsets.tolist() == [0, 0, 2]
+        assert days.tolist() == [1, 2]
+        [_, stats] = habit_stats({'a': [], 'b': ['2025-01-02', '2025-01-01']}, today='2025-01-02')
+        assert (stats['current_streak'], stats['longest_streak']) == (2, 2)
+        assert stats['last_completed'] == '2025-01-02'
+
+    def test_habits_skip_parsing(self, random_data):
+        """Test that Habit histories give the same arrays as the string lists"""
+        expected = completion_arrays(random_data)
+        names, offsets, days = completion_arrays(wrap(random_data))
+        assert names == expected[0]
+        assert offsets.tolist() == expected[1].tolist()
+        assert days.tolist() == expected[2].tolist()
+
+
+class TestHabitStats:
+    def test_small_example(self):
+        """Test every metric on a hand-checked habit"""
+        [stats] = habit_stats({'gym': ['2025-07-06', '2025-07-07', '2025-07-09', '2025-07-10']}, today=TODAY)
+        assert stats['total'] == 4
+        assert stats['rates']['7d'] == round(4 / 7, 4)
+        assert stats['weekdays'] == {'Mon': 1, 'Tue': 0, 'Wed': 1, 'Thu': 1, 'Fri': 0, 'Sat': 0, 'Sun': 1}
+        assert (stats['current_streak'], stats['longest_streak']) == (2, 2)
+        assert stats['last_completed'] == '2025-07-10'
+
+    def test_never_completed(self):
+        """Test a habit without completions"""
+        [stats] = habit_stats({'pray': []}, today=TODAY)
+        assert stats['total'] == 0
+        assert stats['current_streak'] == stats['longest_streak'] == 0
+        assert stats['last_completed'] is None
+
+    def test_matches_naive_computation(self, random_data):
+        """Test the vectorized results against a per-habit Python loop"""
+        for stats in habit_stats(random_data, today=TODAY):
+            days = sorted(date.fromisoformat(d) for d in set(random_data[stats['habit']]))
+            assert stats['total'] == len(days)
+            weekdays = [0] * 7
+            for day in days:
+                weekdays[day.weekday()] += 1
+            assert list(stats['weekdays'].values()) == weekdays
+            for window in (7, 30, 90):
+                recent = sum(1 for day in days if TODAY - timedelta(days=window) < day <= TODAY)
+                assert stats['rates'][f'{window}d'] == round(recent / window, 4)
+            runs, run = [], 0
+            for i, day in enumerate(days):
+                run = run + 1 if i and day == days[i - 1] + timedelta(days=1) else 1
+                runs.append(run)
+            assert stats['longest_streak'] == max(runs, default=0)
+            ongoing = days and days[-1] >= TODAY - timedelta(days=1)
+            assert stats['current_streak'] == (runs[-1] if ongoing else 0)
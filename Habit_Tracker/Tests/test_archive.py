@@ -0,0 +1,129 @@
+import pytest
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import Archive, horizon_for
+from storage import convert
+from streaks import compute_streak, join_streaks
+from tracker import HabitTracker
+from helpers import on_disk, ordinals
+
+TODAY = date(2026, 3, 2)
+HISTORY = {
+    # A run from 2024-12-30 into the live years, and older scattered days
+    'gym': ['2023-05-01', '2023-05-02', '2024-12-30', '2024-12-31', '2025-01-01', '2025-01-02', '2026-03-01'],
+    'read': ['2022-01-01', '2026-03-01', '2026-03-02'],
+    'pray': [],
+}
+
+@pytest.fixture
+def archived(storage, tmp_path):
+    """A tracker on each archivable storage with everything before 2025 archived"""
+    tracker = HabitTracker(str(tmp_path / 'habits'), storage=storage)
+    if not tracker.storage.archivable:
+        pytest.skip(f'{storage} storage does not archive')
+    tracker.data = {habit: list(dates) for habit, dates in HISTORY.items()}
+    tracker.save_data()
+    assert tracker.archive_old(keep_years=1, today=TODAY) == 5
+    return HabitTracker(tracker.file, storage=storage)
+
+
+class TestJoinStreaks:
+    def test_continues_earlier_run(self):
+        """Test a live history that carries on the archived run"""
+        days = ordinals('2024-12-30', '2024-12-31', '2025-01-01', '2025-01-02')
+        earlier = compute_streak(days[:2])
+        assert join_streaks(earlier, days[2:]) == compute_streak(days)
+        assert join_streaks(earlier, days[2:] + ordinals('2025-02-01')) == compute_streak(days + ordinals('2025-02-01'))
+
+    def test_gap_and_empty(self):
+        """Test a gap between the parts and an empty live part"""
+        earlier = compute_streak(ordinals('2023-05-01', '2023-05-02'))
+        assert join_streaks(earlier, ordinals('2025-01-01')) == [1, 2, ordinals('2025-01-01')[0]]
+        assert join_streaks(earlier, []) == earlier
+
+    def test_overlap_needs_full_history(self):
+        """Test that live days before the archived end are refused"""
+        assert join_streaks(compute_streak(ordinals('2024-12-31')), ordinals('2024-12-30')) is None
+
+
+class TestArchive:
+    def test_live_file_keeps_recent_years(self, archived):
+        """Test that only completions from the horizon on stay live"""
+        assert horizon_for(1, TODAY) == date(2025, 1, 1)
+        assert archived.data['gym'] == ['2025-01-01', '2025-01-02', '2026-03-01']
+        assert archived.data['read'] == ['2026-03-01', '2026-03-02']
+        assert sorted(archived.archive.years) == [2022, 2023, 2024]
+
+    def test_recent_queries_do_not_open_segments(self, archived):
+        """Test that today's work, this month's calendar and streaks stay on the live file"""
+        with patch.object(Archive, 'segment', side_effect=AssertionError('segment read')):
+            assert archived.is_done('gym', '2026-03-01') is True
+            assert archived.completed_between('gym', date(2026, 3, 1), date(2026, 3, 31)) == [date(2026, 3, 1)]
+            assert archived.streak('gym', today=TODAY) == (1, 4, date(2026, 3, 1))
+            assert archived.streak('read', today=TODAY) == (2, 2, date(2026, 3, 2))
+
+    def test_long_ranges_read_only_their_years(self, archived):
+        """Test that a range reaching back reads just the archived years it covers"""
+        read = []
+        original = Archive.segment
+
+        def segment(archive, year):
+            read.append(year)
+            return original(archive, year)
+
+        with patch.object(Archive, 'segment', segment):
+            dates = archived.completed_between('gym', date(2024, 12, 1), date(2025, 1, 31))
+        assert [str(day) for day in dates] == ['2024-12-30', '2024-12-31', '2025-01-01', '2025-01-02']
+        assert read == [2024]
+        assert archived.count_between('gym', date(2023, 1, 1), date(2023, 12, 31)) == 2
+
+    def test_history_and_export_include_archive(self, archived):
+        """Test that full stats and export see every year"""
+        history = archived.history()
+        assert {habit: list(dates) for habit, dates in history.items()} == HISTORY
+        assert sum(1 for _, day in archived.iter_completions() if day) == 10
+
+    def test_backfill_before_horizon(self, archived):
+        """Test that a live backfill overlapping the archive still gives the right streak"""
+        archived.mark_many('gym', ['2024-12-29'])
+        assert archived.streak('gym', today=TODAY)[1] == 5
+        assert archived.rebuild_streaks() == []
+
+    def test_removed_habit_leaves_archive(self, archived):
+        """Test that removing a habit detaches its archived history"""
+        archived.remove_habit('read')
+        archived.add_habit('read')
+        assert archived.history()['read'] == []
+        assert 'read' not in Archive(archived.file)
+
+    def test_archiving_again_merges_segments(self, archived):
+        """Test that a later run adds to existing segments without duplicates"""
+        archived.mark_many('gym', ['2024-06-01'])
+        assert archived.archive_old(keep_years=1, today=TODAY) == 1
+        assert archived.archive_old(keep_years=1, today=TODAY) == 0
+        assert [str(day) for day in archived.completed_between('gym', date(2024, 1, 1), date(2024, 12, 31))] == \
+            ['2024-06-01', '2024-12-30', '2024-12-31']
+
+    def test_convert_keeps_archived_years(self, archived, storage, tmp_path):
+        """Test that converting an archived store carries the archived years into the target"""
+        target = str(tmp_path / 'converted.db')
+        assert convert(archived.file, storage, target, 'sqlite') == len(HISTORY)
+        assert on_disk(target, 'sqlite') == HISTORY
+
+    def test_rejects_horizon_after_today(self, archived):
+        """Test that a negative keep_years cannot move current completions out"""
+        with pytest.raises(ValueError):
+            archived.archive_old(keep_years=-1, today=TODAY)
+        assert archived.is_done('read', '2026-03-02')
+
+    def test_sqlite_is_not_archivable(self, tmp_path):
+        """Test that the database storage refuses to archive"""
+        tracker = HabitTracker(str(tmp_path / 'habits.db'), storage='sqlite')
+        with pytest.raises(ValueError):
+            tracker.archive_old()
+        assert tracker.archive is None
@@ -0,0 +1,114 @@
+import pytest
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import binformat
+from binformat import HistoryFile, decode, encode
+from storage import BinaryStorage, JsonStorage, convert
+from tracker import HabitTracker
+
+DATA = {
+    'gym': ['2023-12-31', '2024-01-01', '2024-02-29', '2024-12-31'],
+    'read': ['2024-03-05', '2024-03-01'],
+    'empty': [],
+    'café ☕': ['2020-01-01'],
+}
+
+@pytest.fixture
+def history_file(tmp_path):
+    path = tmp_path / 'habits.bin'
+    path.write_bytes(encode(DATA))
+    history = HistoryFile(str(path))
+    yield history
+    history.close()
+
+
+class TestEncoding:
+    def test_round_trip(self):
+        """Test that decoding gives back sorted, unique histories"""
+        decoded = decode(encode({**DATA, 'dupes': ['2024-01-02', '2024-01-02']}))
+        assert decoded['gym'] == DATA['gym']
+        assert decoded['read'] == ['2024-03-01', '2024-03-05']
+        assert decoded['empty'] == []
+        assert decoded['café ☕'] == ['2020-01-01']
+        assert decoded['dupes'] == ['2024-01-02']
+
+    def test_year_costs_a_fixed_size(self):
+        """Test that a full year takes one bitmap, not one record per day"""
+        year = [date.fromordinal(day).isoformat()
+                for day in range(date(2024, 1, 1).toordinal(), date(2025, 1, 1).toordinal())]
+        assert len(encode({'gym': year})) == len(encode({'gym': year[:1]}))
+
+    def test_rejects_other_files(self):
+        """Test that a file without the magic header is refused"""
+        with pytest.raises(ValueError):
+            decode(b'{"gym": []}')
+
+
+class TestHistoryFile:
+    def test_month(self, history_file):
+        """Test reading one month, including a leap day"""
+        assert history_file.between('gym', date(2024, 2, 1), date(2024, 2, 29)) == [date(2024, 2, 29)]
+        assert history_file.between('read', date(2024, 3, 2), date(2024, 3, 31)) == [date(2024, 3, 5)]
+
+    def test_range_across_years(self, history_file):
+        """Test a range that spans the end of a leap year"""
+        assert history_file.between('gym', date(2023, 12, 1), date(2024, 1, 31)) == [
+            date(2023, 12, 31), date(2024, 1, 1)]
+        assert history_file.between('gym', date(2024, 12, 31), date(2025, 6, 1)) == [date(2024, 12, 31)]
+
+    def test_empty_range(self, history_file):
+        """Test ranges with no completions or no stored years"""
+        assert history_file.between('empty', date(2024, 1, 1), date(2024, 12, 31)) == []
+        assert history_file.between('gym', date(2022, 1, 1), date(2022, 12, 31)) == []
+
+
+class TestBinaryStorage:
+    def test_convert_both_ways(self, tmp_path):
+        """Test JSON -> binary -> JSON keeps every habit"""
+        source = str(tmp_path / 'habits.json')
+        JsonStorage(source).save(DATA)
+        assert convert(source, 'json', str(tmp_path / 'habits.bin'), 'binary') == len(DATA)
+        assert convert(str(tmp_path / 'habits.bin'), 'binary', str(tmp_path / 'back.json'), 'json') == len(DATA)
+        back = JsonStorage(str(tmp_path / 'back.json')).load()
+        assert back['read'] == ['2024-03-01', '2024-03-05']
+        assert back['gym'] == DATA['gym']
+
+    def test_calendar_query_skips_full_load(self, tmp_path):
+        """Test that a month of one habit is read without decoding the file"""
+        path = str(tmp_path / 'habits.bin')
+        BinaryStorage(path).save(DATA)
+        tracker = HabitTracker(path, storage='binary')
+        with patch.object(binformat, 'decode') as full_decode:
+            assert 'gym' in tracker
+            assert tracker.completed_between('gym', date(2024, 2, 1), date(2024, 2, 29)) == [date(2024, 2, 29)]
+            assert tracker.completed_between('nope', date(2024, 2, 1), date(2024, 2, 29)) is None
+        full_decode.assert_not_called()
+
+    def test_sees_new_writes(self, tmp_path):
+        """Test that the mapped view follows writes from another tracker"""
+        path = str(tmp_path / 'habits.bin')
+        reader = HabitTracker(path, storage='binary')
+        assert reader.habit_names() == []
+        HabitTracker(path, storage='binary').add_habit('gym')
+        assert reader.habit_names() == ['gym']
+
+    def test_stale_sidecar_after_outside_write(self, tmp_path):
+        """Test that another tracker's write without a fresh sidecar is picked up on reload"""
+        path = str(tmp_path / 'habits.bin')
+        HabitTracker(path, storage='binary').add_habit('gym')
+        reader = HabitTracker(path, storage='binary')
+        assert reader.streak('gym', today=date(2025, 7, 1)) == (0, 0, None)
+        writer = HabitTracker(path, storage='binary')
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-01'
+            writer.mark_as_done('gym')
+            os.remove(path + '.streaks')
+            reader.streak('gym')
+            assert reader.reload() is True
+            assert list(reader.today_index().done) == ['gym']
+        assert reader.streak('gym', today=date(2025, 7, 1)) == (1, 1, date(2025, 7, 1))
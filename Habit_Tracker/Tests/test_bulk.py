@@ -0,0 +1,105 @@
+import pytest
+import io
+import os
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk import chunks, guess_format, import_rows, read_rows, write_rows
+from tracker import HabitTracker
+
+CSV = """habit,date
+gym,2025-07-01
+gym,2025-07-02
+read,2025-07-02
+gym,2025-07-01
+pray,
+"""
+
+def rows(text, fmt='csv'):
+    return read_rows(io.StringIO(text), fmt)
+
+
+class TestReadRows:
+    def test_csv(self):
+        """Test CSV with a header, empty dates and blank lines"""
+        assert list(rows('habit,date\ngym,2025-07-01\n\npray,\n')) == [('gym', '2025-07-01'), ('pray', '')]
+
+    def test_ndjson(self):
+        """Test NDJSON rows, including a habit without a date"""
+        text = '{"habit": "gym", "date": "2025-07-01"}\n{"habit": "pray", "date": null}\n'
+        assert list(rows(text, 'ndjson')) == [('gym', '2025-07-01'), ('pray', None)]
+
+    def test_malformed_rows_are_marked(self):
+        """Test that unreadable lines come back with their line number"""
+        assert list(rows('a,b,c\n,2025-07-01\n')) == [(None, 1), (None, 2)]
+        assert list(rows('{"date": "x"}\nnot json\n', 'ndjson')) == [(None, 1), (None, 2)]
+
+    def test_guess_format(self):
+        """Test format detection from the file name"""
+        assert guess_format('out.ndjson') == 'ndjson'
+        assert guess_format('out.CSV') == 'csv'
+        assert guess_format(None) == 'csv'
+
+    def test_chunks(self):
+        """Test that chunks split lazily and keep the remainder"""
+        assert list(chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+        with pytest.raises(ValueError):
+            list(chunks(iter(range(5)), 0))
+
+
+class TestImport:
+    def test_import_and_export_round_trip(self, tracker):
+        """Test that an import lands on every storage and exports back"""
+        stats = import_rows(tracker, rows(CSV))
+        assert stats == {'rows': 5, 'added': 3, 'duplicates': 1, 'habits': 3, 'skipped': 0}
+        reloaded = HabitTracker(tracker.file, storage=tracker.storage.__class__(tracker.file))
+        assert sorted(reloaded.iter_completions()) == [
+            ('gym', '2025-07-01'), ('gym', '2025-07-02'), ('pray', None), ('read', '2025-07-02')]
+        assert reloaded.streak('gym', today=date(2025, 7, 2)) == (2, 2, date(2025, 7, 2))
+        out = io.StringIO()
+        assert write_rows(reloaded.iter_completions(), out, 'ndjson') == 4
+        again = import_rows(reloaded, rows(out.getvalue(), 'ndjson'))
+        assert again['added'] == 0 and again['habits'] == 0
+
+    def test_mark_many_takes_datetimes(self, tracker):
+        """Test that a datetime is recorded as its day, not kept as a timestamp string"""
+        tracker.add_habit('gym')
+        assert tracker.mark_many('gym', [datetime(2025, 7, 1, 18, 30), date(2025, 7, 2)]) == 2
+        assert list(HabitTracker(tracker.file, storage=tracker.storage.__class__(tracker.file)).data['gym']) == \
+            ['2025-07-01', '2025-07-02']
+
+    def test_malformed_rows_are_skipped(self, tmp_path):
+        """Test that bad dates and lines are counted, not imported"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        stats = import_rows(tracker, rows('gym,2025-07-01\ngym,yesterday\nx,y,z\n'))
+        assert stats['rows'] == 1
+        assert stats['skipped'] == 2
+        assert tracker.habit_names() == ['gym']
+
+    def test_one_write_per_chunk(self, tmp_path):
+        """Test that rows are persisted once per chunk, not once per row"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        text = ''.join(f'gym,2025-07-{day:02d}\n' for day in range(1, 31))
+        with patch.object(tracker.storage, 'record_many', wraps=tracker.storage.record_many) as record_many:
+            import_rows(tracker, rows(text), chunk_size=10)
+        assert record_many.call_count == 3
+        assert len(HabitTracker(tracker.file).data['gym']) == 30
+
+    def test_input_is_streamed(self, tmp_path):
+        """Test that no more than one chunk is read ahead of what was applied"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        produced = []
+
+        def generate():
+            for day in range(1, 29):
+                produced.append(day)
+                yield 'gym', f'2025-02-{day:02d}'
+
+        def check(stats):
+            assert len(produced) == stats['rows']
+
+        import_rows(tracker, generate(), chunk_size=7, on_chunk=check)
+        assert len(produced) == 28
@@ -0,0 +1,78 @@
+import pytest
+import json
+import os
+import sys
+from datetime import date
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from array import array
+from collections.abc import Sequence
+from completions import Habit, wrap
+
+
+class TestHabit:
+    def test_reads_like_a_sorted_list(self):
+        """Test that a Habit compares, indexes and serialises as its sorted ISO dates"""
+        habit = Habit(['2025-07-10', '2025-06-30', '2025-07-10', date(2025, 7, 8)])
+        assert habit == ['2025-06-30', '2025-07-08', '2025-07-10']
+        assert habit.ordinals() == array('I', [date(2025, 6, 30).toordinal(), date(2025, 7, 8).toordinal(),
+                                               date(2025, 7, 10).toordinal()])
+        assert habit[-1] == '2025-07-10' and habit[:1] == ['2025-06-30'] and len(habit) == 3
+        assert json.dumps({'h': habit}, default=list) == '{"h": ["2025-06-30", "2025-07-08", "2025-07-10"]}'
+
+    def test_membership_and_ranges(self):
+        """Test bisect lookups for strings, dates and ranges"""
+        habit = Habit(['2023-12-31', '2024-01-01', '2024-02-29', '2025-01-01'])
+        assert '2024-02-29' in habit and date(2024, 1, 1) in habit and '2024-02-28' not in habit
+        assert habit.between('2023-12-15', '2024-01-15') == [date(2023, 12, 31), date(2024, 1, 1)]
+        assert habit.count_between(date(2024, 1, 1), '2024-12-31') == 2
+        assert habit.latest() == date(2025, 1, 1) and Habit().latest() is None
+
+    def test_mutations_keep_order(self):
+        """Test append in and out of order, duplicates and remove"""
+        habit = Habit(['2025-07-10'])
+        habit.append('2025-07-11')
+        habit.append('2025-07-01')
+        habit.append('2025-07-11')
+        assert habit == ['2025-07-01', '2025-07-10', '2025-07-11']
+        assert habit.count('2025-07-11') == 1 and habit.index('2025-07-10') == 1
+        habit.remove('2025-07-10')
+        with pytest.raises(ValueError):
+            habit.remove('2025-07-10')
+        assert habit == ['2025-07-01', '2025-07-11']
+
+    def test_list_methods(self):
+        """Test the list operations callers used on plain date lists"""
+        habit = Habit(['2025-07-10', '2025-07-08'])
+        copy = habit.copy()
+        habit.insert(0, '2025-07-12')
+        assert habit.pop() == '2025-07-12' and habit.pop(0) == '2025-07-08'
+        assert copy == ['2025-07-08', '2025-07-10'] and habit == ['2025-07-10']
+        assert habit + ['x'] == ['2025-07-10', 'x'] and ['x'] + habit == ['x', '2025-07-10']
+        habit += ['2025-07-01']
+        del habit[0]
+        assert habit == ['2025-07-10'] and isinstance(habit, Sequence)
+        habit.clear()
+        assert habit == [] and json.dumps(copy, default=list) == '["2025-07-08", "2025-07-10"]'
+
+    def test_keeps_strings_that_are_not_dates(self):
+        """Test that malformed entries survive a round trip instead of being dropped"""
+        habit = Habit(['2025-07-10', 'someday'])
+        habit.append('later')
+        assert list(habit) == ['2025-07-10', 'someday', 'later']
+        assert 'someday' in habit and len(habit) == 3
+        assert habit.ordinals() == array('I', [date(2025, 7, 10).toordinal()])
+
+    def test_range_queries_across_years(self):
+        """Test ranges that span a year boundary and a leap day"""
+        habit = Habit(['2023-12-31', '2024-01-01', '2024-02-29', '2024-12-31', '2025-01-01'])
+        assert habit.count_between('2024-01-01', '2024-12-31') == 3
+        assert habit.count_between('2020-01-01', '2030-12-31') == 5
+        assert habit.between('2024-03-01', '2024-12-30') == []
+
+    def test_wrap_converts_plain_lists(self):
+        """Test that wrap turns loaded lists into Habits"""
+        data = wrap({'gym': ['2025-07-11'], 'pray': []})
+        assert all(isinstance(dates, Habit) for dates in data.values())
+        assert data == {'gym': ['2025-07-11'], 'pray': []}
@@ -0,0 +1,78 @@
+import pytest
+import json
+import multiprocessing
+import os
+import sys
+from datetime import date, timedelta
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JournalStorage
+from tracker import HabitTracker
+
+PROCESSES = 8
+HABITS_PER_PROCESS = 15
+
+def make_tracker(path, kind):
+    if kind == 'journal':
+        # Compact often so appends race with snapshot rewrites too
+        return HabitTracker(path, storage=JournalStorage(path, compact_every=7))
+    return HabitTracker(path, storage=kind)
+
+def worker(path, kind, worker_id):
+    """Add and complete habits, interleaved with every other worker"""
+    tracker = make_tracker(path, kind)
+    tracker.data  # load up front so later writes must notice the others
+    for i in range(HABITS_PER_PROCESS):
+        habit = f'w{worker_id}-{i}'
+        tracker.add_habit(habit)
+        tracker.mark_as_done(habit)
+        # A day of its own for every mark, so a lost one shows up as a missing date
+        day = date(2025, 1, 1) + timedelta(days=worker_id * HABITS_PER_PROCESS + i)
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = day.isoformat()
+            tracker.mark_as_done('shared')
+
+
+class TestConcurrentWriters:
+    @pytest.mark.parametrize('kind', ['json', 'journal', 'sqlite'])
+    def test_no_completion_is_lost(self, kind, tmp_path):
+        """Test that parallel processes never overwrite each other's updates"""
+        path = str(tmp_path / 'habits')
+        make_tracker(path, kind).add_habit('shared')
+        processes = [multiprocessing.Process(target=worker, args=(path, kind, n)) for n in range(PROCESSES)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+
+        data = make_tracker(path, kind).data
+        for worker_id in range(PROCESSES):
+            for i in range(HABITS_PER_PROCESS):
+                assert len(data[f'w{worker_id}-{i}']) == 1
+        assert len(data['shared']) == PROCESSES * HABITS_PER_PROCESS
+        assert len(data) == PROCESSES * HABITS_PER_PROCESS + 1
+
+
+class TestAtomicWrites:
+    def test_crash_mid_write_keeps_old_file(self, tmp_path):
+        """Test that a failed save leaves the previous file intact"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        tracker.add_habit('gym')
+        with patch('storage.json.dump', side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                tracker.add_habit('read')
+        with open(tracker.file) as f:
+            assert json.load(f) == {'gym': []}
+        assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+
+    def test_stale_instance_reloads_before_writing(self, tmp_path):
+        """Test that an instance holding old data picks up another writer's changes"""
+        path = str(tmp_path / 'habits.json')
+        first, second = HabitTracker(path), HabitTracker(path)
+        first.data, second.data
+        first.add_habit('gym')
+        second.add_habit('read')
+        assert HabitTracker(path).data == {'gym': [], 'read': []}
@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+from datetime import datetime
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dayindex import DayIndex
+from server import HabitServer
+from tracker import HabitTracker
+
+HISTORY = {
+    'gym': ['2026-03-01', '2026-03-02'],
+    'read': ['2026-02-27'],
+    'pray': [],
+    'plan': ['2026-03-05'],  # scheduled ahead
+}
+
+@pytest.fixture
+def today():
+    with patch('tracker.datetime') as mock_datetime:
+        mock_datetime.now.return_value = datetime(2026, 3, 2, 9)
+        yield mock_datetime
+
+@pytest.fixture(params=[False, True], ids=['loaded', 'streamed'])
+def streamed(request, storage):
+    """Whether the json storage streams its file instead of loading it"""
+    if request.param and storage != 'json':
+        pytest.skip(f'{storage} storage does not stream')
+    return request.param
+
+@pytest.fixture
+def open_tracker(storage, streamed, tmp_path, today):
+    """Opens new trackers on HISTORY, saved in each storage"""
+    path = str(tmp_path / 'habits')
+    def open_tracker():
+        tracker = HabitTracker(path, storage=storage)
+        if streamed:
+            tracker.storage.stream_threshold = 0
+        return tracker
+    tracker = HabitTracker(path, storage=storage)
+    tracker.data = {habit: list(dates) for habit, dates in HISTORY.items()}
+    tracker.save_data()
+    return open_tracker
+
+@pytest.fixture
+def tracker(open_tracker):
+    return open_tracker()
+
+
+class TestDayIndex:
+    def test_split(self):
+        """Test that names are split into pending, done and unknown"""
+        index = DayIndex('2026-03-02', ['read', 'pray'], ['gym'])
+        assert index.split(['gym', 'pray', 'ghost', 'read']) == (['pray', 'read'], ['gym'], ['ghost'])
+        assert [index.status(habit) for habit in ('gym', 'read', 'ghost')] == [True, False, None]
+        assert len(index) == 3
+
+    def test_updates(self):
+        """Test add, mark and remove, and that other days are ignored"""
+        index = DayIndex('2026-03-02', ['read'])
+        index.add('pray')
+        index.mark('read', '2026-03-01')
+        assert list(index.pending) == ['read', 'pray']
+        index.mark('read', '2026-03-02')
+        index.add('read')
+        assert list(index.done) == ['read']
+        index.remove('read')
+        assert index.status('read') is None
+
+
+class TestTrackerIndex:
+    def test_built_from_streaks(self, tracker):
+        """Test the index on every storage, including a habit only done on a later day"""
+        index = tracker.today_index()
+        assert list(index.done) == ['gym']
+        assert sorted(index.pending) == ['plan', 'pray', 'read']
+
+    def test_kept_current(self, tracker, open_tracker):
+        """Test that add, done, remove and mark_many update the index in place"""
+        index = tracker.today_index()
+        tracker.apply_many([('done', 'read'), ('add', 'walk'), ('remove', 'pray')])
+        tracker.mark_many('plan', ['2026-03-02'])
+        assert tracker.today_index() is index
+        assert list(index.done) == ['gym', 'read', 'plan']
+        assert list(index.pending) == ['walk']
+        assert list(open_tracker().today_index().done) == ['gym', 'read', 'plan']
+
+    def test_new_day(self, tracker, today):
+        """Test that the index is rebuilt when the day changes"""
+        tracker.today_index()
+        today.now.return_value = datetime(2026, 3, 3, 0, 1)
+        index = tracker.today_index()
+        assert index.day == '2026-03-03'
+        assert not index.done
+
+    def test_outside_changes(self, tracker, open_tracker):
+        """Test that a reload picks up habits marked by another process"""
+        tracker.today_index()
+        open_tracker().mark_as_done('read')
+        tracker.reload()
+        assert tracker.today_index().status('read') is True
+
+
+class TestListFilter:
+    def test_daemon_lists_pending_and_done(self, tmp_path, today):
+        """Test the list filters answered by a daemon"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        tracker.data = {habit: list(dates) for habit, dates in HISTORY.items()}
+        tracker.save_data()
+        server = HabitServer(tracker, path=str(tmp_path / 'habits.sock'), flush_interval=3600)
+        try:
+            server.handle({'command': 'done', 'name': 'pray'})
+            assert server.handle({'command': 'list', 'show': 'pending'}) == {'names': ['read', 'plan']}
+            assert server.handle({'command': 'list', 'show': 'done'}) == {'names': ['gym', 'pray']}
+        finally:
+            server.close()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import DeliveryQueue, FakeSink, TokenBucket, reminder_message
+
+class HangingSink:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def send(self, title, message):
+        self.release.wait()
+
+class TestDeliveryQueue(unittest.TestCase):
+    def test_delivers_every_reminder(self):
+        """Test that the worker pool delivers everything submitted before close."""
+        sink = FakeSink()
+        with DeliveryQueue(sink, workers=3) as delivery:
+            for i in range(20):
+                delivery.submit(f"habit{i}")
+        self.assertEqual(len(sink.sent), 20)
+        self.assertEqual(delivery.stats["sent"], 20)
+        self.assertEqual(len(delivery.latencies), 20)
+
+    def test_digest_merges_waiting_reminders(self):
+        """Test that reminders queued together become one notification."""
+        sink = FakeSink()
+        delivery = DeliveryQueue(sink, workers=1, digest=True)
+        for habit in ["gym", "read", "walk"]:
+            delivery.submit(habit)
+        delivery.start().close()
+        self.assertEqual([sent[:2] for sent in sink.sent], [reminder_message(["gym", "read", "walk"])])
+
+    def test_hanging_sink_times_out(self):
+        """Test that a hung backend does not block the worker forever."""
+        sink = HangingSink()
+        results = []
+        with DeliveryQueue(sink, workers=1, timeout=0.05,
+                           on_result=lambda habits, outcome: results.append((habits, outcome))) as delivery:
+            delivery.submit("gym")
+            delivery.submit("read")
+        sink.release.set()
+        self.assertEqual(results, [(["gym"], "timed_out"), (["read"], "skipped")])
+
+    def test_stuck_sink_does_not_leak_threads(self):
+        """Test that calls stop once every caller is stuck and resume when the sink returns."""
+        sink = HangingSink()
+        threads = threading.active_count()
+        delivery = DeliveryQueue(sink, workers=2, timeout=0.02).start()
+        for i in range(10):
+            delivery.submit(f"habit{i}")
+        delivery.close()
+        self.assertEqual(delivery.stats["timed_out"], 2)
+        self.assertEqual(delivery.stats["skipped"], 8)
+        self.assertLessEqual(threading.active_count(), threads + 2)
+        sink.release.set()
+        with DeliveryQueue(FakeSink(), workers=2, latency_samples=5) as delivery:
+            for i in range(10):
+                delivery.submit(f"habit{i}")
+        self.assertEqual(delivery.stats["sent"], 10)
+        self.assertEqual(len(delivery.latencies), 5)
+
+    def test_failing_sink_is_counted(self):
+        """Test that an exception from the sink is recorded, not raised."""
+        with DeliveryQueue(FakeSink(fail=True), workers=1) as delivery:
+            delivery.submit("gym")
+        self.assertEqual(delivery.stats["failed"], 1)
+
+    def test_full_queue_drops(self):
+        """Test that submit reports a full queue instead of blocking the scheduler."""
+        delivery = DeliveryQueue(FakeSink(), max_pending=1)
+        self.assertTrue(delivery.submit("gym"))
+        self.assertFalse(delivery.submit("read"))
+        self.assertEqual(delivery.stats["dropped"], 1)
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate_limit(self):
+        """Test that sends beyond the burst wait for new tokens."""
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        for _ in range(4):
+            bucket.acquire(sleep=sleep)
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import pytest
+import io
+import json
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonstream import Scanner, rewrite
+from storage import JsonStorage
+from tracker import HabitTracker
+from helpers import mark
+
+DATA = {
+    'gym': ['2025-07-01', '2025-07-02', '2025-07-03'],
+    'odd "name" ]': ['x]', 'y[', '\\\\'],
+    'nested': {'a': [1, {'b': ']'}]},
+    'empty': [],
+}
+
+@pytest.fixture
+def streamed(tmp_path):
+    """A tracker whose JSON storage streams regardless of file size"""
+    path = str(tmp_path / 'habits.json')
+    with open(path, 'w') as f:
+        json.dump({'gym': ['2025-07-01', '2025-07-02'], 'read': ['2025-07-02']}, f, indent=4)
+    tracker = HabitTracker(path)
+    tracker.storage.stream_threshold = 0
+    return tracker
+
+
+class TestScanner:
+    @pytest.mark.parametrize('indent', [None, 4])
+    @pytest.mark.parametrize('chunk_size', [1, 3, 64, 1 << 16])
+    def test_round_trip(self, indent, chunk_size):
+        """Test that every value comes back intact whatever the chunking"""
+        text = json.dumps(DATA, indent=indent)
+        scanned = {habit: json.loads(raw) for habit, raw in Scanner(io.StringIO(text), chunk_size)}
+        assert scanned == DATA
+
+    def test_empty_object(self):
+        """Test files with no habits"""
+        assert list(Scanner(io.StringIO('{ }'))) == []
+        assert list(Scanner(io.StringIO(''))) == []
+
+    def test_truncated_file(self):
+        """Test that a cut-off file is an error, not a partial result"""
+        with pytest.raises(ValueError):
+            list(Scanner(io.StringIO('{"gym": ["2025-07-01", '), chunk_size=4))
+
+    def test_rewrite_matches_json_dump(self):
+        """Test that a streamed copy is byte for byte what json.dump writes"""
+        data = {'gym': ['2025-07-01'], 'read': []}
+        out = io.StringIO()
+        rewrite(Scanner(io.StringIO(json.dumps(data, indent=4))), out, append=[('walk', ['2025-07-02'])])
+        assert out.getvalue() == json.dumps({**data, 'walk': ['2025-07-02']}, indent=4)
+
+
+class TestStreamingStorage:
+    def test_small_files_load_normally(self, tmp_path):
+        """Test that streaming only starts at the size threshold"""
+        storage = JsonStorage(str(tmp_path / 'habits.json'))
+        storage.save({'gym': []})
+        assert storage.indexed is False
+        storage.stream_threshold = 0
+        assert storage.indexed is True
+
+    def test_queries_never_load_everything(self, streamed):
+        """Test list, lookups, calendar ranges and streaks without json.load"""
+        with patch('storage.json.load', side_effect=AssertionError('full load')):
+            assert streamed.habit_names() == ['gym', 'read']
+            assert 'read' in streamed
+            assert 'walk' not in streamed
+            assert streamed.is_done('gym', '2025-07-02') is True
+            assert streamed.completed_between('gym', date(2025, 7, 2), date(2025, 7, 31)) == [date(2025, 7, 2)]
+            assert streamed.streak('gym', today=date(2025, 7, 3)) == (2, 2, date(2025, 7, 2))
+            assert streamed.completion_counts() == {'gym': 2, 'read': 1}
+        assert streamed._data is None
+
+    def test_edits_stream_and_keep_format(self, streamed):
+        """Test that add/done/remove rewrite the file exactly as a full save would"""
+        with patch.object(JsonStorage, 'load', side_effect=AssertionError('full load')):
+            assert streamed.add_habit('walk') == 'Habit "walk" added.'
+            assert mark(streamed, 'gym', '2025-07-03') == 'Habit "gym" marked as done for today.'
+            assert mark(streamed, 'gym', '2025-07-03') == 'Habit "gym" already marked as done for today.'
+            assert mark(streamed, 'nope', '2025-07-03') == 'Habit "nope" does not exist.'
+            assert streamed.remove_habit('read') == 'Habit "read" removed.'
+            assert streamed.streak('gym', today=date(2025, 7, 3)) == (3, 3, date(2025, 7, 3))
+        expected = {'gym': ['2025-07-01', '2025-07-02', '2025-07-03'], 'walk': []}
+        with open(streamed.file) as f:
+            assert f.read() == json.dumps(expected, indent=4)
+        reloaded = HabitTracker(streamed.file)
+        assert reloaded.data == expected
+        assert reloaded.rebuild_streaks() == []
+
+    def test_streak_does_not_hide_outside_writes(self, tmp_path):
+        """Test that a streak read after another tracker wrote still lets reload pick the write up"""
+        path = str(tmp_path / 'habits.json')
+        HabitTracker(path).add_habit('gym')
+        reader = HabitTracker(path)
+        reader.data
+        mark(HabitTracker(path), 'gym', '2025-07-03')
+        assert reader.streak('gym', today=date(2025, 7, 3)) == (1, 1, date(2025, 7, 3))
+        assert reader.reload() is True
+        assert reader.data['gym'] == ['2025-07-03']
+
+    def test_batches_load_once(self, streamed):
+        """Test that several operations fall back to one load and one write"""
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-03'
+            with patch.object(streamed.storage, 'add_completion') as streamed_edit:
+                streamed.apply_many([('done', 'gym'), ('done', 'read')])
+        streamed_edit.assert_not_called()
+        assert HabitTracker(streamed.file).data['read'] == ['2025-07-02', '2025-07-03']
+
+    def test_export_and_backfill(self, streamed):
+        """Test that export streams and a backfill loads once instead of rewriting per day"""
+        with patch('storage.json.load', side_effect=AssertionError('full load')):
+            assert list(streamed.iter_completions()) == [
+                ('gym', '2025-07-01'), ('gym', '2025-07-02'), ('read', '2025-07-02')]
+        with patch.object(streamed.storage, 'add_completion') as streamed_edit:
+            assert streamed.mark_many('read', ['2025-06-30', '2025-07-01']) == 2
+        streamed_edit.assert_not_called()
+        assert HabitTracker(streamed.file).data['read'] == ['2025-06-30', '2025-07-01', '2025-07-02']
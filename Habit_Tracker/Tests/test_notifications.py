@@ -1,13 +1,25 @@
 import unittest
+import asyncio
 import sys
 import os
+import threading
+import time
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from notifications import HabitNotifications
+from notifications import REMINDER_TICK, AsyncHabitNotifications, HabitNotifications
+from delivery import FakeSink, reminder_message
+from dayindex import DayIndex
+from scheduler import ReminderScheduler
+
+def day_index(data):
+    """The DayIndex a tracker holding ``data`` would build for today."""
+    today = datetime.now().strftime('%Y-%m-%d')
+    return DayIndex(today, [habit for habit, dates in data.items() if today not in dates],
+                    [habit for habit, dates in data.items() if today in dates])
 
 class TestHabitNotifications(unittest.TestCase):
     @patch('notifications.HabitTracker')
@@ -18,9 +30,18 @@ class TestHabitNotifications(unittest.TestCase):
             "Exercise": ["2023-10-01"],
             "Read": ["2023-10-01"]
         }
+        self.mock_tracker.storage.indexed = False
+        self.mock_tracker.today_index.side_effect = lambda: day_index(self.mock_tracker.data)
         self.notifier = HabitNotifications()
         self.notifier.tracker = self.mock_tracker
 
+    @patch('notifications.HabitTracker')
+    def test_shared_tracker(self, MockHabitTracker):
+        """Test that a tracker passed in is reused instead of loading the file again."""
+        notifier = HabitNotifications(tracker=self.mock_tracker)
+        self.assertIs(notifier.tracker, self.mock_tracker)
+        MockHabitTracker.assert_not_called()
+
     @patch('notifications.notification.notify')
     def test_send_notification(self, mock_notify):
         """Test send_notification method."""
@@ -58,14 +79,27 @@ class TestHabitNotifications(unittest.TestCase):
             self.notifier.check_habit_status(habit_name)
             mock_print.assert_called_with(f"[{datetime.now().strftime('%H:%M:%S')}] Habit '{habit_name}' not found")
 
-    @patch('notifications.schedule.every')
-    def test_schedule_habit_reminders(self, mock_schedule_every):
+    def test_schedule_habit_reminders(self):
         """Test schedule_habit_reminders method."""
-        mock_job = MagicMock()
-        mock_schedule_every.return_value.hours.do.return_value = mock_job
-        
         result = self.notifier.schedule_habit_reminders()
         self.assertTrue(result)
+        self.assertEqual(self.notifier.scheduler.names(), [REMINDER_TICK])
+
+    @patch('notifications.HabitNotifications.send_notification')
+    def test_schedule_habit_reminders_per_habit_interval(self, mock_send_notification):
+        """Test that a habit can get its own reminder interval, even one the default does not divide."""
+        now = [0.0]
+        self.notifier.scheduler = ReminderScheduler(self.notifier.check_due_habits, clock=lambda: now[0])
+        reminded = []
+        mock_send_notification.side_effect = lambda habit: reminded.append((now[0] / 3600, habit))
+        with patch('builtins.print'):
+            self.notifier.schedule_habit_reminders(hours=2, intervals={"Read": 1.5})
+            self.assertEqual(len(self.notifier.scheduler), 2)
+            while now[0] < 6 * 3600:
+                now[0] = self.notifier.scheduler.next_due()
+                self.notifier.scheduler.run_due()
+        self.assertEqual(reminded, [(1.5, "Read"), (2, "Exercise"), (3, "Read"), (4, "Exercise"),
+                                    (4.5, "Read"), (6, "Exercise"), (6, "Read")])
 
     @patch('builtins.print')
     def test_schedule_habit_reminders_no_habits(self, mock_print):
@@ -76,13 +110,103 @@ class TestHabitNotifications(unittest.TestCase):
         # Updated to match the actual message in your code
         mock_print.assert_called_with("❌ No habits found to schedule reminders")
 
-    @patch('notifications.schedule.run_pending')
-    @patch('notifications.time.sleep', side_effect=KeyboardInterrupt)
-    def test_run_scheduler(self, mock_sleep, mock_run_pending):
+    def test_run_scheduler(self):
         """Test run_scheduler method."""
-        with patch('builtins.print') as mock_print:
-            self.notifier.run_scheduler()
-            mock_print.assert_any_call("\n👋 Stopping Habit Tracker Notifications")
+        with patch.object(self.notifier.scheduler, 'run', side_effect=KeyboardInterrupt):
+            with patch('builtins.print') as mock_print:
+                self.notifier.run_scheduler()
+                mock_print.assert_any_call("\n👋 Stopping Habit Tracker Notifications")
+        self.assertFalse(self.notifier.running)
+
+    @patch('notifications.HabitNotifications.send_notification')
+    def test_due_habits_checked_in_one_pass(self, mock_send_notification):
+        """Test that one scheduler tick reminds about every pending habit."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        self.mock_tracker.data["Walk"] = [today]
+        with patch('builtins.print'):
+            self.notifier.schedule_habit_reminders()
+            due = self.notifier.scheduler.next_due()
+            fired = self.notifier.scheduler.run_due(now=due)
+        self.assertEqual(fired, [REMINDER_TICK])
+        self.assertEqual(sorted(call.args[0] for call in mock_send_notification.call_args_list), ["Exercise", "Read"])
+        self.mock_tracker.is_done.assert_not_called()
+
+    def test_run_scheduler_delivers_through_queue(self):
+        """Test that reminders raised while running go through the delivery queue."""
+        sink = FakeSink()
+        notifier = HabitNotifications(tracker=self.mock_tracker, sink=sink)
+
+        def run():
+            notifier.check_due_habits()
+            raise KeyboardInterrupt
+
+        with patch.object(notifier.scheduler, 'run', side_effect=run), patch('builtins.print'):
+            notifier.run_scheduler()
+        self.assertIsNone(notifier.delivery)
+        self.assertEqual(sorted(sent[:2] for sent in sink.sent),
+                         [reminder_message(["Exercise"]), reminder_message(["Read"])])
+
+    def test_one_reload_per_pass(self):
+        """Test that habits checked in the same pass share one reload."""
+        with patch('notifications.HabitNotifications.send_notification'), patch('builtins.print'):
+            self.notifier.check_due_habits()
+        self.mock_tracker.reload.assert_called_once_with()
+
+class TestAsyncHabitNotifications(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        self.tracker = MagicMock()
+        self.tracker.data = {"Exercise": [], "Read": [], "Walk": [today]}
+        self.tracker.today_index.side_effect = lambda: day_index(self.tracker.data)
+        self.sink = FakeSink()
+        self.notifier = AsyncHabitNotifications(tracker=self.tracker, sink=self.sink)
+        self.notifier.scheduler.coalesce = 0.01
+
+    async def run_for(self, seconds):
+        task = asyncio.create_task(self.notifier.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_sends_for_pending_habits_only(self):
+        """Test one reload per pass and reminders only for habits not done today."""
+        self.notifier.scheduler.add(REMINDER_TICK, 3600, delay=0.01)
+        with patch('builtins.print'):
+            await self.run_for(0.1)
+        self.tracker.reload.assert_called_once_with()
+        self.assertEqual(sorted(sent[:2] for sent in self.sink.sent),
+                         [reminder_message(["Exercise"]), reminder_message(["Read"])])
+        self.assertEqual(self.notifier.stats["sent"], 2)
+        self.assertFalse(self.notifier.running)
+
+    async def test_digest(self):
+        """Test that a digest pass sends a single notification."""
+        self.notifier.delivery_options["digest"] = True
+        self.notifier.scheduler.add(REMINDER_TICK, 3600, delay=0.01)
+        with patch('builtins.print'):
+            await self.run_for(0.1)
+        self.assertEqual([sent[:2] for sent in self.sink.sent], [reminder_message(["Exercise", "Read"])])
+
+    async def test_hung_sink_times_out(self):
+        """Test that a send past the timeout is abandoned without blocking the loop."""
+        self.notifier.sink = FakeSink(latency=0.5)
+        self.notifier.timeout = 0.05
+        self.tracker.data = {"Exercise": []}
+        self.notifier.scheduler.add(REMINDER_TICK, 3600, delay=0.0)
+        with patch('builtins.print'):
+            start = time.monotonic()
+            await self.run_for(0.15)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(self.notifier.stats["timed_out"], 1)
+
+    async def test_stop_from_another_thread(self):
+        """Test that stop ends run cleanly from outside the loop."""
+        task = asyncio.create_task(self.notifier.run())
+        await asyncio.sleep(0.01)
+        threading.Thread(target=self.notifier.stop).start()
+        await asyncio.wait_for(task, 1)
+        self.assertFalse(self.notifier.running)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import math
+import sys
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import AsyncReminderScheduler, ReminderScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestReminderScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.callback = MagicMock()
+        self.scheduler = ReminderScheduler(self.callback, coalesce=1.0, clock=self.clock)
+
+    def test_next_due_is_earliest(self):
+        """Test that the heap exposes the earliest reminder."""
+        self.scheduler.add("gym", 60)
+        self.scheduler.add("read", 30)
+        self.assertEqual(self.scheduler.next_due(), 1030.0)
+        self.assertIsNone(ReminderScheduler(self.callback).next_due())
+
+    def test_coalesces_reminders_due_together(self):
+        """Test that reminders within the coalesce window fire in one callback."""
+        self.scheduler.add("gym", 60)
+        self.scheduler.add("read", 60.5)
+        self.scheduler.add("pray", 120)
+        self.clock.now = 1060.0
+        self.assertEqual(self.scheduler.run_due(), ["gym", "read"])
+        self.callback.assert_called_once_with(["gym", "read"])
+
+    def test_reschedules_at_interval(self):
+        """Test that a fired reminder comes back one interval later."""
+        self.scheduler.add("gym", 60)
+        self.clock.now = 1060.0
+        self.scheduler.run_due()
+        self.assertEqual(self.scheduler.next_due(), 1120.0)
+
+    def test_missed_reminders_do_not_pile_up(self):
+        """Test that a long pause fires once, then resumes the cadence from now."""
+        self.scheduler.add("gym", 60)
+        self.clock.now = 2000.0
+        self.assertEqual(self.scheduler.run_due(), ["gym"])
+        self.assertEqual(self.scheduler.next_due(), 2060.0)
+
+    def test_remove(self):
+        """Test that a removed habit no longer fires."""
+        self.scheduler.add("gym", 60)
+        self.scheduler.add("read", 90)
+        self.scheduler.remove("gym")
+        self.assertEqual(self.scheduler.next_due(), 1090.0)
+        self.assertEqual(len(self.scheduler), 1)
+
+    def test_run_sleeps_until_due_and_stops(self):
+        """Test the blocking loop wakes only for due reminders and stops promptly."""
+        fired = []
+        scheduler = ReminderScheduler(fired.append, coalesce=0.0)
+        scheduler.add("gym", 0.05)
+        thread = threading.Thread(target=scheduler.run)
+        thread.start()
+        time.sleep(0.28)
+        scheduler.stop()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(4 <= len(fired) <= 6)
+        self.assertEqual(scheduler.wakeups, len(fired))
+
+class TestAsyncReminderScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_fires_on_timers_and_coalesces(self):
+        """Test that reminders due in the same window arrive in one callback."""
+        fired = []
+        scheduler = AsyncReminderScheduler(fired.append, coalesce=0.05)
+        # Start just past a grid line so both first reminders share a window
+        now = asyncio.get_running_loop().time()
+        offset = math.ceil(now / 0.05) * 0.05 - now
+        scheduler.add("gym", 0.05, delay=offset + 0.01)
+        scheduler.add("read", 0.05, delay=offset + 0.02)
+        scheduler.start()
+        await asyncio.sleep(offset + 0.13)
+        scheduler.close()
+        self.assertEqual(fired[0], ["gym", "read"])
+        self.assertTrue(2 <= len(fired) <= 3)
+        self.assertEqual(scheduler.wakeups, len(fired))
+
+    async def test_added_before_start(self):
+        """Test that reminders registered before the loop runs are armed by start."""
+        fired = []
+        scheduler = AsyncReminderScheduler(fired.append, coalesce=0.0)
+        scheduler.add("gym", 3600, delay=0.01)
+        self.assertIn("gym", scheduler)
+        await asyncio.sleep(0.03)
+        self.assertEqual(fired, [])
+        scheduler.start()
+        await asyncio.sleep(0.03)
+        scheduler.close()
+        self.assertEqual(fired, [["gym"]])
+
+    async def test_remove_cancels_timer(self):
+        """Test that a removed reminder never fires."""
+        fired = []
+        scheduler = AsyncReminderScheduler(fired.append, coalesce=0.0)
+        scheduler.start()
+        scheduler.add("gym", 0.01)
+        scheduler.add("read", 3600)
+        scheduler.remove("gym")
+        await asyncio.sleep(0.03)
+        scheduler.close()
+        self.assertEqual(fired, [])
+        self.assertEqual(scheduler.names(), ["read"])
+
+    async def test_passes_do_not_overlap(self):
+        """Test that reminders firing during a slow pass wait for the next one."""
+        active = []
+        passes = []
+
+        async def callback(habits):
+            active.append(1)
+            self.assertEqual(len(active), 1)
+            passes.append(habits)
+            await asyncio.sleep(0.05)
+            active.pop()
+
+        scheduler = AsyncReminderScheduler(callback, coalesce=0.0)
+        scheduler.start()
+        scheduler.add("gym", 3600, delay=0.0)
+        scheduler.add("read", 3600, delay=0.02)
+        scheduler.add("walk", 3600, delay=0.03)
+        await asyncio.sleep(0.15)
+        scheduler.close()
+        self.assertEqual(passes, [["gym"], ["read", "walk"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import pytest
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import FakeSink, reminder_message
+from notifications import HabitNotifications
+from server import HabitServer, connect, request
+from tracker import HabitTracker
+from helpers import on_disk, wait_for
+
+pytestmark = pytest.mark.skipif(not hasattr(__import__('socket'), 'AF_UNIX'), reason='needs Unix sockets')
+
+@pytest.fixture
+def server(tmp_path):
+    """A daemon on a small habits.json that never flushes on its own"""
+    path = str(tmp_path / 'habits.json')
+    with open(path, 'w') as f:
+        json.dump({'gym': ['2025-07-01', '2025-07-02']}, f)
+    server = HabitServer(HabitTracker(path), path=str(tmp_path / 'habits.sock'), flush_interval=3600)
+    yield server
+    server.close()
+
+@pytest.fixture
+def running(server):
+    """The same daemon answering on its socket from a background thread"""
+    server.open()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(timeout=5)
+
+
+class TestHandle:
+    def test_writes_wait_for_flush(self, server):
+        """Test that changes are visible at once but written in one go"""
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-03'
+            assert server.handle({'command': 'add', 'name': 'read'}) == {'result': 'Habit "read" added.'}
+            assert server.handle({'command': 'done', 'name': 'gym'}) == {'result': 'Habit "gym" marked as done for today.'}
+        assert server.handle({'command': 'list'}) == {'names': ['gym', 'read']}
+        assert on_disk(server.file) == {'gym': ['2025-07-01', '2025-07-02']}
+        assert server.flush() is True
+        assert server.flush() is False
+        assert on_disk(server.file) == {'gym': ['2025-07-01', '2025-07-02', '2025-07-03'], 'read': []}
+        assert server.flushes == 1
+
+    def test_streak_sees_pending_changes(self, server):
+        """Test that streaks include completions that were not written yet"""
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-03'
+            server.handle({'command': 'done', 'name': 'gym'})
+        assert server.handle({'command': 'streak', 'name': 'gym'})['streak'][1:] == [3, '2025-07-03']
+        assert server.handle({'command': 'streak', 'name': 'nope'}) == {'streak': None}
+        assert server.flushes == 0
+
+    def test_stats(self, server):
+        """Test that stats come from the resident data"""
+        stats = server.handle({'command': 'stats'})['stats']
+        assert [entry['habit'] for entry in stats] == ['gym']
+        assert stats[0]['total'] == 2
+
+    def test_rejects_bad_requests(self, server):
+        """Test unknown commands, missing names and another data file"""
+        assert 'error' in server.handle({'command': 'compact'})
+        assert 'error' in server.handle({'command': 'done'})
+        assert 'error' in server.handle({'command': 'list', 'file': '/elsewhere/habits.json'})
+        assert 'error' in server.handle({'command': 'list', 'file': server.file, 'storage': 'journal'})
+        assert 'error' in server.handle({'command': 'add', 'name': ['x']})
+        assert 'error' in server.handle({'command': 'done', 'name': {'x': 1}})
+        assert server.handle({'command': 'list'}) == {'names': ['gym']}
+
+    def test_reloads_outside_changes(self, server):
+        """Test that writes made without the daemon are picked up"""
+        server.tracker.data
+        HabitTracker(server.file).add_habit('walk')
+        assert server.handle({'command': 'list'}) == {'names': ['gym', 'walk']}
+
+    def test_added_habits_get_reminders(self, server):
+        """Test that the reminder tick follows habits added and removed through the daemon"""
+        sink = FakeSink()
+        server.notifier = HabitNotifications(tracker=server.tracker, sink=sink)
+        with patch('builtins.print'):
+            server.notifier.schedule_habit_reminders()
+            server.handle({'command': 'add', 'name': 'read'})
+            server.notifier.check_due_habits()
+            server.handle({'command': 'remove', 'name': 'read'})
+            server.notifier.check_due_habits()
+        assert [sent[:2] for sent in sink.sent] == [reminder_message(['gym']), reminder_message(['read']),
+                                                    reminder_message(['gym'])]
+
+
+class TestSocket:
+    def test_round_trip(self, running):
+        """Test several requests over one connection and a one-shot request"""
+        with connect(running.path) as client:
+            assert client.send({'command': 'add', 'name': 'read'}) == {'result': 'Habit "read" added.'}
+            assert client.send({'command': 'list'}) == {'names': ['gym', 'read']}
+        assert request({'command': 'list', 'file': running.file, 'storage': 'json'}, running.path) == {'names': ['gym', 'read']}
+
+    def test_malformed_line(self, running):
+        """Test that a bad request gets an error instead of closing the daemon"""
+        with connect(running.path) as client:
+            client.sock.sendall(b'not json\n[]\n')
+            replies = b''
+            while replies.count(b'\n') < 2:
+                replies += client.sock.recv(4096)
+            assert all('error' in json.loads(line) for line in replies.splitlines())
+            assert client.send({'command': 'list'}) == {'names': ['gym']}
+
+    def test_failing_request(self, running):
+        """Test that an unexpected error in one request is replied to and the daemon keeps serving"""
+        with patch.object(running.tracker, 'habit_names', side_effect=RuntimeError('boom')):
+            assert request({'command': 'list'}, running.path) == {'error': 'RuntimeError: boom'}
+        assert request({'command': 'list'}, running.path) == {'names': ['gym']}
+
+    def test_flush_interval(self, running):
+        """Test that the loop writes pending changes once the interval passes"""
+        running.flush_interval = 0.05
+        request({'command': 'add', 'name': 'read'}, running.path)
+        wait_for(lambda: 'read' in on_disk(running.file), timeout=5)
+
+    def test_stop_flushes_and_cleans_up(self, server):
+        """Test that shutting down writes everything and removes the socket"""
+        server.open()
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        request({'command': 'add', 'name': 'read'}, server.path)
+        server.stop()
+        thread.join(timeout=5)
+        assert 'read' in on_disk(server.file)
+        assert not os.path.exists(server.path)
+        assert request({'command': 'list'}, server.path) is None
+
+    def test_one_daemon_per_socket(self, running):
+        """Test that a second daemon refuses to take over a live socket"""
+        with pytest.raises(RuntimeError):
+            HabitServer(HabitTracker(running.file), path=running.path).open()
+
+    def test_stale_socket_is_replaced(self, server):
+        """Test that a socket file left by a crashed daemon does not block startup"""
+        open(server.path, 'w').close()
+        assert request({'command': 'list'}, server.path) is None
+        server.open()
+        assert os.path.exists(server.path)
@@ -0,0 +1,133 @@
+import pytest
+import json
+import os
+import sys
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JournalStorage, JsonStorage, apply_event, make_storage, migrate_json_to_sqlite
+from tracker import HabitTracker
+
+@pytest.fixture
+def journal_tracker(tmp_path):
+    """Create a tracker backed by the append-only journal"""
+    return HabitTracker(str(tmp_path / 'habits.json'), storage='journal')
+
+
+class TestJournalStorage:
+    def test_mutations_only_append_to_log(self, journal_tracker):
+        """Test that add/done/remove never rewrite the snapshot"""
+        journal_tracker.add_habit('exercise')
+        with patch('tracker.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-10'
+            journal_tracker.mark_as_done('exercise')
+        assert not os.path.exists(journal_tracker.file)
+        with open(journal_tracker.storage.log_file) as f:
+            events = [json.loads(line) for line in f]
+        assert events == [
+            {'op': 'add', 'habit': 'exercise'},
+            {'op': 'done', 'habit': 'exercise', 'date': '2025-07-10'},
+        ]
+
+    def test_load_replays_log_over_snapshot(self, journal_tracker):
+        """Test that state is rebuilt from snapshot plus log tail"""
+        journal_tracker.add_habit('exercise')
+        journal_tracker.compact()
+        journal_tracker.add_habit('reading')
+        journal_tracker.remove_habit('exercise')
+        reloaded = HabitTracker(journal_tracker.file, storage='journal')
+        assert reloaded.data == {'reading': []}
+
+    def test_compaction_after_threshold(self, tmp_path):
+        """Test that the log is folded into the snapshot periodically"""
+        storage = JournalStorage(str(tmp_path / 'habits.json'), compact_every=3)
+        tracker = HabitTracker(storage.file, storage=storage)
+        for name in ('a', 'b', 'c'):
+            tracker.add_habit(name)
+        assert not os.path.exists(storage.log_file)
+        with open(storage.file) as f:
+            assert json.load(f) == {'a': [], 'b': [], 'c': []}
+
+    def test_torn_last_line_is_ignored(self, journal_tracker):
+        """Test that a partially written event does not break loading"""
+        journal_tracker.add_habit('exercise')
+        with open(journal_tracker.storage.log_file, 'a') as f:
+            f.write('{"op": "add", "hab')
+        reloaded = HabitTracker(journal_tracker.file, storage='journal')
+        assert reloaded.data == {'exercise': []}
+
+    def test_json_storage_refuses_a_journal(self, journal_tracker):
+        """Test that the json storage will not read or write a file whose log it would ignore"""
+        journal_tracker.add_habit('exercise')
+        with pytest.raises(ValueError, match='journal'):
+            JsonStorage(journal_tracker.file)
+
+
+class TestHelpers:
+    def test_apply_event_ignores_duplicate_done(self):
+        """Test that replaying the same completion twice keeps one date"""
+        data = {'exercise': ['2025-07-10']}
+        apply_event(data, {'op': 'done', 'habit': 'exercise', 'date': '2025-07-10'})
+        assert data == {'exercise': ['2025-07-10']}
+
+    def test_make_storage(self, tmp_path):
+        """Test storage lookup by name"""
+        assert isinstance(make_storage(str(tmp_path / 'h.json')), JsonStorage)
+        with pytest.raises(ValueError):
+            make_storage(str(tmp_path / 'h.json'), 'nope')
+
+
+class TestSqliteStorage:
+    @pytest.fixture
+    def sqlite_tracker(self, tmp_path):
+        """Create a tracker backed by SQLite"""
+        return HabitTracker(str(tmp_path / 'habits.db'), storage='sqlite')
+
+    def test_mutations_do_not_load_everything(self, sqlite_tracker):
+        """Test that add/done/is_done go straight to indexed queries"""
+        with patch.object(sqlite_tracker.storage, 'load') as mock_load:
+            assert sqlite_tracker.add_habit('exercise') == 'Habit "exercise" added.'
+            with patch('tracker.datetime') as mock_datetime:
+                mock_datetime.now.return_value.strftime.return_value = '2025-07-10'
+                assert sqlite_tracker.mark_as_done('exercise') == 'Habit "exercise" marked as done for today.'
+                assert sqlite_tracker.mark_as_done('exercise') == 'Habit "exercise" already marked as done for today.'
+                assert sqlite_tracker.mark_as_done('nope') == 'Habit "nope" does not exist.'
+            assert sqlite_tracker.is_done('exercise', '2025-07-10') is True
+            assert sqlite_tracker.is_done('exercise', '2025-07-11') is False
+            assert sqlite_tracker.is_done('nope', '2025-07-10') is None
+            assert sqlite_tracker.completion_counts() == {'exercise': 1}
+            mock_load.assert_not_called()
+
+    def test_remove_cascades_completions(self, sqlite_tracker):
+        """Test that removing a habit also drops its completions"""
+        sqlite_tracker.storage.save({'exercise': ['2025-07-10'], 'reading': []})
+        assert sqlite_tracker.remove_habit('exercise') == 'Habit "exercise" removed.'
+        assert sqlite_tracker.remove_habit('exercise') == 'Habit "exercise" does not exist.'
+        count = sqlite_tracker.storage.conn.execute('SELECT COUNT(*) FROM completions').fetchone()[0]
+        assert count == 0
+
+    def test_wal_mode(self, sqlite_tracker):
+        """Test that the database runs in WAL mode"""
+        mode = sqlite_tracker.storage.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        assert mode == 'wal'
+
+    def test_migrate_from_json(self, tmp_path):
+        """Test the one-shot migration from habits.json"""
+        json_file = tmp_path / 'habits.json'
+        data = {'gym': ['2025-07-10', '2025-07-11'], 'pray': []}
+        json_file.write_text(json.dumps(data))
+        assert migrate_json_to_sqlite(str(json_file), str(tmp_path / 'habits.db')) == 2
+        assert HabitTracker(str(tmp_path / 'habits.db'), storage='sqlite').data == data
+
+    def test_migrate_refuses_non_empty_target(self, tmp_path):
+        """Test that migrating into a database with habits needs force"""
+        json_file = tmp_path / 'habits.json'
+        json_file.write_text(json.dumps({'gym': ['2025-07-10']}))
+        db_file = str(tmp_path / 'habits.db')
+        HabitTracker(db_file, storage='sqlite').add_habit('read')
+        with pytest.raises(ValueError):
+            migrate_json_to_sqlite(str(json_file), db_file)
+        assert HabitTracker(db_file, storage='sqlite').data == {'read': []}
+        assert migrate_json_to_sqlite(str(json_file), db_file, force=True) == 1
+        assert HabitTracker(db_file, storage='sqlite').data == {'gym': ['2025-07-10']}
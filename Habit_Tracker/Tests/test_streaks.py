@@ -0,0 +1,113 @@
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaks import StreakIndex, compute_streak
+from tracker import HabitTracker
+from helpers import mark, ordinals
+
+
+class TestComputeStreak:
+    def test_empty(self):
+        """Test a habit that was never completed"""
+        assert compute_streak([]) == [0, 0, None]
+
+    def test_runs(self):
+        """Test that the current run ends at the last completion"""
+        days = ordinals('2025-07-01', '2025-07-02', '2025-07-03', '2025-07-05', '2025-07-06')
+        assert compute_streak(days) == [2, 3, days[-1]]
+
+    def test_single_completion(self):
+        """Test that a single completion is a streak of one"""
+        assert compute_streak(ordinals('2025-07-01'))[:2] == [1, 1]
+
+
+class TestStreakIndex:
+    def test_incremental_matches_rebuild(self):
+        """Test that recording day by day gives the same index as a rebuild"""
+        data = {'gym': []}
+        index = StreakIndex.from_data(data)
+        for day in ('2025-07-01', '2025-07-02', '2025-07-04', '2025-07-05', '2025-07-06', '2025-06-20'):
+            data['gym'].append(day)
+            index.record('gym', ordinals(day)[0], data['gym'])
+        assert index.mismatches(data) == []
+        assert index.entries['gym'][:2] == [3, 3]
+
+    def test_ongoing_depends_on_today(self):
+        """Test that a streak is only ongoing through yesterday"""
+        index = StreakIndex.from_data({'gym': ['2025-07-01', '2025-07-02']})
+        assert index.get('gym', date(2025, 7, 3)) == (2, 2, date(2025, 7, 2))
+        assert index.get('gym', date(2025, 7, 4))[0] == 0
+        assert index.get('nope') is None
+
+    def test_json_round_trip(self):
+        """Test the sidecar representation"""
+        index = StreakIndex.from_data({'gym': ['2025-07-01'], 'pray': []})
+        assert StreakIndex.from_json(index.to_json()).entries == index.entries
+
+
+    def test_apply_many_recomputes_backfilled_habits_once(self):
+        """Test that a batch with past days ends up where a rebuild would"""
+        data = {'gym': ['2025-07-05', '2025-07-03', '2025-07-04', '2025-07-06'], 'read': ['2025-07-01']}
+        index = StreakIndex.from_data({'gym': ['2025-07-05'], 'read': []})
+        events = [{'op': 'done', 'habit': 'gym', 'date': day} for day in data['gym'][1:]]
+        events.append({'op': 'done', 'habit': 'read', 'date': '2025-07-01'})
+        with patch('streaks.compute_streak', wraps=compute_streak) as compute:
+            index.apply_many(events, data)
+        assert compute.call_count == 1
+        assert index.mismatches(data) == []
+
+
+class TestTrackerStreaks:
+    def test_mark_as_done_updates_index(self, tracker):
+        """Test that the persisted index follows mark_as_done on every storage"""
+        tracker.add_habit('gym')
+        for day in ('2025-07-01', '2025-07-02', '2025-07-03'):
+            mark(tracker, 'gym', day)
+        assert tracker.streak('gym', today=date(2025, 7, 3)) == (3, 3, date(2025, 7, 3))
+        reloaded = HabitTracker(tracker.file, storage=tracker.storage.__class__(tracker.file))
+        assert reloaded.streak('gym', today=date(2025, 7, 3)) == (3, 3, date(2025, 7, 3))
+        assert reloaded.rebuild_streaks() == []
+
+    def test_streaks_for_all_habits(self, tracker):
+        """Test the all-habits view used by stats"""
+        tracker.add_habit('gym')
+        tracker.add_habit('pray')
+        mark(tracker, 'gym', '2025-07-01')
+        streaks = tracker.streaks(today=date(2025, 7, 1))
+        assert streaks == {'gym': (1, 1, date(2025, 7, 1)), 'pray': (0, 0, None)}
+        assert tracker.streak('nope') is None
+
+    def test_streaks_inside_batch(self, tracker):
+        """Test that streaks read inside batch() count the changes it has not written yet"""
+        tracker.add_habit('gym')
+        with tracker.batch():
+            mark(tracker, 'gym', '2025-07-01')
+            tracker.add_habit('pray')
+            assert tracker.streak('gym', today=date(2025, 7, 1)) == (1, 1, date(2025, 7, 1))
+            assert tracker.streaks(today=date(2025, 7, 1)) == {'gym': (1, 1, date(2025, 7, 1)), 'pray': (0, 0, None)}
+
+    def test_backfill_updates_index(self, tracker):
+        """Test that mark_many keeps the index right when filling in the past"""
+        tracker.add_habit('gym')
+        mark(tracker, 'gym', '2025-07-05')
+        assert tracker.mark_many('gym', ['2025-07-03', '2025-07-04', date(2025, 7, 6), '2025-07-03']) == 3
+        assert tracker.mark_many('gym', ['2025-07-04']) == 0
+        assert tracker.mark_many('nope', ['2025-07-04']) is None
+        assert tracker.streak('gym', today=date(2025, 7, 6)) == (4, 4, date(2025, 7, 6))
+        reloaded = HabitTracker(tracker.file, storage=tracker.storage.__class__(tracker.file))
+        assert [str(day) for day in reloaded.completed_between('gym', date(2025, 7, 1), date(2025, 7, 31))] == \
+            ['2025-07-03', '2025-07-04', '2025-07-05', '2025-07-06']
+        assert reloaded.streak('gym', today=date(2025, 7, 6)) == (4, 4, date(2025, 7, 6))
+        assert reloaded.rebuild_streaks() == []
+
+    def test_rebuild_reports_stale_entries(self, tmp_path):
+        """Test that a stale sidecar is detected and fixed by a rebuild"""
+        tracker = HabitTracker(str(tmp_path / 'habits.json'))
+        tracker.add_habit('gym')
+        tracker.storage.streaks.entries['gym'] = [5, 5, None]
+        assert tracker.rebuild_streaks() == ['gym']
+        assert tracker.rebuild_streaks() == []
@@ -0,0 +1,99 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import FakeSink
+from notifications import TenantNotifications
+from storage import JsonStorage
+from tenants import TenantStore, shard_name
+
+@pytest.fixture
+def store(storage, tmp_path):
+    """A tenant store on each storage backend"""
+    return TenantStore(str(tmp_path / 'users'), storage=storage)
+
+
+class TestTenantStore:
+    def test_users_are_isolated(self, store):
+        """Test that each user gets their own shard and index entry"""
+        store.tracker('alice', create=True).add_habit('gym')
+        store.tracker('bob', create=True).add_habit('read')
+        assert store.users() == ['alice', 'bob']
+        assert store.shard_path('alice') != store.shard_path('bob')
+        fresh = TenantStore(store.root, storage=store.storage)
+        assert fresh.tracker('alice').habit_names() == ['gym']
+        assert fresh.tracker('bob').habit_names() == ['read']
+
+    def test_shard_name_is_safe(self):
+        """Test that user names cannot escape the shard directory"""
+        name = shard_name('../../etc/passwd')
+        assert '..' not in name.split(os.sep)
+        assert name.endswith('.json')
+        assert shard_name('alice') == shard_name('alice')
+
+    def test_loading_one_user_reads_only_their_shard(self, tmp_path):
+        """Test that opening a user never loads another user's data"""
+        store = TenantStore(str(tmp_path / 'users'))
+        for user in ['alice', 'bob', 'carol']:
+            store.tracker(user, create=True).add_habit('gym')
+        fresh = TenantStore(store.root)
+        with patch.object(JsonStorage, 'load', autospec=True, side_effect=JsonStorage.load) as load:
+            fresh.tracker('bob').habit_names()
+        assert [call.args[0].file for call in load.call_args_list] == [store.shard_path('bob')]
+
+    def test_unknown_user_is_not_registered(self, store):
+        """Test that asking for a user who does not exist is refused and leaves the disk alone"""
+        with pytest.raises(ValueError, match='Unknown user'):
+            store.tracker('ghost')
+        assert store.users() == []
+        assert not os.path.exists(store.root)
+
+    def test_remove_user(self, store):
+        """Test that a removed user disappears from the index"""
+        store.tracker('alice', create=True)
+        assert store.remove_user('alice') is True
+        assert store.remove_user('alice') is False
+        assert 'alice' not in store
+
+    def test_open_trackers_are_bounded(self, tmp_path):
+        """Test that only the most recently used trackers stay open"""
+        store = TenantStore(str(tmp_path / 'users'), max_open=2)
+        first = store.tracker('a', create=True)
+        store.tracker('b', create=True)
+        assert store.tracker('a') is first
+        store.tracker('c', create=True)
+        assert list(store._trackers) == ['a', 'c']
+
+
+class TestTenantNotifications:
+    def test_reminds_each_user_about_their_pending_habits(self, tmp_path):
+        """Test that one notifier serves all users and opens shards only when due"""
+        store = TenantStore(str(tmp_path / 'users'))
+        store.tracker('alice', create=True).apply_many([('add', 'gym'), ('add', 'read'), ('done', 'read')])
+        store.tracker('bob', create=True).add_habit('walk')
+        store = TenantStore(store.root)
+        sink = FakeSink()
+        notifier = TenantNotifications(store, sink=sink)
+        with patch('builtins.print'):
+            assert notifier.schedule_habit_reminders() is True
+        assert len(notifier.scheduler) == 2
+        assert store._trackers == {}
+        with patch('builtins.print'):
+            notifier.check_due_habits(['alice'])
+        assert list(store._trackers) == ['alice']
+        assert [message for _, message, _ in sink.sent] == ['Time to gym (alice)! Keep your streak going!']
+
+    def test_new_users_are_scheduled(self, tmp_path):
+        """Test that users registered by another process get a reminder"""
+        store = TenantStore(str(tmp_path / 'users'))
+        store.tracker('alice', create=True)
+        notifier = TenantNotifications(store, sink=FakeSink())
+        with patch('builtins.print'):
+            notifier.schedule_habit_reminders()
+        TenantStore(store.root).tracker('bob', create=True)
+        with patch('builtins.print'):
+            notifier.check_due_habits([])
+        assert 'bob' in notifier.scheduler
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timings
+from timings import phase, session
+from tracker import HabitTracker
+
+
+class TestTimings:
+    def test_phases_are_exclusive(self):
+        """Test that a nested phase is not counted again in the outer one"""
+        with session() as collected:
+            with phase('compute'):
+                time.sleep(0.02)
+                with phase('load'):
+                    time.sleep(0.05)
+        assert 0.05 <= collected.phases['load'] < 0.1
+        assert 0.02 <= collected.phases['compute'] < 0.05
+        assert collected.total >= 0.07
+
+    def test_inactive_outside_session(self):
+        """Test that phases and byte counts are no-ops without a session"""
+        assert timings.active is None
+        with phase('load'):
+            timings.count_read(10)
+        assert timings.active is None
+
+    def test_tracker_load_and_save_are_attributed(self, tmp_path):
+        """Test bytes and phases recorded for a real load and save"""
+        path = str(tmp_path / 'habits.json')
+        HabitTracker(path).add_habit('gym')
+        with session() as collected:
+            tracker = HabitTracker(path)
+            tracker.mark_as_done('gym')
+        assert collected.bytes_read >= os.path.getsize(path) - 20
+        assert collected.bytes_written >= os.path.getsize(path)
+        assert collected.phases['load'] > 0
+        assert collected.phases['save'] > 0
+        report = collected.report()
+        assert 'load' in report and 'written' in report
+
+    def test_profile_dump(self, tmp_path):
+        """Test that --profile writes cProfile stats"""
+        path = str(tmp_path / 'run.prof')
+        with session(profile=path):
+            sum(range(1000))
+        import pstats
+        assert pstats.Stats(path).total_calls > 0
@@ -2,13 +2,13 @@ import pytest
 import json
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime
 from unittest.mock import patch, mock_open
 # Add the parent directory to the Python path
 # Add the parent directory to the Python path (go up one level to find tracker.py)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tracker import HabitTracker
+from tracker import HabitTracker, parse_operation
 
 @pytest.fixture
 def temp_tracker():
@@ -16,9 +16,10 @@ def temp_tracker():
     test_file = 'test_habits.json'
     tracker = HabitTracker(test_file)
     yield tracker
-    # Cleanup after test
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    # Cleanup after test (data file plus its streak index and lock files)
+    for path in (test_file, test_file + '.streaks', test_file + '.lock'):
+        if os.path.exists(path):
+            os.remove(path)
 
 @pytest.fixture
 def tracker_with_data():
@@ -28,9 +29,10 @@ def tracker_with_data():
     tracker.add_habit('exercise')
     tracker.add_habit('reading')
     yield tracker
-    # Cleanup after test
-    if os.path.exists(test_file):
-        os.remove(test_file)
+    # Cleanup after test (data file plus its streak index and lock files)
+    for path in (test_file, test_file + '.streaks', test_file + '.lock'):
+        if os.path.exists(path):
+            os.remove(path)
 
 class TestHabitTracker:
     def test_init_with_new_file(self, temp_tracker):
@@ -185,6 +187,81 @@ class TestEdgeCases:
         assert temp_tracker.data['daily_habit'] == dates
 
 
+class TestBatch:
+    @pytest.mark.parametrize('kind', ['json', 'journal', 'sqlite'])
+    def test_apply_many_persists_once(self, kind, tmp_path):
+        """Test that a batch returns per-operation messages and is written once"""
+        tracker = HabitTracker(str(tmp_path / 'habits'), storage=kind)
+        operations = [('add', 'gym'), ('done', 'gym'), ('done', 'gym'), ('add', 'gym'),
+                      ('done', 'nope'), ('remove', 'gym'), ('add', 'read')]
+        with patch('tracker.datetime') as mock_datetime, \
+                patch.object(tracker.storage, 'record', wraps=tracker.storage.record) as record, \
+                patch.object(tracker.storage, 'save', wraps=tracker.storage.save) as save:
+            mock_datetime.now.return_value.strftime.return_value = '2025-07-10'
+            results = tracker.apply_many(operations)
+        assert results == [
+            'Habit "gym" added.',
+            'Habit "gym" marked as done for today.',
+            'Habit "gym" already marked as done for today.',
+            'Habit "gym" already exists.',
+            'Habit "nope" does not exist.',
+            'Habit "gym" removed.',
+            'Habit "read" added.',
+        ]
+        record.assert_not_called()
+        save.assert_not_called()
+        assert HabitTracker(tracker.file, storage=kind).data == {'read': []}
+
+    def test_unknown_operation_applies_nothing(self, temp_tracker):
+        """Test that an invalid batch is rejected before any change"""
+        with pytest.raises(ValueError):
+            temp_tracker.apply_many([('add', 'gym'), ('jump', 'gym')])
+        assert temp_tracker.data == {}
+
+    def test_parse_operation(self):
+        """Test both accepted operation spellings"""
+        assert parse_operation('done:morning run') == ('done', 'morning run')
+        assert parse_operation('  add  drink water \n') == ('add', 'drink water')
+
+
+class TestRangeQueries:
+    @pytest.mark.parametrize('kind', ['json', 'sqlite', 'binary'])
+    def test_window_counts(self, kind, tmp_path):
+        """Test done_in_last and count_between on each kind of storage"""
+        tracker = HabitTracker(str(tmp_path / 'habits'), storage=kind)
+        tracker.add_habit('gym')
+        for day in ['2025-06-30', '2025-07-01', '2025-07-09', '2025-07-10']:
+            with patch('tracker.datetime') as mock_datetime:
+                mock_datetime.now.return_value.strftime.return_value = day
+                tracker.mark_as_done('gym')
+        tracker = HabitTracker(tracker.file, storage=kind)
+        assert tracker.done_in_last('gym', 7, today=date(2025, 7, 10)) == 2
+        assert tracker.done_in_last('gym', 30, today=date(2025, 7, 10)) == 4
+        assert tracker.count_between('gym', date(2025, 7, 1), date(2025, 7, 31)) == 3
+        assert tracker.count_between('nope', date(2025, 7, 1), date(2025, 7, 31)) is None
+
+
+class TestReload:
+    @pytest.mark.parametrize('kind', ['json', 'journal', 'sqlite'])
+    def test_reload_picks_up_other_writers(self, kind, tmp_path):
+        """Test that reload installs data written by another tracker, and only then"""
+        tracker = HabitTracker(str(tmp_path / 'habits'), storage=kind)
+        tracker.add_habit('gym')
+        assert tracker.data == {'gym': []}
+        with patch.object(tracker.storage, 'load', wraps=tracker.storage.load) as load:
+            assert tracker.reload() is False
+            HabitTracker(tracker.file, storage=kind).add_habit('read')
+            assert tracker.reload() is True
+        load.assert_called_once()
+        assert tracker.data == {'gym': [], 'read': []}
+
+    def test_reload_before_first_load_is_a_no_op(self, temp_tracker):
+        """Test that an unloaded tracker does not parse the file just to reload it"""
+        with patch.object(temp_tracker.storage, 'load') as load:
+            assert temp_tracker.reload() is False
+        load.assert_not_called()
+
+
 # Integration tests
 class TestIntegration:
     def test_complete_habit_lifecycle(self, temp_tracker):
@@ -2,7 +2,7 @@ import unittest
 import sys
 import os
 from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -122,5 +122,48 @@ class TestVisualization(unittest.TestCase):
             # Verify the function runs and calculates streaks
             mock_console.print.assert_called()
 
+    @patch("visualization.console")
+    @patch("visualization.HabitTracker")
+    def test_shared_tracker_is_not_reloaded(self, mock_tracker_class, mock_console):
+        """Test that a tracker passed in is used instead of loading the file again."""
+        shared = MagicMock()
+        shared.data = {"exercise": ["2023-10-01"]}
+        shared.__contains__.return_value = True
+        shared.streak.return_value = (0, 1, datetime(2023, 10, 1).date())
+        visualization.show_calendar("exercise", shared)
+        visualization.show_streak("exercise", shared)
+        mock_tracker_class.assert_not_called()
+        shared.streak.assert_called_once_with("exercise")
+
+    @patch("visualization._console")
+    def test_plain_output_skips_rich(self, mock_console):
+        """Test that plain mode prints text without creating a rich console."""
+        shared = MagicMock()
+        today = datetime.now().date()
+        shared.completed_between.return_value = [today]
+        shared.__contains__.return_value = True
+        shared.streak.return_value = (1, 1, today)
+        with patch("builtins.print") as mock_print:
+            visualization.show_calendar("exercise", shared, plain=True)
+            visualization.show_streak("exercise", shared, plain=True)
+        mock_console.assert_not_called()
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertEqual(printed[1], "Mon Tue Wed Thu Fri Sat Sun")
+        self.assertTrue(any("✓" in line for line in printed))
+        self.assertEqual(printed[-2:], ["Longest streak: 1", "Ongoing streak: 1"])
+
+    def test_calendar_month_range(self):
+        """Test showing several months from a chosen month with one range query."""
+        shared = MagicMock()
+        shared.__contains__.return_value = True
+        shared.completed_between.return_value = [date(2024, 12, 31), date(2025, 2, 1)]
+        with patch("builtins.print") as mock_print:
+            visualization.show_calendar("exercise", shared, plain=True, year=2024, month=12, months=3)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        titles = [line for line in printed if line.startswith("exercise - ")]
+        self.assertEqual(titles, ["exercise - December 2024", "exercise - January 2025", "exercise - February 2025"])
+        shared.completed_between.assert_called_once_with("exercise", date(2024, 12, 1), date(2025, 2, 28))
+        self.assertEqual(sum(line.count("✓") for line in printed), 2)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import pytest
+import os
+import sys
+import threading
+import time
+from datetime import date
+from unittest.mock import patch
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import HabitTracker
+from writebehind import WriteBehind
+from helpers import mark, on_disk, wait_for
+
+@pytest.fixture
+def path(storage, tmp_path):
+    """A data file on each storage that writes changes as events, with one habit in it"""
+    path = str(tmp_path / 'habits')
+    tracker = HabitTracker(path, storage=storage)
+    tracker.add_habit('gym')
+    return path, storage
+
+
+class TestWriteBehind:
+    def test_held_until_flush(self, path):
+        """Test that changes stay in memory until flush writes them in one go"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600):
+            tracker.add_habit('read')
+            tracker.mark_as_done('gym')
+            assert 'read' in tracker
+            assert on_disk(*path) == {'gym': []}
+            assert tracker.flush() == 2
+            assert tracker.flush() == 0
+            assert set(on_disk(*path)) == {'gym', 'read'}
+            assert len(on_disk(*path)['gym']) == 1
+
+    def test_streaks_before_flush(self, path):
+        """Test that streaks count completions that are not written yet"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600):
+            mark(tracker, 'gym', '2025-07-01')
+            tracker.add_habit('read')
+            assert tracker.streak('gym', today=date(2025, 7, 1)) == (1, 1, date(2025, 7, 1))
+            assert tracker.streaks(today=date(2025, 7, 1)) == {'gym': (1, 1, date(2025, 7, 1)), 'read': (0, 0, None)}
+            tracker.remove_habit('read')
+            assert tracker.streak('read') is None
+            assert on_disk(*path) == {'gym': []}
+
+    def test_context_exit_flushes(self, path):
+        """Test that leaving the block writes everything and restores synchronous writes"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600):
+            tracker.add_habit('read')
+        assert 'read' in on_disk(*path)
+        tracker.add_habit('walk')
+        assert 'walk' in on_disk(*path)
+
+    def test_flushes_after_interval(self, path):
+        """Test that the background thread writes once the oldest change is old enough"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=0.05) as same:
+            assert same is tracker
+            tracker.add_habit('read')
+            wait_for(lambda: tracker._write_behind.flushes == 1)
+            assert 'read' in on_disk(*path)
+
+    def test_flushes_after_max_pending(self, path):
+        """Test that piling up max_pending changes triggers a write before the interval"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600, max_pending=3):
+            for habit in ('a', 'b', 'c'):
+                tracker.add_habit(habit)
+            wait_for(lambda: len(on_disk(*path)) == 4)
+
+    def test_outside_changes_are_merged(self, path):
+        """Test that a flush after another process wrote keeps both sides' changes"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600):
+            tracker.add_habit('read')
+            HabitTracker(*path).add_habit('walk')
+            tracker.flush()
+            assert set(tracker.data) == {'gym', 'read', 'walk'}
+        assert set(on_disk(*path)) == {'gym', 'read', 'walk'}
+
+    def test_failed_flush_keeps_changes(self, path):
+        """Test that a failing write loses nothing and the next flush succeeds"""
+        tracker = HabitTracker(*path)
+        with tracker.write_behind(flush_interval=3600):
+            tracker.add_habit('read')
+            with patch.object(tracker.storage, 'record_many', side_effect=OSError('disk full')):
+                with pytest.raises(OSError):
+                    tracker.flush()
+            tracker.add_habit('walk')
+        assert set(on_disk(*path)) == {'gym', 'read', 'walk'}
+
+    def test_concurrent_writers(self, path):
+        """Test that mutations from several threads all reach the disk"""
+        tracker = HabitTracker(*path)
+
+        def add(start):
+            for i in range(start, start + 50):
+                tracker.add_habit(f'habit{i}')
+
+        with tracker.write_behind(flush_interval=0.01, max_pending=20):
+            threads = [threading.Thread(target=add, args=(start,)) for start in range(0, 200, 50)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert len(on_disk(*path)) == 201
+
+    def test_flushed_at_exit(self, path):
+        """Test that an unstopped tracker is flushed by its atexit hook"""
+        tracker = HabitTracker(*path)
+        with patch('tracker.atexit') as mock_atexit:
+            tracker.start_write_behind(flush_interval=3600)
+            tracker.add_habit('read')
+            [hook] = mock_atexit.register.call_args[0]
+            hook()
+            mock_atexit.unregister.assert_called_once_with(hook)
+        assert 'read' in on_disk(*path)
+
+
+class TestFlusher:
+    def test_retries_after_error(self):
+        """Test that a failing background flush is retried after another interval"""
+        calls = []
+
+        def flush():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise OSError('disk full')
+            with flusher.lock:
+                flusher.flushed(1)
+
+        flusher = WriteBehind(flush, flush_interval=0.02).start()
+        with flusher.lock:
+            flusher.changed(1)
+        wait_for(lambda: len(calls) == 2)
+        assert flusher.error is None and flusher.flushes == 1
+        flusher.close()
@@ -0,0 +1,127 @@
+# Bulk statistics for every habit at once
+from datetime import date
+from itertools import chain
+import numpy as np
+from completions import Habit
+
+WINDOWS = (7, 30, 90)
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+# 1970-01-01 (day 0 of datetime64[D]) was a Thursday
+EPOCH_WEEKDAY = 3
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# REMAINDER_WEEKDAYS[start * 7 + length, weekday]: does a run of ``length`` (< 7)
+# days starting on weekday ``start`` include ``weekday``?
+REMAINDER_WEEKDAYS = np.array([[int((weekday - start) % 7 < length) for weekday in range(7)]
+                               for start in range(7) for length in range(7)], dtype=np.int64)
+
+
+def completion_arrays(data):
+    """Flatten ``{habit: [dates]}`` into CSR form: names, offsets and epoch days.
+
+    Habit ``i`` owns ``days[offsets[i]:offsets[i + 1]]``, sorted and unique.
+    """
+    names = list(data)
+    if all(isinstance(dates, Habit) for dates in data.values()):
+        # Already sorted and unique ordinals: copy the arrays instead of parsing strings
+        histories = [dates.ordinals() for dates in data.values()]
+        lengths = np.fromiter(map(len, histories), dtype=np.int64, count=len(names))
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        days = np.frombuffer(b''.join(map(bytes, histories)), dtype=np.uint32).astype(np.int32) - EPOCH_ORDINAL
+        return names, offsets, days
+    lengths = np.fromiter((len(dates) for dates in data.values()), dtype=np.int64, count=len(names))
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    days = np.array(list(chain.from_iterable(data.values())), dtype='datetime64[D]').astype(np.int32)
+    # Histories are normally appended in order; only sort when one is not
+    out_of_order = np.diff(days) <= 0
+    # A habit's first date may be earlier than the previous habit's last one
+    boundaries = offsets[1:-1]
+    out_of_order[boundaries[(lengths[1:] > 0) & (boundaries > 0)] - 1] = False
+    if out_of_order.any():
+        habit_ids = np.repeat(np.arange(len(names)), lengths)
+        order = np.lexsort((days, habit_ids))
+        habit_ids, days = habit_ids[order], days[order]
+        keep = np.ones(days.size, dtype=bool)
+        keep[1:] = (days[1:] != days[:-1]) | (habit_ids[1:] != habit_ids[:-1])
+        days = days[keep]
+        offsets = np.searchsorted(habit_ids[keep], np.arange(len(names) + 1))
+    return names, offsets, days
+
+
+def compute_stats(names, offsets, days, today=None, windows=WINDOWS):
+    """Per-habit totals, window rates, weekday counts and streaks as NumPy arrays.
+
+    Everything is derived from runs of consecutive days, so only finding
+    the runs touches every completion; the rest is proportional to the
+    number of runs.
+    """
+    count = len(names)
+    today = int(np.datetime64(today or date.today(), 'D').astype(np.int64))
+    totals = np.diff(offsets)
+    rates = {window: np.zeros(count) for window in windows}
+    weekdays = np.zeros((count, 7), dtype=np.int64)
+    longest = np.zeros(count, dtype=np.int64)
+    current = np.zeros(count, dtype=np.int64)
+    last = np.zeros(count, dtype=np.int64)
+
+    active = np.flatnonzero(totals)
+    if active.size:
+        new_run = np.empty(days.size, dtype=bool)
+        new_run[0] = True
+        np.not_equal(np.diff(days), 1, out=new_run[1:])
+        new_run[offsets[active]] = True
+        run_starts = np.flatnonzero(new_run)
+        run_lengths = np.diff(np.append(run_starts, days.size))
+        run_first = days[run_starts]
+        run_last = run_first + run_lengths - 1
+
+        first_run = np.searchsorted(run_starts, offsets[active])
+        last_run = np.append(first_run[1:], run_starts.size) - 1
+        longest[active] = np.maximum.reduceat(run_lengths, first_run)
+        last[active] = run_last[last_run]
+        current[active] = np.where(last[active] >= today - 1, run_lengths[last_run], 0)
+
+        for window in windows:
+            overlap = np.minimum(run_last, today) - np.maximum(run_first, today - window + 1) + 1
+            rates[window][active] = np.add.reduceat(np.clip(overlap, 0, None), first_run) / window
+
+        # A run of L days starting on weekday s covers every weekday L // 7
+        # times, plus once more for the first L % 7 weekdays from s. The
+        # remainder only has 49 shapes, so histogram them per habit and
+        # expand with a 49x7 table.
+        full_weeks, extra = np.divmod(run_lengths, 7)
+        start_weekday = (run_first + EPOCH_WEEKDAY) % 7
+        run_habits = np.repeat(np.arange(active.size), np.diff(np.append(first_run, run_starts.size)))
+        shapes = np.bincount(run_habits * 49 + start_weekday * 7 + extra, minlength=active.size * 49)
+        weekdays[active] = shapes.reshape(active.size, 49) @ REMAINDER_WEEKDAYS
+        weekdays[active] += np.add.reduceat(full_weeks, first_run)[:, None]
+
+    return {
+        'names': names,
+        'totals': totals,
+        'rates': rates,
+        'weekdays': weekdays,
+        'longest': longest,
+        'current': current,
+        'last': last,
+    }
+
+
+def habit_stats(data, today=None, windows=WINDOWS):
+    """Statistics for every habit in ``data`` as plain, JSON-ready dicts."""
+    stats = compute_stats(*completion_arrays(data), today=today, windows=windows)
+    epoch = np.datetime64(0, 'D')
+    records = []
+    for i, name in enumerate(stats['names']):
+        last = stats['last'][i]
+        records.append({
+            'habit': name,
+            'total': int(stats['totals'][i]),
+            'rates': {f'{window}d': round(float(stats['rates'][window][i]), 4) for window in windows},
+            'weekdays': dict(zip(WEEKDAYS, stats['weekdays'][i].tolist())),
+            'current_streak': int(stats['current'][i]),
+            'longest_streak': int(stats['longest'][i]),
+            'last_completed': str(epoch + last) if stats['totals'][i] else None,
+        })
+    return records
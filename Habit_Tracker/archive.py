@@ -0,0 +1,143 @@
+# Cold storage for old years of completions
+import gzip
+import json
+import os
+from array import array
+from datetime import date
+from completions import Habit
+from storage import atomic_write
+from streaks import StreakIndex
+from timings import count_read, phase
+
+
+def horizon_for(keep_years, today=None):
+    """First day that stays live when ``keep_years`` full years before this one are kept."""
+    today = today or date.today()
+    return date(today.year - keep_years, 1, 1)
+
+
+class Archive:
+    """Completions from before the live horizon, one gzipped JSON segment per year.
+
+    Everything lives in ``<file>.archive/``: ``YYYY.json.gz`` holds
+    ``{habit: [dates]}`` for one year, and ``index.json`` lists the years,
+    the horizon and, per archived habit, the streak entry of its archived
+    history. Streaks and membership therefore never open a segment; a
+    segment is read (and cached) only when a query reaches into its year.
+    The live storage stays authoritative for which habits exist.
+    """
+
+    def __init__(self, file):
+        self.dir = file + '.archive'
+        self.index_file = os.path.join(self.dir, 'index.json')
+        self.horizon = None
+        self.years = []
+        self.streaks = StreakIndex()
+        self._segments = {}
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        self.horizon = date.fromisoformat(index['horizon'])
+        self.years = index['years']
+        self.streaks = StreakIndex.from_json(index['streaks'])
+
+    @classmethod
+    def open(cls, file):
+        """The archive next to ``file``, or None when nothing was ever archived."""
+        if not os.path.exists(file + '.archive'):
+            return None
+        return cls(file)
+
+    def __contains__(self, habit):
+        return habit in self.streaks.entries
+
+    def _segment_file(self, year):
+        return os.path.join(self.dir, f'{year}.json.gz')
+
+    def segment(self, year):
+        """``{habit: Habit}`` archived for ``year``."""
+        if year not in self._segments:
+            with phase('load'):
+                try:
+                    with open(self._segment_file(year), 'rb') as f:
+                        raw = f.read()
+                    count_read(len(raw))
+                    segment = json.loads(gzip.decompress(raw))
+                except FileNotFoundError:
+                    segment = {}
+                self._segments[year] = {habit: Habit(dates) for habit, dates in segment.items()}
+        return self._segments[year]
+
+    def between(self, habit, start, end):
+        """Archived dates of ``habit`` from ``start`` to ``end`` inclusive, reading only the years in range."""
+        if habit not in self:
+            return []
+        return [day for year in self.years if start.year <= year <= end.year
+                for day in self.segment(year).get(habit, Habit()).between(start, end)]
+
+    def history(self, habit):
+        """Every archived date of ``habit``; reads all segments."""
+        if habit not in self:
+            return []
+        return [day for year in self.years for day in self.segment(year).get(habit, ())]
+
+    def _write_index(self):
+        index = {'horizon': self.horizon.isoformat(), 'years': self.years, 'streaks': self.streaks.to_json()}
+        atomic_write(self.index_file, lambda f: json.dump(index, f))
+
+    def forget(self, habit):
+        """Detach a removed habit from its archived history."""
+        if habit in self:
+            self.streaks.remove(habit)
+            self._write_index()
+
+    def move(self, data, horizon):
+        """Move every completion in ``data`` dated before ``horizon`` into the archive; returns how many moved.
+
+        ``data`` is edited in place and must be saved by the caller
+        afterwards. Segments are written first, so a crash in between
+        leaves dates in both places, which readers de-duplicate.
+        """
+        cutoff = horizon.isoformat()
+        moved = {}  # year -> {habit: [dates]}
+        count = 0
+        for habit, dates in data.items():
+            old = [day for day in dates if day < cutoff]
+            if not old:
+                continue
+            data[habit] = Habit(day for day in dates if day >= cutoff)
+            for day in old:
+                moved.setdefault(int(day[:4]), {}).setdefault(habit, []).append(day)
+            count += len(old)
+
+        os.makedirs(self.dir, exist_ok=True)
+        for year, habits in moved.items():
+            # Archived habits that were removed from the live data are dropped here
+            segment = {habit: list(dates) for habit, dates in self.segment(year).items()
+                       if habit in data and habit in self}
+            for habit, dates in habits.items():
+                segment[habit] = sorted(set(segment.get(habit, [])) | set(dates))
+            payload = gzip.compress(json.dumps(segment).encode('utf-8'))
+            atomic_write(self._segment_file(year), lambda f: f.write(payload), binary=True)
+            self._segments[year] = {habit: Habit(dates) for habit, dates in segment.items()}
+        self.years = sorted(set(self.years) | set(moved))
+
+        archived = {habit for habit in data if habit in self} | {habit for habits in moved.values() for habit in habits}
+        self.streaks = StreakIndex.from_items(
+            (habit, [day for year in self.years for day in self.segment(year).get(habit, ())])
+            for habit in sorted(archived))
+        self.horizon = max(horizon, self.horizon) if self.horizon else horizon
+        self._write_index()
+        return count
+
+    def ordinals(self, habit):
+        """Sorted day ordinals of every archived completion of ``habit``; reads all segments."""
+        days = array('I')
+        if habit in self:
+            for year in self.years:
+                segment = self.segment(year).get(habit)
+                if segment is not None:
+                    days.extend(segment.ordinals())
+        return days
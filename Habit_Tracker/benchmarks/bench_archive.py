@@ -0,0 +1,56 @@
+"""Live file size and command latency before and after archiving old years"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import write_data
+from tracker import HabitTracker
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(path):
+    from visualization import show_calendar
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {
+            "done": timed(lambda: HabitTracker(path).mark_as_done("habit0")),
+            "calendar": timed(lambda: show_calendar("habit1", HabitTracker(path), plain=True)),
+            "streak": timed(lambda: HabitTracker(path).streak("habit2")),
+            "stats": timed(lambda: HabitTracker(path).history()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--keep-years", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        write_data(path, args.habits, args.years)
+        HabitTracker(path).rebuild_streaks()
+        before = os.path.getsize(path), measure(path)
+        moved = HabitTracker(path).archive_old(keep_years=args.keep_years)
+        cold = sum(os.path.getsize(os.path.join(path + ".archive", name)) for name in os.listdir(path + ".archive"))
+        after = os.path.getsize(path), measure(path)
+
+    print(f"{args.habits} habits x {args.years} years; {moved} completions archived, {cold / 1e6:.1f} MB compressed")
+    print(f"{'':<10} {'live MB':>8} " + " ".join(f"{name + ' ms':>12}" for name in before[1]))
+    for label, (size, times) in (("before", before), ("after", after)):
+        print(f"{label:<10} {size / 1e6:8.1f} " + " ".join(f"{ms:12.1f}" for ms in times.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Timer and CPU cost of the asyncio notifier with many habits"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import write_data
+from delivery import FakeSink
+from notifications import REMINDER_TICK, AsyncHabitNotifications
+from tracker import HabitTracker
+
+
+async def run(notifier, reminders, idle):
+    """Let the reminder tick fire and send ``reminders``, then sit idle; returns (busy CPU s, idle CPU s)."""
+    task = asyncio.create_task(notifier.run())
+    cpu = time.process_time()
+    while sum(notifier.stats.values()) < reminders:
+        await asyncio.sleep(0.05)
+    busy = time.process_time() - cpu
+    cpu = time.process_time()
+    await asyncio.sleep(idle)
+    quiet = time.process_time() - cpu
+    notifier.stop()
+    await task
+    return busy, quiet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=20000)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--idle", type=float, default=2.0, help="seconds to measure with nothing due")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        write_data(path, args.habits, args.years)
+        start = time.perf_counter()
+        tracker = HabitTracker(path)
+        tracker.data  # the one-off startup load is not what this measures
+        loaded = time.perf_counter() - start
+        notifier = AsyncHabitNotifications(tracker=tracker, sink=FakeSink(), workers=8)
+        notifier.scheduler.add(REMINDER_TICK, 3600, delay=0.5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            busy, quiet = asyncio.run(run(notifier, len(tracker.today_index().pending), args.idle))
+
+    stats = notifier.stats
+    print(f"{args.habits} habits loaded in {loaded:.1f} s")
+    print(f"{notifier.scheduler.wakeups} passes, {stats['sent']} sent, {stats['failed']} failed, "
+          f"{stats['timed_out']} timed out")
+    print(f"CPU while firing {busy:.2f} s, CPU over {args.idle:g} s idle {quiet * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
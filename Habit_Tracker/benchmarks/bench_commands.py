@@ -0,0 +1,55 @@
+"""How often each CLI command parses the data file, and how long it takes"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import CLI
+from benchmarks.datagen import write_data
+from tracker import HabitTracker
+
+COMMANDS = [
+    ["list"],
+    ["done", "--name", "habit0"],
+    ["streak", "--name", "habit1"],
+    ["calendar", "--name", "habit2"],
+    ["stats"],
+]
+
+
+def run(argv):
+    """Run one CLI command in-process; returns (data file loads, seconds)."""
+    with patch.object(HabitTracker, "load_data", autospec=True,
+                      side_effect=HabitTracker.load_data) as load, \
+            patch.object(sys, "argv", ["CLI.py", *argv]), \
+            contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        CLI.main()
+        elapsed = time.perf_counter() - start
+    return load.call_count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        write_data(path, args.habits, args.years)
+        print(f"{args.habits} habits x {args.years} years, {os.path.getsize(path) / 1e6:.1f} MB")
+        run(["reindex", "--file", path])  # build the streak sidecar outside the timings
+        for argv in COMMANDS:
+            parses, elapsed = run([*argv, "--file", path])
+            print(f"{' '.join(argv):<28} parses={parses}  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Reminder delivery throughput and latency against an in-process sink"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delivery import DeliveryQueue, FakeSink
+
+
+def run(reminders, workers, latency, rate=None, digest=False):
+    """Deliver ``reminders`` reminders; returns (notifications sent, seconds, p50 ms, p99 ms)."""
+    sink = FakeSink(latency=latency)
+    start = time.perf_counter()
+    with DeliveryQueue(sink, workers=workers, rate=rate, burst=workers, digest=digest,
+                       max_pending=reminders) as delivery:
+        for i in range(reminders):
+            delivery.submit(f"habit{i}")
+    elapsed = time.perf_counter() - start
+    latencies = sorted(delivery.latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    return len(sink.sent), elapsed, p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reminders", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds each sink call takes")
+    args = parser.parse_args()
+
+    print(f"{args.reminders} reminders, sink latency {args.latency * 1000:.0f} ms")
+    for workers, rate, digest in [(1, None, False), (4, None, False), (16, None, False),
+                                  (4, 200, False), (4, None, True)]:
+        sent, elapsed, p50, p99 = run(args.reminders, workers, args.latency, rate, digest)
+        label = f"workers={workers} rate={rate or '-'} digest={'on' if digest else 'off'}"
+        print(f"{label:<36} sent={sent:<5} {args.reminders / elapsed:8.0f}/s  "
+              f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""File size and load time of the JSON and binary history formats"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import write_data
+from storage import convert, make_storage
+from tracker import HabitTracker
+
+
+def timed(function, repeat=3):
+    """Best of ``repeat`` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    today = date.today()
+    month = (today.replace(day=1), today)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {"json": os.path.join(tmp, "habits.json"), "binary": os.path.join(tmp, "habits.bin")}
+        write_data(files["json"], args.habits, args.years)
+        convert(files["json"], "json", files["binary"], "binary")
+        print(f"{args.habits} habits x {args.years} years")
+        print(f"{'format':<8} {'size':>10} {'full load':>12} {'one month':>12}")
+        for kind, path in files.items():
+            load = timed(lambda: make_storage(path, kind).load())
+            calendar = timed(lambda: HabitTracker(path, storage=kind).completed_between("habit1", *month))
+            print(f"{kind:<8} {os.path.getsize(path) / 1e6:8.2f} MB {load:9.1f} ms {calendar:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Streaming import/export throughput and peak memory"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk import import_rows, read_rows, write_rows
+from timings import _peak_memory
+from tracker import HabitTracker
+
+EXTENSIONS = {"sqlite": ".db", "binary": ".bin"}
+
+
+def synthetic_rows(count, habits):
+    """``count`` (habit, date) rows, habit by habit going back in time from today."""
+    per_habit = -(-count // habits)
+    today = date.today()
+    for i in range(count):
+        yield f"habit{i // per_habit}", (today - timedelta(days=i % per_habit)).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--habits", type=int, default=1000)
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite", "binary"], default="sqlite")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "rows." + args.format)
+        with open(source, "w", newline="") as f:
+            write_rows(synthetic_rows(args.rows, args.habits), f, args.format)
+        print(f"{args.rows} rows, {os.path.getsize(source) / 1e6:.0f} MB of {args.format}, "
+              f"peak memory so far {_peak_memory() / 1e6:.0f} MB")
+
+        tracker = HabitTracker(os.path.join(tmp, "habits" + EXTENSIONS.get(args.storage, ".json")), storage=args.storage)
+        start = time.perf_counter()
+        with open(source, newline="") as f:
+            stats = import_rows(tracker, read_rows(f, args.format), chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"import into {args.storage}: {elapsed:.1f} s, {stats['rows'] / elapsed:,.0f} rows/s, "
+              f"{stats['added']} added, peak memory {_peak_memory() / 1e6:.0f} MB")
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as f:
+            count = write_rows(HabitTracker(tracker.file, storage=args.storage).iter_completions(), f, args.format)
+        elapsed = time.perf_counter() - start
+        print(f"export: {elapsed:.1f} s, {count / elapsed:,.0f} rows/s, peak memory {_peak_memory() / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
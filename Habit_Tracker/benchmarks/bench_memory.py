@@ -0,0 +1,71 @@
+"""Memory held by a loaded tracker: lists of date strings versus Habit arrays"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate_recent
+from tracker import HabitTracker
+
+
+def traced(build):
+    """(MB still allocated, peak MB, seconds) for ``build()``.
+
+    Timing comes from a separate untraced run, since tracemalloc slows
+    every allocation down.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 1e6, peak / 1e6, elapsed
+
+
+def load_lists(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_habits(path):
+    tracker = HabitTracker(path)
+    tracker.data
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        data = generate_recent(args.habits, days=args.days)
+        completions = sum(map(len, data.values()))
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+        del data
+        HabitTracker(path).rebuild_streaks()  # so loads below read the sidecar instead of rebuilding it
+        print(f"{args.habits} habits, {completions} completions, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+        print(f"{'':<22} {'held MB':>8} {'peak MB':>8} {'B/completion':>13} {'load s':>7}")
+        for label, build in (("lists of strings", load_lists),
+                             ("Habit arrays", load_habits)):
+            current, peak, seconds = traced(lambda: build(path))
+            print(f"{label:<22} {current:8.1f} {peak:8.1f} {current * 1e6 / completions:13.1f} {seconds:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
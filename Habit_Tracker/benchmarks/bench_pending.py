@@ -0,0 +1,87 @@
+"""Cost of a reminder pass and of list --pending with and without the day index"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate_recent
+from tracker import HabitTracker
+
+
+def scan_pending(tracker, names):
+    """What a pass did before: one is_done per due habit."""
+    if len(names) > 1 and tracker.storage.streaming:
+        tracker.data  # one parse instead of a file scan per habit
+    today = date.today().isoformat()
+    return [habit for habit in names if tracker.is_done(habit, today) is False]
+
+
+def scan_list(tracker):
+    return scan_pending(tracker, tracker.habit_names())
+
+
+def index_pending(tracker, names):
+    return tracker.today_index().split(names)[0]
+
+
+def index_list(tracker):
+    return list(tracker.today_index().pending)
+
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(tracker, names, pending, listing):
+    """ms for a pass over every habit, a pass over 100, a pass after a mark, and list --pending."""
+    few = names[:100]
+
+    def after_mark():
+        tracker.mark_as_done(names[len(names) // 2])
+        tracker.reload()
+        pending(tracker, names)
+
+    pending(tracker, names)  # warm up: first load and index build
+    return {
+        "all due": timed(lambda: (tracker.reload(), pending(tracker, names))),
+        "100 due": timed(lambda: (tracker.reload(), pending(tracker, few))),
+        "after done": timed(after_mark, repeat=1),
+        "list --pending": timed(lambda: listing(tracker)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=100000)
+    parser.add_argument("--storage", choices=["json", "sqlite"], nargs="*", default=["json", "sqlite"])
+    args = parser.parse_args()
+
+    data = generate_recent(args.habits)
+    names = list(data)
+    print(f"{args.habits} habits, {sum(map(len, data.values()))} completions")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in args.storage:
+            path = os.path.join(tmp, f"habits.{storage}")
+            seed = HabitTracker(path, storage=storage)
+            seed.data = {habit: list(dates) for habit, dates in data.items()}
+            seed.save_data()
+            rows = {label: measure(HabitTracker(path, storage=storage), names, *functions)
+                    for label, functions in (("is_done", (scan_pending, scan_list)),
+                                             ("index", (index_pending, index_list)))}
+            print(f"\n{storage:<10} " + " ".join(f"{name + ' ms':>17}" for name in rows["index"]))
+            for label, times in rows.items():
+                print(f"{label:<10} " + " ".join(f"{ms:17.1f}" for ms in times.values()))
+
+
+if __name__ == "__main__":
+    main()
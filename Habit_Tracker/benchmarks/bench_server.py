@@ -0,0 +1,78 @@
+"""Per-command latency of the serve daemon, inside the server and over the socket"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import write_data
+from server import HabitServer, connect
+from tracker import HabitTracker
+
+
+def requests_for(command, habits):
+    if command in ("list", "stats"):
+        return [{"command": command}]
+    return [{"command": command, "name": habit} for habit in habits]
+
+
+def time_requests(send, requests, repeat):
+    """Milliseconds per call of ``send``, cycling through ``requests``.
+
+    The first request is sent once untimed, so one-off costs such as
+    importing NumPy for stats are not counted as a sample.
+    """
+    send(requests[0])
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        send(requests[i % len(requests)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=200)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        write_data(path, args.habits, args.years)
+        habits = HabitTracker(path).habit_names()
+        server = HabitServer(HabitTracker(path), path=os.path.join(tmp, "habits.sock"), flush_interval=0.5).open()
+        print(f"{args.habits} habits x {args.years} years, flush every {server.flush_interval:g}s")
+        print(f"{'command':<8} {'server p50':>11} {'p99':>8} {'socket p50':>11} {'p99':>8}  (ms)")
+
+        # In-process first: the time the daemon spends on a command
+        inside = {}
+        for command in ("done", "add", "list", "streak", "stats"):
+            repeat = args.repeat if command != "stats" else max(1, args.repeat // 100)
+            inside[command] = time_requests(server.handle, requests_for(command, habits), repeat)
+        server.flush()
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        with connect(server.path) as client:
+            for command, samples in inside.items():
+                socket_samples = time_requests(client.send, requests_for(command, habits), len(samples))
+                print(f"{command:<8} {statistics.median(samples):11.3f} {percentile(samples, 99):8.3f} "
+                      f"{statistics.median(socket_samples):11.3f} {percentile(socket_samples, 99):8.3f}")
+        server.stop()
+        thread.join()
+        print(f"{server.flushes} flushes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Process start-to-exit time for quick CLI commands"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CLI.py")
+TARGET_MS = 50
+# Modules quick commands must not import; each belongs to a command or storage that imports it itself
+LAZY = {"archive", "binformat", "dayindex", "gzip", "jsonstream", "mmap", "numpy", "rich",
+        "sqlite3", "threading", "writebehind"}
+
+COMMANDS = [
+    ["done", "--name", "gym"],
+    ["list"],
+]
+
+
+def wall_ms(argv, repeat, env=None):
+    """Median wall time in ms of ``repeat`` fresh interpreter runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def import_times(argv):
+    """(slowest top-level imports as (cumulative us, name), every module imported) from ``python -X importtime``."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *argv[1:]],
+                            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows, imported = [], set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.add(name.strip())
+        if not name.startswith("  "):  # top-level imports only
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True), imported
+
+
+def cached_env(tmp):
+    """Environment whose runs reuse compiled bytecode kept under ``tmp``, whatever PYTHONDONTWRITEBYTECODE says."""
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=os.path.join(tmp, "pycache"))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    leaks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "habits.json")
+        with open(path, "w") as f:
+            json.dump({"gym": [], "study": [], "pray": []}, f)
+
+        # Without a bytecode cache every run compiles the modules it imports
+        cached = cached_env(tmp)
+        print(f"{'':<16} {'as run':>9} {'cached .pyc':>12}")
+        bare = wall_ms([sys.executable, "-c", "pass"], args.repeat)
+        print(f"{'python -c pass':<16} {bare:6.1f} ms")
+        for command in COMMANDS:
+            argv = [sys.executable, CLI, *command, "--plain", "--no-daemon", "--file", path]
+            wall_ms(argv, 1, cached)  # fills the cache
+            elapsed, warm = wall_ms(argv, args.repeat), wall_ms(argv, args.repeat, cached)
+            verdict = "ok" if warm < TARGET_MS else f"over {TARGET_MS} ms target"  # as an installed CLI runs
+            print(f"{' '.join(command):<16} {elapsed:6.1f} ms {warm:9.1f} ms  ({verdict})")
+            rows, imported = import_times(argv)
+            for cumulative, name in rows[:args.top]:
+                print(f"    {name:<24} {cumulative / 1000:6.1f} ms")
+            if imported & LAZY:
+                leaks[" ".join(command)] = sorted(imported & LAZY)
+
+    for command, modules in leaks.items():
+        print(f"{command} imports {', '.join(modules)}, which should only load when used", file=sys.stderr)
+    if leaks:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
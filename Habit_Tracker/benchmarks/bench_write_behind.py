@@ -0,0 +1,61 @@
+"""Throughput of a burst of mutations with synchronous writes versus write-behind"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate_recent
+from tracker import HabitTracker
+
+
+def burst(tracker, names, ops):
+    """``ops`` mutations: every tenth adds a habit, the rest mark one done."""
+    for i in range(ops):
+        if i % 10 == 0:
+            tracker.add_habit(f"new{i}")
+        else:
+            tracker.mark_as_done(names[i % len(names)])
+
+
+def synchronous(tracker, names, ops):
+    burst(tracker, names, ops)
+
+
+def write_behind(tracker, names, ops):
+    with tracker.write_behind():  # leaving the block includes the final flush
+        burst(tracker, names, ops)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite"], nargs="*",
+                        default=["json", "journal", "sqlite"])
+    args = parser.parse_args()
+
+    data = generate_recent(args.habits)
+    names = list(data)
+    print(f"{args.habits} habits, {args.ops} mutations per run")
+    print(f"{'':<9} {'mode':<13} {'seconds':>8} {'ops/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in args.storage:
+            for label, run in (("synchronous", synchronous), ("write-behind", write_behind)):
+                path = os.path.join(tmp, f"{label}.{storage}")
+                seed = HabitTracker(path, storage=storage)
+                seed.data = {habit: list(dates) for habit, dates in data.items()}
+                seed.save_data()
+                tracker = HabitTracker(path, storage=storage)
+                tracker.data
+                start = time.perf_counter()
+                run(tracker, names, args.ops)
+                elapsed = time.perf_counter() - start
+                assert len(HabitTracker(path, storage=storage).habit_names()) == args.habits + args.ops // 10
+                print(f"{storage:<9} {label:<13} {elapsed:8.2f} {args.ops / elapsed:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
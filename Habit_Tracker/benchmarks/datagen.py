@@ -0,0 +1,54 @@
+# Synthetic habit histories for benchmarks
+import json
+import random
+from datetime import date, timedelta
+
+
+def generate(habits, years, density=0.7, gap_rate=0.01, gap_length=14, seed=0, today=None):
+    """``{habit: [dates]}`` with ``habits`` habits and ``years`` years of history up to yesterday.
+
+    Each habit gets its own completion rate spread around ``density``.
+    On any day a gap (holiday, illness, a lapsed habit) starts with
+    probability ``gap_rate`` and lasts up to ``gap_length`` days, so
+    histories have realistic streaks rather than uniform noise.
+    """
+    rng = random.Random(seed)
+    end = today or date.today()
+    start = end - timedelta(days=365 * years)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(365 * years)]
+    data = {}
+    for i in range(habits):
+        rate = min(1.0, max(0.05, rng.gauss(density, 0.15)))
+        dates = []
+        skip = 0
+        for day in days:
+            if skip:
+                skip -= 1
+            elif rng.random() < gap_rate:
+                skip = rng.randint(1, gap_length) - 1
+            elif rng.random() < rate:
+                dates.append(day)
+        data[f"habit{i}"] = dates
+    return data
+
+
+def generate_recent(habits, days=30, density=0.7, done_today=0.3, seed=0):
+    """``habits`` habits with about ``days`` days of history; ``done_today`` of them already done today."""
+    rng = random.Random(seed)
+    today = date.today()
+    recent = [(today - timedelta(days=i)).isoformat() for i in range(days, 0, -1)]
+    data = {}
+    for i in range(habits):
+        dates = [day for day in recent if rng.random() < density]
+        if rng.random() < done_today:
+            dates.append(today.isoformat())
+        data[f"habit{i}"] = dates
+    return data
+
+
+def write_data(path, habits, years, seed=0, **options):
+    """Write a habits.json with ``habits`` habits and about ``years`` of history each."""
+    data = generate(habits, years, seed=seed, **options)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+    return data
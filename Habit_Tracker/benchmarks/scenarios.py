@@ -0,0 +1,164 @@
+"""Timed scenarios for every storage, written as JSON for comparing commits"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate
+from storage import make_storage
+from tracker import HabitTracker
+
+STORAGES = ["json", "journal", "sqlite", "binary"]
+EXTENSIONS = {"sqlite": ".db", "binary": ".bin"}
+
+
+def _load(path, kind, habit):
+    HabitTracker(path, storage=kind).data
+
+
+def _save(path, kind, habit):
+    tracker = HabitTracker(path, storage=kind)
+    tracker.data
+    tracker.save_data()
+
+
+def _mark_as_done(path, kind, habit):
+    HabitTracker(path, storage=kind).mark_as_done(habit)
+
+
+def _streak(path, kind, habit):
+    HabitTracker(path, storage=kind).streak(habit)
+
+
+def _calendar(path, kind, habit):
+    from visualization import show_calendar
+    with contextlib.redirect_stdout(io.StringIO()):
+        show_calendar(habit, HabitTracker(path, storage=kind), plain=True)
+
+
+def _stats(path, kind, habit):
+    from analytics import habit_stats
+    habit_stats(HabitTracker(path, storage=kind).data)
+
+
+# Every scenario starts from a fresh tracker, the way each CLI invocation does
+SCENARIOS = {
+    "load": _load,
+    "save": _save,
+    "mark_as_done": _mark_as_done,
+    "streak": _streak,
+    "calendar": _calendar,
+    "stats": _stats,
+}
+
+
+def time_scenario(function, path, kind, habits, repeat):
+    """Run ``function`` ``repeat`` times, on a different habit each time; returns ms per run."""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(path, kind, habits[i % len(habits)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(options, scenarios, storages):
+    data = generate(options["habits"], options["years"], density=options["density"],
+                    gap_rate=options["gap_rate"], gap_length=options["gap_length"], seed=options["seed"])
+    habits = list(data)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in storages:
+            path = os.path.join(tmp, "habits" + EXTENSIONS.get(kind, ".json"))
+            make_storage(path, kind).save(data)
+            for name in scenarios:
+                samples = time_scenario(SCENARIOS[name], path, kind, habits, options["repeat"])
+                results.append({
+                    "scenario": name,
+                    "storage": kind,
+                    "median_ms": round(statistics.median(samples), 3),
+                    "min_ms": round(min(samples), 3),
+                    "runs": len(samples),
+                })
+                print(f"{name:<14} {kind:<8} {results[-1]['median_ms']:10.1f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": date.today().isoformat(),
+            "python": platform.python_version(),
+            "completions": sum(len(dates) for dates in data.values()),
+            **options,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print the change against ``baseline``; returns the scenarios that got slower than ``threshold``."""
+    before = {(row["scenario"], row["storage"]): row["median_ms"] for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        key = (row["scenario"], row["storage"])
+        if key not in before:
+            continue
+        change = row["median_ms"] / before[key] - 1 if before[key] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key[0]:<14} {key[1]:<8} {before[key]:10.1f} -> {row['median_ms']:10.1f} ms  {change:+7.1%}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--habits", type=int, default=200)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--density", type=float, default=0.7, help="average share of days completed")
+    parser.add_argument("--gap-rate", type=float, default=0.01, help="chance per day that a gap starts")
+    parser.add_argument("--gap-length", type=int, default=14, help="longest gap in days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="default: all")
+    parser.add_argument("--storage", action="append", choices=STORAGES, help="default: all")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    options = {key: getattr(args, key) for key in
+               ("habits", "years", "density", "gap_rate", "gap_length", "seed", "repeat")}
+    report = run(options, args.scenario or list(SCENARIOS), args.storage or STORAGES)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Compact binary format for completion history
+import mmap
+import struct
+from datetime import date
+from completions import Habit, set_days, year_bitsets, year_slices, year_start
+
+# File layout, all little-endian:
+#   header     MAGIC, habit count
+#   directory  per habit: name length, year count, UTF-8 name,
+#              then per year: year, offset of that year's bitmap
+#   bitmaps    YEAR_BYTES per habit-year; bit i is day i of the year (Jan 1 = 0)
+MAGIC = b'HBT1'
+HEADER = struct.Struct('<4sI')
+HABIT = struct.Struct('<HI')
+YEAR = struct.Struct('<HI')
+YEAR_BYTES = 46  # 366 bits
+# Set bit positions of every byte value, so decoding walks bytes rather than bits
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def encode(data):
+    """Serialize ``{habit: [dates]}``. Strings that are not valid dates are dropped."""
+    directory = []
+    bitmaps = []
+    for habit, dates in data.items():
+        if not isinstance(dates, Habit):
+            dates = Habit(dates)
+        name = habit.encode('utf-8')
+        years = year_bitsets(dates.ordinals())
+        directory.append((name, sorted(years)))
+        bitmaps.extend(years[year] for year in sorted(years))
+    size = HEADER.size + sum(HABIT.size + len(name) + YEAR.size * len(years) for name, years in directory)
+
+    out = bytearray(HEADER.pack(MAGIC, len(directory)))
+    offset = size
+    for name, years in directory:
+        out += HABIT.pack(len(name), len(years)) + name
+        for year in years:
+            out += YEAR.pack(year, offset)
+            offset += YEAR_BYTES
+    for bitmap in bitmaps:
+        out += bitmap.to_bytes(YEAR_BYTES, 'little')
+    return bytes(out)
+
+
+def read_directory(buf):
+    """{habit: {year: bitmap offset}} without touching any bitmap."""
+    magic, count = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a habit history file.')
+    directory = {}
+    pos = HEADER.size
+    for _ in range(count):
+        length, year_count = HABIT.unpack_from(buf, pos)
+        pos += HABIT.size
+        habit = bytes(buf[pos:pos + length]).decode('utf-8')
+        pos += length
+        years = {}
+        for _ in range(year_count):
+            year, offset = YEAR.unpack_from(buf, pos)
+            years[year] = offset
+            pos += YEAR.size
+        directory[habit] = years
+    return directory
+
+
+def decode(buf):
+    """Inverse of ``encode``: ``{habit: Habit}``, built straight from the bitmaps without any date strings."""
+    data = {}
+    for habit, years in read_directory(buf).items():
+        days = []
+        for year, offset in sorted(years.items()):
+            first = year_start(year)
+            for i, value in enumerate(buf[offset:offset + YEAR_BYTES]):
+                if value:
+                    base = first + i * 8
+                    days.extend(base + bit for bit in BYTE_BITS[value])
+        data[habit] = Habit.from_ordinals(days)
+    return data
+
+
+class HistoryFile:
+    """Memory-mapped history file that answers range queries from the bitmaps.
+
+    Only the directory is parsed up front; a query reads just the bytes
+    of the years (and within them the days) it covers.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.directory = read_directory(self.buf)
+
+    def close(self):
+        self.buf.close()
+
+    def between(self, habit, start, end):
+        """Completed dates of ``habit`` from ``start`` to ``end`` inclusive."""
+        years = self.directory[habit]
+        days = []
+        for year, lo, hi in year_slices(start, end):
+            offset = years.get(year)
+            if offset is None:
+                continue
+            # Read only the bytes that hold bits lo..hi
+            chunk = int.from_bytes(self.buf[offset + lo // 8:offset + hi // 8 + 1], 'little')
+            chunk >>= lo % 8
+            chunk &= (1 << (hi - lo + 1)) - 1
+            days.extend(set_days(chunk, year_start(year) + lo))
+        return [date.fromordinal(day) for day in days]
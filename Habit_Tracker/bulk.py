@@ -0,0 +1,116 @@
+# Bulk import and export of completions as CSV or NDJSON rows
+import csv
+import json
+from datetime import date
+from itertools import islice
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 50000
+
+
+def guess_format(path, default="csv"):
+    """Format implied by a file name's extension."""
+    if path and path.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if path and path.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_rows(f, fmt="csv"):
+    """Yield raw (habit, date) pairs from an open text file, one line at a time.
+
+    CSV rows are ``habit,date`` with an optional header; NDJSON lines are
+    ``{"habit": ..., "date": ...}``. A missing or empty date stands for a
+    habit without completions. Blank lines are skipped; anything else that
+    cannot be read yields ``(None, line number)``.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.reader(f), 1):
+            if not row or (number == 1 and row[:2] == ["habit", "date"]):
+                continue
+            if len(row) > 2 or not row[0].strip():
+                yield None, number
+                continue
+            yield row[0].strip(), row[1].strip() if len(row) > 1 else ""
+    else:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                yield row["habit"], row.get("date")
+            except (ValueError, KeyError, TypeError, AttributeError):
+                yield None, number
+
+
+def clean_rows(rows, stats):
+    """Normalise dates to 'YYYY-MM-DD'; rows that do not parse are counted in ``stats["skipped"]`` and dropped."""
+    for habit, day in rows:
+        if day:
+            try:
+                day = date.fromisoformat(day).isoformat()
+            except (TypeError, ValueError):
+                habit = None
+        if not isinstance(habit, str) or not habit:
+            stats["skipped"] += 1
+            continue
+        yield habit, day or None
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    """Lists of at most ``size`` rows; only one is held at a time."""
+    if size < 1:
+        raise ValueError(f"Chunk size must be at least 1, got {size}.")
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_rows(tracker, rows, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Apply (habit, date) rows to ``tracker``, persisting once per chunk.
+
+    Missing habits are created and completions that are already recorded
+    are skipped, so importing the same file twice changes nothing. Returns
+    counts of rows, new completions, duplicates, created habits and
+    malformed rows.
+    """
+    stats = {"rows": 0, "added": 0, "duplicates": 0, "habits": 0, "skipped": 0}
+    for chunk in chunks(clean_rows(rows, stats), chunk_size):
+        by_habit = {}
+        for habit, day in chunk:
+            dates = by_habit.setdefault(habit, [])
+            if day is not None:
+                dates.append(day)
+        with tracker.batch():
+            for habit, dates in by_habit.items():
+                added = tracker.mark_many(habit, dates)
+                if added is None:
+                    tracker.add_habit(habit)
+                    stats["habits"] += 1
+                    added = tracker.mark_many(habit, dates)
+                stats["added"] += added
+                stats["duplicates"] += len(dates) - added
+        stats["rows"] += len(chunk)
+        if on_chunk is not None:
+            on_chunk(stats)
+    return stats
+
+
+def write_rows(rows, f, fmt="csv"):
+    """Write (habit, date) pairs as CSV with a header or as NDJSON; returns the row count."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["habit", "date"])
+        for habit, day in rows:
+            writer.writerow([habit, day or ""])
+            count += 1
+    else:
+        for habit, day in rows:
+            f.write(json.dumps({"habit": habit, "date": day}) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,245 @@
+# Per-habit completion history
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+from operator import ge
+
+
+def to_ordinal(day):
+    """Day ordinal for a date or a 'YYYY-MM-DD' string."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_day(day):
+    """Day ordinal of a 'YYYY-MM-DD' string; histories share few distinct days, so this is cached."""
+    return date.fromisoformat(day).toordinal()
+
+
+@lru_cache(maxsize=1 << 16)
+def iso_day(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def year_start(year):
+    return date(year, 1, 1).toordinal()
+
+
+# Loaded histories answer ranges by bisecting Habit's ordinal array; the
+# per-year bitsets below are only the on-disk layout of the binary format.
+def year_bitsets(ordinals):
+    """{year: bitset} for day ordinals; bit i is day i of the year (Jan 1 = 0)."""
+    years = {}
+    for day in ordinals:
+        year = date.fromordinal(day).year
+        years[year] = years.get(year, 0) | 1 << (day - year_start(year))
+    return years
+
+
+def set_days(bits, first):
+    """Day ordinals of the set bits of ``bits``, bit 0 being day ``first``."""
+    days = []
+    while bits:
+        low = bits & -bits
+        days.append(first + low.bit_length() - 1)
+        bits ^= low
+    return days
+
+
+def year_slices(start, end):
+    """(year, first bit, last bit) for every year the range ``start``..``end`` touches."""
+    start, end = to_ordinal(start), to_ordinal(end)
+    for year in range(date.fromordinal(start).year, date.fromordinal(end).year + 1):
+        first = year_start(year)
+        yield year, max(start, first) - first, min(end, year_start(year + 1) - 1) - first
+
+
+class Habit:
+    """One habit's completions as a sorted array of unsigned 32-bit day ordinals.
+
+    A list of 'YYYY-MM-DD' strings costs about 70 bytes per completion;
+    here each one takes 4. It still reads like the sorted, de-duplicated
+    list of ISO strings it stands for. Iteration, indexing, ``len``,
+    ``in`` with a string or a date, comparison and ``+`` with lists, and
+    the list methods that fit a sorted set (append, insert, extend,
+    remove, pop, copy, clear, ``del``) all work. It is not a ``list``
+    subclass, so ``json.dump`` needs ``default=list``, as the storages
+    pass, and type checks should test for a Sequence. Membership and range
+    queries bisect the array, so there is no index to build or keep.
+    Strings that are not dates are kept aside in ``extra`` so a save
+    never drops anything a file contained.
+    """
+
+    __slots__ = ('days', 'extra')
+
+    def __init__(self, dates=()):
+        if not isinstance(dates, (list, tuple)):
+            dates = list(dates)
+        extra = None
+        try:
+            days = list(map(parse_day, dates))  # the usual case: nothing but ISO strings
+        except (TypeError, ValueError):
+            days = []
+            for day in dates:
+                try:
+                    days.append(parse_day(day) if isinstance(day, str) else day.toordinal())
+                except (AttributeError, TypeError, ValueError):
+                    extra = extra or []
+                    extra.append(day)
+        if any(map(ge, days, islice(days, 1, None))):
+            days = sorted(set(days))
+        self.days = array('I', days)
+        self.extra = extra
+
+    @classmethod
+    def from_ordinals(cls, days):
+        """A Habit over ``days``, which must already be sorted and unique."""
+        habit = cls.__new__(cls)
+        habit.days = array('I', days)
+        habit.extra = None
+        return habit
+
+    def __len__(self):
+        return len(self.days) + (len(self.extra) if self.extra else 0)
+
+    def __iter__(self):
+        for day in self.days:
+            yield iso_day(day)
+        if self.extra:
+            yield from self.extra
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and not self.extra and -len(self.days) <= index < len(self.days):
+            return iso_day(self.days[index])
+        return list(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Habit):
+            return self.days == other.days and (self.extra or []) == (other.extra or [])
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Habit({list(self)!r})'
+
+    def _find(self, day):
+        """(position, ordinal) of ``day`` in the array; ordinal is None for strings that are not dates."""
+        try:
+            ordinal = day.toordinal() if isinstance(day, date) else parse_day(day)
+        except (TypeError, ValueError):
+            return None, None
+        return bisect_left(self.days, ordinal), ordinal
+
+    def __contains__(self, day):
+        i, ordinal = self._find(day)
+        if ordinal is None:
+            return bool(self.extra) and day in self.extra
+        return i < len(self.days) and self.days[i] == ordinal
+
+    def count(self, day):
+        if self._find(day)[1] is None:
+            return self.extra.count(day) if self.extra else 0
+        return int(day in self)
+
+    def index(self, day):
+        i, ordinal = self._find(day)
+        if ordinal is not None and i < len(self.days) and self.days[i] == ordinal:
+            return i
+        return list(self).index(day)
+
+    def append(self, day):
+        """Add a completion; days already present are ignored and order is kept."""
+        i, ordinal = self._find(day)
+        if ordinal is None:
+            self.extra = self.extra or []
+            self.extra.append(day)
+        elif i == len(self.days):
+            self.days.append(ordinal)
+        elif self.days[i] != ordinal:
+            self.days.insert(i, ordinal)
+
+    def extend(self, dates):
+        for day in dates:
+            self.append(day)
+
+    def remove(self, day):
+        i, ordinal = self._find(day)
+        if ordinal is not None and i < len(self.days) and self.days[i] == ordinal:
+            del self.days[i]
+        elif ordinal is None and self.extra and day in self.extra:
+            self.extra.remove(day)
+        else:
+            raise ValueError(f'{day!r} is not a completion.')
+
+    def insert(self, index, day):
+        """Add a completion; as with ``append``, its place comes from the date, not ``index``."""
+        self.append(day)
+
+    def pop(self, index=-1):
+        day = self[index]
+        self.remove(day)
+        return day
+
+    def __delitem__(self, index):
+        for day in self[index] if isinstance(index, slice) else [self[index]]:
+            self.remove(day)
+
+    def clear(self):
+        self.days = array('I')
+        self.extra = None
+
+    def copy(self):
+        habit = Habit.from_ordinals(self.days)
+        habit.extra = list(self.extra) if self.extra else None
+        return habit
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __iadd__(self, dates):
+        self.extend(dates)
+        return self
+
+    def sort(self):
+        pass  # always kept in date order
+
+    def ordinals(self):
+        """Sorted, de-duplicated day ordinals; the array itself, so do not modify it."""
+        return self.days
+
+    def latest(self):
+        """Most recent completion as a date, or None."""
+        return date.fromordinal(self.days[-1]) if self.days else None
+
+    def _slice(self, start, end):
+        return bisect_left(self.days, to_ordinal(start)), bisect_right(self.days, to_ordinal(end))
+
+    def between(self, start, end):
+        """Completed dates from ``start`` to ``end`` inclusive."""
+        lo, hi = self._slice(start, end)
+        return [date.fromordinal(day) for day in self.days[lo:hi]]
+
+    def count_between(self, start, end):
+        """Number of completed days from ``start`` to ``end`` inclusive."""
+        lo, hi = self._slice(start, end)
+        return hi - lo
+
+
+Sequence.register(Habit)
+
+
+def wrap(data):
+    """Give every habit in ``data`` a Habit history."""
+    return {habit: dates if isinstance(dates, Habit) else Habit(dates)
+            for habit, dates in data.items()}
@@ -0,0 +1,13 @@
+# Shared settings
+import os
+
+# Where habits live unless --file is given on the command line
+DATA_FILE = os.environ.get('HABITS_FILE', 'habits.json')
+SQLITE_FILE = os.environ.get('HABITS_DB', 'habits.db')
+BINARY_FILE = os.environ.get('HABITS_BIN', 'habits.bin')
+# Its own snapshot, so the json storage never reads a file whose log it would ignore
+JOURNAL_FILE = os.environ.get('HABITS_JOURNAL', 'habits.journal.json')
+# Root of the per-user shards used with --user
+USERS_DIR = os.environ.get('HABITS_USERS_DIR', 'users')
+# Unix socket of the serve daemon; the CLI talks to it when it is running
+SOCKET_FILE = os.environ.get('HABITS_SOCKET', 'habits.sock')
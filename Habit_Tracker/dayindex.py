@@ -0,0 +1,78 @@
+# Which habits are done and which are still pending today
+from completions import to_ordinal
+
+
+class DayIndex:
+    """The habits completed on ``day`` and the ones still pending.
+
+    Both are dicts used as ordered sets, so a lookup is O(1) and listing
+    either side costs its own size, not the number of habits. The tracker
+    builds one from its streak index, whose last completion already says
+    whether a habit was done today, and keeps it current as habits are
+    added, marked and removed. It is dropped when another process changes
+    the data and rebuilt for a new day.
+    """
+
+    def __init__(self, day, pending=(), done=()):
+        self.day = day
+        self.pending = dict.fromkeys(pending)
+        self.done = dict.fromkeys(done)
+
+    @classmethod
+    def from_streaks(cls, day, entries, is_done):
+        """Build from ``{habit: [current, longest, last]}``; ``is_done`` settles habits with later completions."""
+        index = cls(day)
+        today = to_ordinal(day)
+        for habit, (_, _, last) in entries.items():
+            if last is None or last < today:
+                index.pending[habit] = None
+            elif last == today or is_done(habit, day):
+                index.done[habit] = None
+            else:
+                index.pending[habit] = None  # only done on days after this one
+        return index
+
+    def __len__(self):
+        return len(self.pending) + len(self.done)
+
+    def status(self, habit):
+        """Whether ``habit`` is done on this day; None if it does not exist."""
+        if habit in self.pending:
+            return False
+        if habit in self.done:
+            return True
+        return None
+
+    def split(self, names):
+        """(pending, done, missing) lists for ``names``, in their order."""
+        pending, done, missing = [], [], []
+        for habit in names:
+            if habit in self.pending:
+                pending.append(habit)
+            elif habit in self.done:
+                done.append(habit)
+            else:
+                missing.append(habit)
+        return pending, done, missing
+
+    def add(self, habit):
+        if habit not in self.done:
+            self.pending[habit] = None
+
+    def mark(self, habit, day):
+        if day == self.day and habit in self.pending:
+            del self.pending[habit]
+            self.done[habit] = None
+
+    def remove(self, habit):
+        self.pending.pop(habit, None)
+        self.done.pop(habit, None)
+
+    def apply(self, event):
+        """Account for one add/done/remove event."""
+        if event['op'] == 'add':
+            self.add(event['habit'])
+        elif event['op'] == 'done':
+            self.mark(event['habit'], event['date'])
+        elif event['op'] == 'remove':
+            self.remove(event['habit'])
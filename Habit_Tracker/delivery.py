@@ -0,0 +1,217 @@
+# Notification delivery
+import queue
+import threading
+import time
+from collections import deque
+
+
+def reminder_message(habits):
+    """(title, message) for one habit, or a digest when several are pending."""
+    if len(habits) == 1:
+        return "🔔 Habit Reminder", f"Time to {habits[0]}! Keep your streak going!"
+    return "🔔 Habit Reminders", f"Still to do today: {', '.join(habits)}. Keep your streaks going!"
+
+
+class FakeSink:
+    """In-process sink that records what it was given, for tests and benchmarks.
+
+    A sink is anything with ``send(title, message)``; it may block or
+    raise, the delivery queue deals with both.
+    """
+
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.sent = []  # (title, message, time sent)
+        self._lock = threading.Lock()
+
+    def send(self, title, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("fake sink failure")
+        with self._lock:
+            self.sent.append((title, message, time.monotonic()))
+
+
+class TokenBucket:
+    """Allows ``rate`` sends per second on average, with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _wait_time(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def reserve(self):
+        """Take a send if one is allowed now and return 0; otherwise return the seconds to wait before asking again."""
+        with self._lock:
+            return self._wait_time()
+
+    def acquire(self, sleep=time.sleep):
+        """Block until a send is allowed."""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            sleep(wait)
+
+
+class DeliveryQueue:
+    """Bounded pool of workers that hand reminders to a sink off the scheduler thread.
+
+    Sink calls run on ``workers`` long-lived caller threads. Every call
+    gets ``timeout`` seconds; a call that hangs past it is abandoned so
+    its worker can move on, and while every caller is stuck in the sink,
+    reminders are skipped instead of piling more calls onto it. With
+    ``digest`` a worker merges every reminder already waiting into a
+    single notification. ``latencies`` keeps the last ``latency_samples``
+    submit-to-delivery times.
+    """
+
+    def __init__(self, sink, workers=2, timeout=10.0, rate=None, burst=1, digest=False,
+                 max_pending=1000, on_result=None, latency_samples=1000):
+        self.sink = sink
+        self.workers = workers
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.digest = digest
+        self.on_result = on_result
+        self.stats = {"sent": 0, "failed": 0, "timed_out": 0, "skipped": 0, "dropped": 0}
+        self.latencies = deque(maxlen=latency_samples)  # seconds from submit to delivery
+        self._queue = queue.Queue(max_pending)
+        self._calls = queue.Queue()  # sink calls waiting for a caller thread
+        self._threads = []
+        self._callers = []
+        self._busy = 0  # calls handed to the sink that it has not returned from, abandoned ones included
+        self._lock = threading.Lock()
+
+    def start(self):
+        for _ in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        for _ in range(self.workers - len(self._callers)):
+            thread = threading.Thread(target=self._call_sink, daemon=True)
+            thread.start()
+            self._callers.append(thread)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, habit):
+        """Queue a reminder; returns False if the queue is full and it was dropped."""
+        try:
+            self._queue.put_nowait((habit, time.monotonic()))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        return True
+
+    def close(self, wait=True):
+        """Stop the workers, after delivering what is queued when ``wait`` is true."""
+        if not wait:
+            self._drain()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        # Callers stuck in the sink are daemons and exit once it returns
+        for _ in self._callers:
+            self._calls.put(None)
+        self._callers = []
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _count(self, key, habits=(), submitted=()):
+        with self._lock:
+            self.stats[key] += 1
+            if key == "sent":
+                now = time.monotonic()
+                self.latencies.extend(now - at for at in submitted)
+        if self.on_result is not None and habits:
+            self.on_result(habits, key)
+
+    def _take(self):
+        """Next reminder, plus everything else already waiting when digesting."""
+        items = [self._queue.get()]
+        while self.digest and items[-1] is not None:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _work(self):
+        while True:
+            items = self._take()
+            stop = items[-1] is None
+            if stop:
+                items.pop()
+            if items:
+                self._deliver([habit for habit, _ in items], [at for _, at in items])
+            if stop:
+                return
+
+    def _call_sink(self):
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            habits, outcome, finished = call
+            try:
+                self.sink.send(*reminder_message(habits))
+                ok = True
+            except Exception:
+                ok = False
+            with self._lock:
+                outcome["ok"] = ok
+                finished.set()
+                self._busy -= 1
+
+    def _deliver(self, habits, submitted):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with self._lock:
+            stuck = self._busy >= self.workers
+            if not stuck:
+                self._busy += 1
+        if stuck:
+            # Every caller is still waiting on the sink; another call would only queue behind them
+            self._count("skipped", habits)
+            return
+        outcome = {}
+        finished = threading.Event()
+        # The sink runs on a caller thread so a hung backend only costs a timeout
+        self._calls.put((habits, outcome, finished))
+        if not finished.wait(self.timeout):
+            with self._lock:
+                if not finished.is_set():
+                    outcome["abandoned"] = True
+        if outcome.get("abandoned"):
+            self._count("timed_out", habits)
+        elif outcome["ok"]:
+            self._count("sent", habits, submitted)
+        else:
+            self._count("failed", habits)
@@ -0,0 +1,164 @@
+# Incremental reader for habits.json
+import json
+import re
+from json.decoder import scanstring
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = re.compile(r'\s*')
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+BRACKET = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r'[,}\s]')
+
+
+class Scanner:
+    """Walks the top-level ``{habit: [dates]}`` object of a file chunk by chunk.
+
+    Values are not parsed while scanning: each one comes back as its raw
+    JSON text, so skipping a habit costs a string search and memory stays
+    bounded by the chunk size plus the largest single value.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        if self.eof:
+            raise ValueError('Unexpected end of JSON file.')
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            raise ValueError('Unexpected end of JSON file.')
+        # Drop what has been consumed so the buffer does not grow with the file
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self._more()
+
+    def _expect(self, char):
+        if self._skip_whitespace() != char:
+            raise ValueError(f'Expected "{char}" at offset {self.pos}.')
+        self.pos += 1
+
+    def _key(self):
+        # Make sure the whole key, escapes included, is buffered before decoding it
+        while not STRING.match(self.buf, self.pos):
+            self._more()
+        key, self.pos = scanstring(self.buf, self.pos + 1)
+        return key
+
+    def _refill(self, pos):
+        """Read more of the file; returns ``pos`` translated into the new buffer."""
+        offset = pos - self.pos
+        self._more()
+        return offset
+
+    def _value_end(self):
+        """Offset just past the value starting at ``self.pos``."""
+        if self.buf[self.pos] == '"':
+            while True:
+                string = STRING.match(self.buf, self.pos)
+                if string:
+                    return string.end()
+                self._refill(self.pos)
+        if self.buf[self.pos] not in '[{':
+            # Numbers, true, false and null end at the next comma or brace
+            while True:
+                match = SCALAR_END.search(self.buf, self.pos)
+                if match:
+                    return match.start()
+                self._refill(self.pos)
+        # Fast path: a flat array of plain strings, as written by json.dump
+        if self.buf[self.pos] == '[':
+            close = self.buf.find(']', self.pos)
+            while close == -1:
+                self._refill(self.pos)
+                close = self.buf.find(']', self.pos)
+            raw = self.buf[self.pos:close]
+            if '\\' not in raw and '[' not in raw[1:] and '{' not in raw and raw.count('"') % 2 == 0:
+                return close + 1
+        depth = 0
+        pos = self.pos
+        while True:
+            match = BRACKET.search(self.buf, pos)
+            if match is None:
+                pos = self._refill(pos)
+                continue
+            if match.group() == '"':
+                string = STRING.match(self.buf, match.start())
+                if string is None:
+                    pos = self._refill(match.start())
+                    continue
+                pos = string.end()
+                continue
+            depth += 1 if match.group() in '[{' else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+
+    def _raw_value(self):
+        self._skip_whitespace()
+        end = self._value_end()
+        raw = self.buf[self.pos:end]
+        self.pos = end
+        return raw
+
+    def __iter__(self):
+        """Yield ``(habit, raw JSON of its value)`` in file order."""
+        try:
+            self._expect('{')
+        except ValueError:
+            if self.eof and not self.buf.strip():
+                return  # empty file
+            raise
+        if self._skip_whitespace() == '}':
+            return
+        while True:
+            if self._skip_whitespace() != '"':
+                raise ValueError(f'Expected a habit name at offset {self.pos}.')
+            key = self._key()
+            self._expect(':')
+            yield key, self._raw_value()
+            char = self._skip_whitespace()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f'Expected "," or "}}" at offset {self.pos - 1}.')
+
+
+def format_value(dates):
+    """A dates list as it appears inside the top-level object written with ``indent=4``."""
+    return json.dumps(dates, indent=4, default=list).replace('\n', '\n    ')
+
+
+def rewrite(entries, out, edit=None, append=()):
+    """Write ``(habit, raw JSON)`` pairs from a Scanner to ``out`` as a habits.json.
+
+    ``edit(habit, raw)`` returns the raw JSON to write instead, or None to
+    drop the habit. Untouched habits are copied verbatim, so only edited
+    ones are ever parsed. ``append`` adds ``(habit, dates)`` pairs at the end.
+    """
+    written = 0
+    out.write('{')
+    for habit, raw in entries:
+        if edit is not None:
+            raw = edit(habit, raw)
+            if raw is None:
+                continue
+        out.write(',\n' if written else '\n')
+        out.write(f'    {json.dumps(habit)}: {raw}')
+        written += 1
+    for habit, dates in append:
+        out.write(',\n' if written else '\n')
+        out.write(f'    {json.dumps(habit)}: {format_value(dates)}')
+        written += 1
+    out.write('\n}' if written else '}')
@@ -1,33 +1,68 @@
-import time
-import schedule
-import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from plyer import notification
 from datetime import datetime
 from tracker import HabitTracker
+from config import DATA_FILE
+from scheduler import AsyncReminderScheduler, ReminderScheduler
+from delivery import DeliveryQueue, TokenBucket, reminder_message
 
-class HabitNotifications:
-    def __init__(self, data_file='habits.json'):
-        self.tracker = HabitTracker(data_file)
-        self.running = False
+REMINDER_HOURS = 2
+REMINDER_TICK = "reminders"  # the scheduler job for the default interval
+
+class DesktopSink:
+    """Delivers reminders as desktop notifications through plyer."""
     
-    def send_notification(self, habit_name):
-        """Send a desktop notification for the given habit."""
+    def send(self, title, message):
         notification.notify(
-            title=f"🔔 Habit Reminder",
-            message=f"Time to {habit_name}! Keep your streak going!",
+            title=title,
+            message=message,
             app_name="Habit Tracker",
             timeout=10
         ) # type: ignore
+
+class HabitNotifications:
+    def __init__(self, data_file=DATA_FILE, storage='json', tracker=None, sink=None,
+                 workers=2, rate=None, digest=False):
+        # Reuse the caller's tracker so the data file is only parsed once; no data_file means no tracker
+        if tracker is None and data_file is not None:
+            tracker = HabitTracker(data_file, storage=storage)
+        self.tracker = tracker
+        self.scheduler = ReminderScheduler(self.check_due_habits)
+        self.sink = sink if sink is not None else DesktopSink()
+        # Options for the delivery queue that runs alongside the scheduler
+        self.delivery_options = {"workers": workers, "rate": rate, "digest": digest}
+        self.delivery = None
+        self.running = False
+        self.hours = REMINDER_HOURS
+        self.intervals = {}
+        self._ticks = {}  # scheduler job -> the interval in hours it stands for
+    
+    def send_notification(self, habit_name):
+        """Send a notification for the given habit, through the delivery queue while it runs."""
+        if self.delivery is not None:
+            self.delivery.submit(habit_name)
+            return
+        self.sink.send(*reminder_message([habit_name]))
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Notification sent for: {habit_name}")
     
-    def check_habit_status(self, habit_name):
+    def report_delivery(self, habit_names, outcome):
+        names = ", ".join(habit_names)
+        if outcome == "sent":
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Notification sent for: {names}")
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Notification {outcome.replace('_', ' ')} for: {names}")
+    
+    def check_habit_status(self, habit_name, reload=True):
         """Check if habit is done today and send notification if not."""
-        # Reload data to get latest updates
-        self.tracker.load_data()
-        today = datetime.now().strftime('%Y-%m-%d')
+        # Pick up changes made by the CLI since the last check
+        if reload:
+            self.tracker.reload()
+        # The day index answers without reading the habit's history
+        done = self.tracker.today_index().status(habit_name)
         
-        if habit_name in self.tracker.data:
-            if today not in self.tracker.data[habit_name]:
+        if done is not None:
+            if not done:
                 # Not done today - send notification
                 self.send_notification(habit_name)
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] {habit_name} not completed today")
@@ -37,52 +72,226 @@ class HabitNotifications:
         else:
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Habit '{habit_name}' not found")
     
-    def schedule_habit_reminders(self):
-        """Schedule reminders for all habits every 2 hours."""
-        scheduled_count = 0
-        
-        for habit_name in self.tracker.data.keys():
-            schedule.every(2).hours.do(self.check_habit_status, habit_name)
-            print(f"📅 Scheduled '{habit_name}' reminder every 2 hours")
-            scheduled_count += 1
+    def due_pending(self, jobs=None):
+        """Habits not done today whose interval is one of the ticks in ``jobs`` (default: all of them)."""
+        pending = self.tracker.today_index().pending
+        if jobs is None or not self.intervals:
+            return list(pending)
+        due = {self._ticks.get(job) for job in jobs}
+        return [habit_name for habit_name in pending if self.intervals.get(habit_name, self.hours) in due]
+    
+    def check_due_habits(self, jobs=None):
+        """Remind about the habits not done today whose tick in ``jobs`` came due."""
+        # One reload serves the whole pass, and only pending habits are looked at
+        self.tracker.reload()
+        due = self.due_pending(jobs)
+        for habit_name in due:
+            self.send_notification(habit_name)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(due)} habits not completed today")
+    
+    def schedule_habit_reminders(self, hours=REMINDER_HOURS, intervals=None):
+        """Schedule reminders for all habits, every ``hours`` unless ``intervals`` gives a habit its own.
+
+        There is one job per distinct interval rather than per habit, and
+        each tick reads the pending habits from the day index, so habits
+        added or removed later need no scheduling of their own.
+        """
+        self.hours = hours
+        self.intervals = intervals or {}
+        for job in self._ticks:
+            self.scheduler.remove(job)
+        self._ticks = {REMINDER_TICK: hours}
+        for every in set(self.intervals.values()) - {hours}:
+            self._ticks[f"{REMINDER_TICK} every {every:g}h"] = every
+        for job, every in self._ticks.items():
+            self.scheduler.add(job, every * 3600)
         
-        if scheduled_count == 0:
+        count = len(self.tracker.today_index())
+        if count == 0:
             print("❌ No habits found to schedule reminders")
             return False
+        print(f"📅 Scheduled reminders for {count} habits every {hours:g} hours")
+        for habit_name, every in self.intervals.items():
+            print(f"📅 '{habit_name}' is reminded every {every:g} hours")
         return True
     
     def run_scheduler(self):
-        """Run scheduler in background - user can close terminal."""
+        """Sleep until the next reminder is due; stop with Ctrl+C."""
         print("\n✅ Starting background notifications...")
-        print("🔔 You will get desktop notifications every 2 hours")
+        print("🔔 You will get desktop notifications when reminders are due")
         print("🛑 Only incomplete habits will send notifications")
         
-        self.running = True
-        
-        # Background worker function
-        def background_worker():
-            while self.running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
-        
-        # Start background thread
-        thread = threading.Thread(target=background_worker)
-        thread.daemon = True  # Dies when main program dies
-        thread.start()
-        
+        self.start_delivery()
         try:
-            # Keep main program alive
-            while self.running:
-                time.sleep(1)
+            self.scheduler.run()
         except KeyboardInterrupt:
-            print("\n👋 Stopping notifications...")
+            print("\n👋 Stopping Habit Tracker Notifications")
+        finally:
+            self.close_delivery()
+    
+    def start_delivery(self):
+        """Start the delivery queue; also used by the serve daemon, which drives the scheduler itself."""
+        self.running = True
+        # Slow or hanging notification backends are handled off the scheduler thread
+        self.delivery = DeliveryQueue(self.sink, on_result=self.report_delivery, **self.delivery_options).start()
+    
+    def close_delivery(self):
+        self.running = False
+        delivery, self.delivery = self.delivery, None
+        if delivery is not None:
+            delivery.close()
+    
+    def stop(self):
+        self.scheduler.stop()
+
+class AsyncHabitNotifications(HabitNotifications):
+    """HabitNotifications on one asyncio event loop.
+
+    The reminder tick is a loop timer, so the process sleeps until it is
+    due. A pass reloads the data and reads the pending habits from the
+    day index in a single call on a one-thread disk executor, so the
+    loop never waits on the file. Notifications are sent from a separate
+    executor, at most ``workers`` at a time, and a send that takes longer
+    than ``timeout`` is abandoned. ``run`` returns cleanly when ``stop``
+    is called or its task is cancelled.
+    """
+    
+    def __init__(self, data_file=DATA_FILE, storage='json', tracker=None, sink=None,
+                 workers=2, rate=None, digest=False, timeout=10.0):
+        super().__init__(data_file, storage, tracker, sink, workers, rate, digest)
+        self.scheduler = AsyncReminderScheduler(self.check_due_habits)
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate) if rate else None
+        self.stats = {"sent": 0, "failed": 0, "timed_out": 0}
+        self._disk = None
+        self._senders = None
+        self._loop = None
+        self._stopped = None
+    
+    def _pending(self, jobs):
+        """The habits to remind about for the ticks in ``jobs``; runs on the disk executor."""
+        self.tracker.reload()
+        return self.due_pending(jobs)
+    
+    async def check_due_habits(self, jobs=None):
+        """Send reminders for the habits not done today whose tick came due."""
+        loop = asyncio.get_running_loop()
+        pending = await loop.run_in_executor(self._disk, self._pending, jobs)
+        if self.delivery_options["digest"]:
+            batches = iter([pending] if pending else [])
+        else:
+            batches = ([habit_name] for habit_name in pending)
+        # A fixed number of senders share one iterator, so a pass over
+        # thousands of habits does not create a task per habit
+        senders = min(self.delivery_options["workers"], len(pending))
+        await asyncio.gather(*(self._send_all(batches) for _ in range(senders)))
+    
+    async def _send_all(self, batches):
+        for habit_names in batches:
+            await self._send(habit_names)
+    
+    async def _send(self, habit_names):
+        if self.bucket is not None:
+            wait = self.bucket.reserve()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self.bucket.reserve()
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(self._senders, self.sink.send, *reminder_message(habit_names))
+        try:
+            await asyncio.wait_for(call, self.timeout)
+            outcome = "sent"
+        except asyncio.TimeoutError:
+            outcome = "timed_out"  # the hung call keeps its executor thread until it returns
+        except Exception:
+            outcome = "failed"
+        self.stats[outcome] += 1
+        self.report_delivery(habit_names, outcome)
+    
+    async def run(self):
+        """Fire reminders until ``stop`` is called or this coroutine is cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._disk = ThreadPoolExecutor(1, thread_name_prefix="habit-disk")
+        self._senders = ThreadPoolExecutor(self.delivery_options["workers"], thread_name_prefix="habit-notify")
+        self.running = True
+        self.scheduler.start()
+        try:
+            await self._stopped.wait()
+        finally:
             self.running = False
+            self.scheduler.close()
+            # Nothing waits on abandoned sends; queued ones are dropped
+            self._disk.shutdown(wait=False, cancel_futures=True)
+            self._senders.shutdown(wait=False, cancel_futures=True)
+            self._loop = None
+    
+    def run_scheduler(self):
+        """Run the event loop until Ctrl+C."""
+        print("\n✅ Starting background notifications...")
+        print("🔔 You will get desktop notifications when reminders are due")
+        print("🛑 Only incomplete habits will send notifications")
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            print("\n👋 Stopping Habit Tracker Notifications")
+    
+    def stop(self):
+        """Make ``run`` return; safe to call from any thread."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopped.set)
+
+class TenantNotifications(HabitNotifications):
+    """One notifier for every user in a TenantStore.
+
+    Each user gets a single reminder job; a user's shard is only opened
+    when their reminder comes due, and users added or removed by other
+    processes are picked up on the next pass.
+    """
+    
+    def __init__(self, tenants, sink=None, workers=2, rate=None, digest=False):
+        super().__init__(data_file=None, sink=sink, workers=workers, rate=rate, digest=digest)
+        self.tenants = tenants
+    
+    def schedule_habit_reminders(self, hours=REMINDER_HOURS, intervals=None):
+        """Schedule one reminder per user, every ``hours`` unless ``intervals`` gives a user their own."""
+        self.hours = hours
+        self.intervals = intervals or {}
+        users = self.sync_users()
+        if not users:
+            print("❌ No users found to schedule reminders")
+            return False
+        print(f"📅 Scheduled reminders for {len(users)} users every {hours:g} hours")
+        return True
+    
+    def sync_users(self):
+        """Add jobs for new users and drop removed ones; returns the current users."""
+        users = self.tenants.users()
+        for user in users:
+            if user not in self.scheduler:
+                self.scheduler.add(user, self.intervals.get(user, self.hours) * 3600)
+        for user in set(self.scheduler.names()) - set(users):
+            self.scheduler.remove(user)
+        return users
+    
+    def check_due_habits(self, users):
+        """Remind each due user about the habits they have not done today."""
+        if self.tenants.index_changed():
+            self.sync_users()
+        for user in users:
+            if user not in self.tenants:
+                continue
+            tracker = self.tenants.tracker(user)
+            tracker.reload()
+            for habit_name in tracker.today_index().pending:
+                self.send_notification(f"{habit_name} ({user})")
 
 def main():
     """Simple entry point - always runs in background."""
     print("🚀 Habit Tracker Notifications")
     
-    notifier = HabitNotifications('habits.json')
+    notifier = HabitNotifications(DATA_FILE)
     
     if not notifier.tracker.data:
         print("❌ No habits found. Add some habits first!")
@@ -0,0 +1,200 @@
+# Reminder scheduling
+import asyncio
+import heapq
+import inspect
+import itertools
+import math
+import threading
+import time
+
+
+class ReminderScheduler:
+    """Heap of reminder due times that sleeps until the next one is due.
+
+    There is no polling: the loop waits exactly until the earliest due
+    time (or until ``stop``/``add`` wakes it), then hands every reminder
+    due within ``coalesce`` seconds of it to ``callback`` in one call.
+    """
+
+    def __init__(self, callback, coalesce=1.0, clock=time.monotonic):
+        self.callback = callback
+        self.coalesce = coalesce
+        self.clock = clock
+        self.wakeups = 0
+        self._heap = []  # (due, seq, habit, generation)
+        self._jobs = {}  # habit -> (interval, generation)
+        self._seq = itertools.count()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, habit):
+        return habit in self._jobs
+
+    def names(self):
+        """Everything that currently has a reminder."""
+        return list(self._jobs)
+
+    def add(self, habit, interval, delay=None):
+        """Remind about ``habit`` every ``interval`` seconds, first after ``delay`` (default: one interval)."""
+        generation = next(self._seq)
+        self._jobs[habit] = (interval, generation)
+        due = self.clock() + (interval if delay is None else delay)
+        heapq.heappush(self._heap, (due, generation, habit, generation))
+        self._wakeup.set()
+
+    def remove(self, habit):
+        # Heap entries are dropped lazily when they reach the top
+        self._jobs.pop(habit, None)
+
+    def _discard_stale(self):
+        while self._heap:
+            _, _, habit, generation = self._heap[0]
+            job = self._jobs.get(habit)
+            if job is not None and job[1] == generation:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self):
+        """Monotonic time of the earliest reminder, or None when nothing is scheduled."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now=None):
+        """Fire everything due by ``now`` as one batch; returns the habits passed to the callback."""
+        now = self.clock() if now is None else now
+        due_habits = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now + self.coalesce:
+            due, _, habit, generation = heapq.heappop(self._heap)
+            interval = self._jobs[habit][0]
+            # Keep the cadence, but never queue up missed reminders
+            next_due = due + interval
+            if next_due <= now:
+                next_due = now + interval
+            heapq.heappush(self._heap, (next_due, next(self._seq), habit, generation))
+            due_habits.append(habit)
+            self._discard_stale()
+        if due_habits:
+            self.callback(due_habits)
+        return due_habits
+
+    def run(self):
+        """Block, firing reminders as they come due, until ``stop`` is called."""
+        self._stopped = False
+        while not self._stopped:
+            self._wakeup.clear()
+            due = self.next_due()
+            timeout = None if due is None else max(0.0, due - self.clock())
+            if timeout is None or timeout > 0:
+                if self._wakeup.wait(timeout):
+                    continue  # stopped or the schedule changed
+            self.wakeups += 1
+            self.run_due()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+
+class AsyncReminderScheduler:
+    """ReminderScheduler for an asyncio loop, with one loop timer per reminder.
+
+    It has the same add/remove/names interface, so code that fills a
+    ReminderScheduler works with either. Reminders added before the loop
+    runs are armed by ``start``. Due times are rounded up to a multiple of
+    ``coalesce``, so reminders in the same window fire in the same loop
+    iteration and reach ``callback`` together. ``callback`` may be a
+    coroutine function; its passes then run one at a time, and reminders
+    that fire during a pass are handed to the next one. Use it from the
+    loop's thread only.
+    """
+
+    def __init__(self, callback, coalesce=1.0):
+        self.callback = callback
+        self.coalesce = coalesce
+        self.wakeups = 0
+        self.loop = None
+        self._jobs = {}  # habit -> [interval, due, timer handle]
+        self._due = []
+        self._task = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, habit):
+        return habit in self._jobs
+
+    def names(self):
+        return list(self._jobs)
+
+    def _now(self):
+        # loop.time() is time.monotonic() unless the loop says otherwise
+        return self.loop.time() if self.loop is not None else time.monotonic()
+
+    def _arm(self, habit, due):
+        job = self._jobs[habit]
+        job[1] = due
+        if self.loop is not None:
+            when = math.ceil(due / self.coalesce) * self.coalesce if self.coalesce else due
+            job[2] = self.loop.call_at(when, self._fire, habit)
+
+    def add(self, habit, interval, delay=None):
+        """Remind about ``habit`` every ``interval`` seconds, first after ``delay`` (default: one interval)."""
+        self.remove(habit)
+        self._jobs[habit] = [interval, None, None]
+        self._arm(habit, self._now() + (interval if delay is None else delay))
+
+    def remove(self, habit):
+        job = self._jobs.pop(habit, None)
+        if job is not None and job[2] is not None:
+            job[2].cancel()
+
+    def next_due(self):
+        """Monotonic time of the earliest reminder, or None when nothing is scheduled."""
+        return min((job[1] for job in self._jobs.values()), default=None)
+
+    def _fire(self, habit):
+        interval, due, _ = self._jobs[habit]
+        # Keep the cadence, but never queue up missed reminders
+        next_due = due + interval
+        now = self._now()
+        if next_due <= now:
+            next_due = now + interval
+        self._arm(habit, next_due)
+        self._due.append(habit)
+        if self._task is None:
+            # The task first runs after every timer due in this iteration has fired
+            self._task = self.loop.create_task(self._run_passes())
+
+    async def _run_passes(self):
+        try:
+            while self._due:
+                habits, self._due = self._due, []
+                self.wakeups += 1
+                result = self.callback(habits)
+                if inspect.isawaitable(result):
+                    await result
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    def start(self, loop=None):
+        """Arm every reminder on ``loop`` (default: the running loop)."""
+        self.loop = loop or asyncio.get_running_loop()
+        for habit, job in self._jobs.items():
+            self._arm(habit, job[1])
+
+    def close(self):
+        """Cancel the timers and any pass in progress; reminders stay registered for a later ``start``."""
+        for job in self._jobs.values():
+            if job[2] is not None:
+                job[2].cancel()
+                job[2] = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._due = []
+        self.loop = None
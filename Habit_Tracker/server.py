@@ -0,0 +1,267 @@
+# Resident tracker behind a Unix socket, and the client the CLI uses to reach it
+import json
+import os
+import selectors
+import socket
+import time
+from contextlib import ExitStack
+from config import SOCKET_FILE
+
+MUTATIONS = ("add", "done", "remove")
+COMMANDS = MUTATIONS + ("list", "stats", "streak")
+
+
+class HabitServer:
+    """Keeps one HabitTracker loaded and answers CLI commands over a Unix socket.
+
+    Requests and replies are one JSON object per line, and a connection
+    may send any number of them. add/done/remove change the in-memory
+    data right away; the file is written once every ``flush_interval``
+    seconds with everything that changed since the last write, and again
+    on shutdown. The storage lock is held while writes are pending, so
+    processes that bypass the daemon wait for the flush instead of racing it.
+
+    With a ``notifier`` its reminders are fired from the same loop, so
+    the daemon replaces a separate ``notify`` process.
+    """
+
+    def __init__(self, tracker, storage="json", path=SOCKET_FILE, flush_interval=1.0,
+                 notifier=None, clock=time.monotonic):
+        self.tracker = tracker
+        self.storage = storage
+        self.file = os.path.abspath(tracker.file)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.notifier = notifier
+        self.clock = clock
+        self.selector = None
+        self.listener = None
+        self.flushes = 0
+        self._batch = None  # open tracker.batch() holding unwritten changes
+        self._flush_at = None
+        self._buffers = {}  # partial request lines per connection
+        self._stopped = False
+        self._wakeup = socket.socketpair()
+
+    # Commands
+
+    def handle(self, request):
+        """Carry out one request dict and return the reply dict."""
+        command = request.get("command")
+        if request.get("file", self.file) != self.file or request.get("storage", self.storage) != self.storage:
+            return {"error": f"This daemon serves {self.file} ({self.storage})."}
+        if command not in COMMANDS:
+            return {"error": f'Unknown command "{command}".'}
+        name = request.get("name")
+        if name is not None and not isinstance(name, str):
+            return {"error": "The habit name must be a string."}
+        if command in MUTATIONS or command == "streak":
+            if not name:
+                return {"error": f"{command} needs a habit name."}
+
+        if command in MUTATIONS:
+            self._begin()
+            result = self.tracker.apply_many([(command, name)])[0]
+            return {"result": result}
+
+        if self._batch is None:
+            # Pick up writes from processes that did not go through the daemon
+            self.tracker.reload()
+        if command == "list":
+            show = request.get("show")
+            if show in ("pending", "done"):
+                index = self.tracker.today_index()
+                return {"names": list(index.pending if show == "pending" else index.done)}
+            return {"names": self.tracker.habit_names()}
+        if command == "stats":
+            from analytics import habit_stats
+            return {"stats": habit_stats(self.tracker.history())}
+        if name not in self.tracker:
+            return {"streak": None}
+        ongoing, longest, last = self.tracker.streak(name)
+        return {"streak": [ongoing, longest, last and last.isoformat()]}
+
+    def _begin(self):
+        if self._batch is None:
+            stack = ExitStack()
+            stack.enter_context(self.tracker.batch())
+            self._batch = stack
+            self._flush_at = self.clock() + self.flush_interval
+
+    def flush(self):
+        """Write pending changes now; returns whether there were any."""
+        if self._batch is None:
+            return False
+        batch, self._batch, self._flush_at = self._batch, None, None
+        batch.close()
+        self.flushes += 1
+        return True
+
+    # Socket handling
+
+    def open(self):
+        """Load the data and start listening on ``path``."""
+        if connect(self.path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {self.path}.")
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a daemon that did not shut down cleanly
+        self.tracker.data
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ, self._accept)
+        self.selector.register(self._wakeup[0], selectors.EVENT_READ, self._woken)
+        return self
+
+    def _accept(self, listener):
+        conn, _ = listener.accept()
+        # Replies go out with a blocking send; reads only happen once select says so
+        conn.setblocking(True)
+        conn.settimeout(5.0)
+        self.selector.register(conn, selectors.EVENT_READ, self._read)
+        self._buffers[conn] = b""
+
+    def _read(self, conn):
+        try:
+            chunk = conn.recv(65536)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._drop(conn)
+            return
+        lines = (self._buffers[conn] + chunk).split(b"\n")
+        self._buffers[conn] = lines.pop()
+        try:
+            for line in lines:
+                if line.strip():
+                    conn.sendall(self._reply(line) + b"\n")
+        except OSError:
+            self._drop(conn)
+
+    def _reply(self, line):
+        try:
+            request = json.loads(line)
+            reply = self.handle(request) if isinstance(request, dict) else {"error": "Expected a JSON object."}
+        except ValueError as e:
+            reply = {"error": str(e)}
+        except Exception as e:
+            # A request that trips over a bug must not take the daemon down with it
+            reply = {"error": f"{type(e).__name__}: {e}"}
+        return json.dumps(reply).encode("utf-8")
+
+    def _drop(self, conn):
+        self._buffers.pop(conn, None)
+        self.selector.unregister(conn)
+        conn.close()
+
+    def _woken(self, sock):
+        sock.recv(1024)
+
+    def _timeout(self):
+        deadlines = []
+        if self._flush_at is not None:
+            deadlines.append(self._flush_at - self.clock())
+        if self.notifier is not None:
+            due = self.notifier.scheduler.next_due()
+            if due is not None:
+                deadlines.append(due - self.notifier.scheduler.clock())
+        return max(0.0, min(deadlines)) if deadlines else None
+
+    def serve_forever(self):
+        """Answer requests, flush and fire reminders until ``stop``; always flushes on the way out."""
+        if self.listener is None:
+            self.open()
+        if self.notifier is not None:
+            self.notifier.start_delivery()
+        try:
+            while not self._stopped:
+                for key, _ in self.selector.select(self._timeout()):
+                    key.data(key.fileobj)
+                if self._flush_at is not None and self.clock() >= self._flush_at:
+                    self.flush()
+                if self.notifier is not None:
+                    self.notifier.scheduler.run_due()
+        finally:
+            self.close()
+
+    def stop(self):
+        """Ask ``serve_forever`` to return; safe to call from another thread or a signal handler."""
+        self._stopped = True
+        self._wakeup[1].send(b"\0")
+
+    def close(self):
+        self.flush()
+        if self.notifier is not None:
+            self.notifier.close_delivery()
+        if self.selector is not None:
+            for key in list(self.selector.get_map().values()):
+                if key.fileobj is not self._wakeup[0]:
+                    key.fileobj.close()
+            self.selector.close()
+            self.selector = None
+        if self.listener is not None:
+            self.listener = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class Client:
+    """Connection to a running daemon; ``send`` one request dict, get the reply dict back."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+
+    def send(self, request):
+        self.sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        while b"\n" not in self.buffer:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("The daemon closed the connection.")
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(path=SOCKET_FILE, timeout=5.0):
+    """A Client for the daemon on ``path``, or None when none is listening there."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return Client(sock)
+
+
+def request(message, path=SOCKET_FILE, timeout=5.0):
+    """Send one request to the daemon; returns its reply, or None when it cannot be reached.
+
+    Every command is safe to repeat (adding an existing habit or marking
+    one done twice changes nothing), so callers simply fall back to doing
+    the work themselves on None.
+    """
+    client = connect(path, timeout)
+    if client is None:
+        return None
+    try:
+        with client:
+            return client.send(message)
+    except (OSError, ValueError):
+        return None
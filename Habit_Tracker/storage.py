@@ -0,0 +1,717 @@
+# Storage backends
+import json
+import os
+from contextlib import contextmanager
+from datetime import date
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from completions import Habit, to_ordinal, wrap
+from streaks import StreakIndex, compute_streak
+from timings import count_read, count_written
+
+
+def apply_event(data, event):
+    """Apply one add/done/remove event to the in-memory data."""
+    op, habit, date = event['op'], event['habit'], event.get('date')
+    if op == 'add':
+        data.setdefault(habit, Habit())
+    elif op == 'done':
+        if habit in data and date not in data[habit]:
+            data[habit].append(date)
+    elif op == 'remove':
+        data.pop(habit, None)
+
+
+def file_signature(file):
+    """(inode, size, mtime) of ``file``; changes whenever the file is replaced or appended to."""
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def _count_file(f):
+    count_read(os.fstat(f.fileno()).st_size)
+
+
+def atomic_write(path, write, binary=False):
+    """Call ``write(f)`` on a temp file, fsync it and rename it over ``path``.
+
+    Readers and a crash mid-write only ever see the old or the new file.
+    """
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb' if binary else 'w') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            count_written(f.tell())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on ``path`` for the duration of the block."""
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileStorage:
+    """Shared locking, atomic writes and streak sidecar for the file based storages.
+
+    load/save/record keep the whole history in one snapshot file, written
+    by ``_write_snapshot``; the journal overrides them. Writers hold ``<file>.lock`` around read-modify-write and replace files
+    atomically. ``changed()`` tells a holder of stale data that another
+    process has written since it last loaded.
+
+    The streak index lives in ``<file>.streaks`` together with the
+    signature of the data file it was computed from. A missing or stale
+    sidecar is rebuilt from the loaded history.
+    """
+
+    indexed = False
+    ranged = False  # can answer has_habit/completed_between without a full load
+    streaming = False  # indexed edits rewrite the whole file, so batches should load instead
+    archivable = True  # old years can move out to an Archive next to the file
+
+    def __init__(self, file):
+        self.file = file
+        self.streak_file = file + '.streaks'
+        self.lock_file = file + '.lock'
+        self.streaks = None
+        self._seen = None  # signature of the files when the caller's data was last read or written
+        self._streaks_seen = None  # the same for self.streaks, which streaming reads refresh on their own
+
+    def lock(self):
+        return file_lock(self.lock_file)
+
+    def _signature(self):
+        return file_signature(self.file)
+
+    def changed(self):
+        """Whether the files on disk differ from what this instance last read or wrote."""
+        return self._signature() != self._seen
+
+    def load(self):
+        seen = self._signature()
+        data = self._read_snapshot()
+        self.streaks = self._read_streaks(data)
+        self._seen = self._streaks_seen = seen
+        return data
+
+    def save(self, data):
+        self.streaks = StreakIndex.from_data(data)
+        self._write_snapshot(data)
+        self._seen = self._streaks_seen = self._signature()
+
+    def record(self, data, event):
+        """Persist one mutation. The whole file is rewritten."""
+        self.record_many(data, [event])
+
+    def record_many(self, data, events):
+        """Persist a batch of mutations with a single rewrite."""
+        if self.streaks is None:
+            self.streaks = StreakIndex.from_data(data)
+        else:
+            self.streaks.apply_many(events, data)
+        self._write_snapshot(data)
+        self._seen = self._streaks_seen = self._signature()
+
+    def _read_streaks(self, data):
+        try:
+            with open(self.streak_file, 'r') as f:
+                _count_file(f)
+                raw = json.load(f)
+            if raw['signature'] == file_signature(self.file):
+                return StreakIndex.from_json(raw['streaks'])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+        return self._build_streaks(data)
+
+    def _build_streaks(self, data):
+        return StreakIndex.from_data(data)
+
+    def _write_streaks(self):
+        signature = file_signature(self.file)
+        atomic_write(self.streak_file, lambda f: json.dump(
+            {'signature': signature, 'streaks': self.streaks.to_json()}, f))
+
+    def _read_snapshot(self):
+        try:
+            with open(self.file, 'r') as f:
+                _count_file(f)
+                return wrap(json.load(f))
+        except FileNotFoundError:
+            return {}
+
+    def _write_snapshot(self, data):
+        # Habits are written out as their lists of ISO dates
+        atomic_write(self.file, lambda f: json.dump(data, f, indent=4, default=list))
+        self._write_streaks()
+
+    def streak(self, habit):
+        return self.streaks.entries.get(habit)
+
+    def streak_entries(self):
+        return self.streaks.entries
+
+    def rebuild_streaks(self, data):
+        """Recompute the index from raw history; returns habits whose entry was wrong."""
+        mismatches = self.streaks.mismatches(data) if self.streaks else sorted(data)
+        self.streaks = StreakIndex.from_data(data)
+        self._write_streaks()
+        return mismatches
+
+
+class JsonStorage(FileStorage):
+    """Keep every habit in a single pretty-printed JSON file.
+
+    Once the file reaches ``stream_threshold`` bytes it is no longer
+    loaded whole for single-habit work. Lookups scan it with jsonstream
+    and parse only the habit asked for, and add/done/remove copy it habit
+    by habit, so memory stays bounded by the largest habit. Anything that
+    needs every habit (stats, reindex, batches) still loads it all.
+    """
+
+    stream_threshold = 8 * 1024 * 1024
+    streaming = True
+
+    @property
+    def indexed(self):
+        if self.stream_threshold is None:
+            return False
+        signature = file_signature(self.file)
+        return signature is not None and signature[1] >= self.stream_threshold
+
+    ranged = indexed
+
+    def __init__(self, file):
+        super().__init__(file)
+        if os.path.exists(file + '.log'):
+            # Ignoring the log would hide its events, and a later replay would undo our writes
+            raise ValueError(f'{file} has a journal log; open it with --storage journal.')
+
+    # Streaming access, used while the tracker has not loaded the file
+
+    def _scan(self):
+        """(habit, raw JSON) pairs read incrementally from the file."""
+        import jsonstream  # only streamed files need the scanner and its regexes
+        try:
+            f = open(self.file, 'r')
+        except FileNotFoundError:
+            return
+        with f:
+            try:
+                yield from jsonstream.Scanner(f)
+            finally:
+                count_read(f.tell())
+
+    def _find(self, habit):
+        for name, raw in self._scan():
+            if name == habit:
+                return raw
+        return None
+
+    def _dates(self, habit):
+        raw = self._find(habit)
+        return None if raw is None else Habit(json.loads(raw))
+
+    def habit_names(self):
+        return [habit for habit, _ in self._scan()]
+
+    def has_habit(self, habit):
+        return self._find(habit) is not None
+
+    def is_done(self, habit, date):
+        dates = self._dates(habit)
+        return None if dates is None else date in dates
+
+    def completed_between(self, habit, start, end):
+        dates = self._dates(habit)
+        return None if dates is None else dates.between(start, end)
+
+    def completion_counts(self):
+        return {habit: len(json.loads(raw)) for habit, raw in self._scan()}
+
+    def iter_completions(self):
+        for habit, raw in self._scan():
+            dates = json.loads(raw)
+            if not dates:
+                yield habit, None
+            for day in sorted(dates):
+                yield habit, day
+
+    def _fresh_streaks(self):
+        # Leaves _seen alone: a caller holding loaded data must still see the change
+        signature = self._signature()
+        if self.streaks is None or signature != self._streaks_seen:
+            self.streaks = self._read_streaks(None)
+            self._streaks_seen = signature
+        return self.streaks
+
+    def _build_streaks(self, data):
+        if data is None:
+            # Only one habit's history is held in memory at a time
+            return StreakIndex.from_items((habit, json.loads(raw)) for habit, raw in self._scan())
+        return super()._build_streaks(data)
+
+    def streak(self, habit):
+        return self._fresh_streaks().entries.get(habit)
+
+    def streak_entries(self):
+        return self._fresh_streaks().entries
+
+    def _rewrite(self, edit=None, append=()):
+        # Callers update self.streaks through _fresh_streaks() first
+        import jsonstream
+        atomic_write(self.file, lambda f: jsonstream.rewrite(self._scan(), f, edit, append))
+        self._write_streaks()
+        self._seen = self._streaks_seen = self._signature()
+
+    def add_habit(self, habit):
+        """Append a habit without loading the others; False if it already existed."""
+        if self.has_habit(habit):
+            return False
+        self._fresh_streaks().add(habit)
+        self._rewrite(append=[(habit, [])])
+        return True
+
+    def add_completion(self, habit, date):
+        """None if the habit is missing, False if already done on ``date``, else True."""
+        dates = self._dates(habit)
+        if dates is None:
+            return None
+        if date in dates:
+            return False
+        import jsonstream
+        dates.append(date)
+        self._fresh_streaks().record(habit, to_ordinal(date), dates)
+        self._rewrite(lambda name, raw: jsonstream.format_value(dates) if name == habit else raw)
+        return True
+
+    def remove_habit(self, habit):
+        if not self.has_habit(habit):
+            return False
+        self._fresh_streaks().remove(habit)
+        self._rewrite(lambda name, raw: None if name == habit else raw)
+        return True
+
+
+class BinaryStorage(FileStorage):
+    """Like JsonStorage, but the history is a bitmap per habit and year (see binformat).
+
+    A year of one habit takes 46 bytes however often it was done, and
+    calendar queries read the file memory-mapped, touching only the
+    directory and the bytes of the days they ask for.
+    """
+
+    ranged = True
+
+    def __init__(self, file):
+        import binformat  # only binary users pay for mmap and struct
+        super().__init__(file)
+        self._format = binformat
+        self._history = None  # (signature, HistoryFile) for the file on disk
+
+    def _read_snapshot(self):
+        try:
+            with open(self.file, 'rb') as f:
+                _count_file(f)
+                return self._format.decode(f.read())
+        except FileNotFoundError:
+            return {}
+
+    def _write_snapshot(self, data):
+        atomic_write(self.file, lambda f: f.write(self._format.encode(data)), binary=True)
+        self._write_streaks()
+
+    def _history_file(self):
+        signature = file_signature(self.file)
+        if signature is None:
+            return None
+        if self._history is None or self._history[0] != signature:
+            if self._history is not None:
+                self._history[1].close()
+            self._history = (signature, self._format.HistoryFile(self.file))
+        return self._history[1]
+
+    def habit_names(self):
+        history = self._history_file()
+        return list(history.directory) if history else []
+
+    def has_habit(self, habit):
+        history = self._history_file()
+        return history is not None and habit in history.directory
+
+    def completed_between(self, habit, start, end):
+        """Completed dates from ``start`` to ``end`` inclusive; None if the habit is missing."""
+        history = self._history_file()
+        if history is None or habit not in history.directory:
+            return None
+        return history.between(habit, start, end)
+
+
+class JournalStorage(FileStorage):
+    """Snapshot file plus an append-only log of add/done/remove events.
+
+    Each mutation appends one line to ``<file>.log``. Once the log holds
+    ``compact_every`` events it is folded into the snapshot and truncated.
+    The streak sidecar matches the snapshot; the log tail is replayed into
+    both on load.
+    """
+
+    def __init__(self, file, compact_every=1000):
+        super().__init__(file)
+        self.log_file = file + '.log'
+        self.compact_every = compact_every
+        self.pending = 0
+
+    def _signature(self):
+        return [file_signature(self.file), file_signature(self.log_file)]
+
+    def load(self):
+        seen = self._signature()
+        data = self._read_snapshot()
+        self.streaks = self._read_streaks(data)
+        self.pending = 0
+        try:
+            with open(self.log_file, 'r') as f:
+                _count_file(f)
+                events = []
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted append
+                        break
+                    apply_event(data, event)
+                    events.append(event)
+            self.streaks.apply_many(events, data)
+            self.pending = len(events)
+        except FileNotFoundError:
+            pass
+        self._seen = seen
+        return data
+
+    def _compact(self, data):
+        self._write_snapshot(data)
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+        self.pending = 0
+        self._seen = self._signature()
+
+    def save(self, data):
+        """Write a fresh snapshot and drop the log it replaces."""
+        self.streaks = StreakIndex.from_data(data)
+        self._compact(data)
+
+    def record(self, data, event):
+        self.record_many(data, [event])
+
+    def record_many(self, data, events):
+        """Append a batch of events with a single write."""
+        if self.streaks is None:
+            self.streaks = StreakIndex.from_data(data)
+        else:
+            self.streaks.apply_many(events, data)
+        with open(self.log_file, 'a') as f:
+            count_written(f.write(''.join(json.dumps(event) + '\n' for event in events)))
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += len(events)
+        self._seen = self._signature()
+        if self.pending >= self.compact_every:
+            self._compact(data)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS completions (
+    habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    PRIMARY KEY (habit_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS streaks (
+    habit_id INTEGER PRIMARY KEY REFERENCES habits(id) ON DELETE CASCADE,
+    current INTEGER NOT NULL,
+    longest INTEGER NOT NULL,
+    last INTEGER
+);
+"""
+
+
+class SqliteStorage:
+    """SQLite database with completions indexed on (habit_id, date).
+
+    Besides full load/save it answers single-habit questions with one
+    indexed query, so callers never have to load every habit.
+    """
+
+    indexed = True
+    ranged = True
+    streaming = False
+    archivable = False  # old rows cost nothing until queried, so there is nothing to move out
+
+    def __init__(self, file):
+        import sqlite3  # only SQLite users pay for the import
+        self.file = file
+        # Write-behind flushes from its own thread; HabitTracker serialises those writes
+        self.conn = sqlite3.connect(file, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        self._depth = 0
+        self._data_version = None
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Commit once when the outermost transaction block exits."""
+        self._depth += 1
+        try:
+            if self._depth == 1:
+                with self.conn:
+                    self.conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+                    yield
+            else:
+                yield
+        finally:
+            self._depth -= 1
+
+    def lock(self):
+        # SQLite does its own locking; IMMEDIATE takes the write lock before reading
+        return self.transaction(immediate=True)
+
+    def changed(self):
+        """Whether another connection has committed since this one last looked."""
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        changed, self._data_version = version != self._data_version, version
+        return changed
+
+    def load(self):
+        data = {}
+        with self.transaction():  # one snapshot for both queries
+            self.changed()
+            for (name,) in self.conn.execute('SELECT name FROM habits ORDER BY id'):
+                data[name] = []
+            rows = self.conn.execute(
+                'SELECT h.name, c.date FROM completions c JOIN habits h ON h.id = c.habit_id '
+                'ORDER BY c.habit_id, c.date')
+            for name, date in rows:
+                data[name].append(date)
+        return data
+
+    def save(self, data):
+        with self.transaction():
+            self.conn.execute('DELETE FROM habits')
+            for habit, dates in data.items():
+                habit_id = self.conn.execute(
+                    'INSERT INTO habits (name) VALUES (?)', (habit,)).lastrowid
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO completions VALUES (?, ?)',
+                    [(habit_id, date) for date in dates])
+                self.conn.execute('INSERT INTO streaks VALUES (?, ?, ?, ?)',
+                                  (habit_id, *compute_streak(Habit(dates).ordinals())))
+
+    def record(self, data, event):
+        op, habit = event['op'], event['habit']
+        if op == 'add':
+            self.add_habit(habit)
+        elif op == 'done':
+            self.add_completion(habit, event['date'])
+        elif op == 'remove':
+            self.remove_habit(habit)
+
+    def record_many(self, data, events):
+        with self.transaction():
+            for event in events:
+                self.record(data, event)
+
+    def habit_names(self):
+        return [name for (name,) in self.conn.execute('SELECT name FROM habits ORDER BY id')]
+
+    def has_habit(self, habit):
+        return self.conn.execute('SELECT 1 FROM habits WHERE name = ?', (habit,)).fetchone() is not None
+
+    def add_habit(self, habit):
+        """Insert a habit; False if it already existed."""
+        with self.transaction():
+            cur = self.conn.execute('INSERT OR IGNORE INTO habits (name) VALUES (?)', (habit,))
+            if cur.rowcount == 1:
+                self.conn.execute('INSERT INTO streaks VALUES (?, 0, 0, NULL)', (cur.lastrowid,))
+        return cur.rowcount == 1
+
+    def remove_habit(self, habit):
+        """Delete a habit and its completions; False if it did not exist."""
+        with self.transaction():
+            cur = self.conn.execute('DELETE FROM habits WHERE name = ?', (habit,))
+        return cur.rowcount == 1
+
+    def add_completion(self, habit, date):
+        """Record a completion. None if the habit is missing, False if already recorded."""
+        with self.transaction():
+            cur = self.conn.execute(
+                'INSERT OR IGNORE INTO completions SELECT id, ? FROM habits WHERE name = ?',
+                (date, habit))
+            if cur.rowcount == 1:
+                self._update_streak(habit, date)
+                return True
+        return None if not self.has_habit(habit) else False
+
+    def add_completions(self, habit, dates):
+        """Record many completions in one statement. None if the habit is missing, else how many were new."""
+        with self.transaction():
+            row = self.conn.execute('SELECT id FROM habits WHERE name = ?', (habit,)).fetchone()
+            if row is None:
+                return None
+            added = self.conn.executemany(
+                'INSERT OR IGNORE INTO completions VALUES (?, ?)', [(row[0], date) for date in dates]).rowcount
+            if added:
+                # Backfilled days can change any part of the streak; recompute it once
+                self.conn.execute('INSERT OR REPLACE INTO streaks VALUES (?, ?, ?, ?)',
+                                  (row[0], *self._compute_streak(row[0])))
+        return added
+
+    def _compute_streak(self, habit_id):
+        dates = [date for (date,) in self.conn.execute(
+            'SELECT date FROM completions WHERE habit_id = ? ORDER BY date', (habit_id,))]
+        return compute_streak(Habit(dates).ordinals())
+
+    def _update_streak(self, habit, date):
+        habit_id, current, longest, last = self.conn.execute(
+            'SELECT h.id, s.current, s.longest, s.last FROM habits h '
+            'LEFT JOIN streaks s ON s.habit_id = h.id WHERE h.name = ?', (habit,)).fetchone()
+        day = to_ordinal(date)
+        if current is None or (last is not None and day < last):
+            # No row yet (pre-streak database) or a backfilled day: recompute this habit
+            entry = self._compute_streak(habit_id)
+        else:
+            index = StreakIndex({habit: [current, longest, last]})
+            index.record(habit, day)
+            entry = index.entries[habit]
+        self.conn.execute('INSERT OR REPLACE INTO streaks VALUES (?, ?, ?, ?)', (habit_id, *entry))
+
+    def streak(self, habit):
+        row = self.conn.execute(
+            'SELECT h.id, s.current, s.longest, s.last FROM habits h '
+            'LEFT JOIN streaks s ON s.habit_id = h.id WHERE h.name = ?', (habit,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is None:
+            return self._compute_streak(row[0])
+        return list(row[1:])
+
+    def streak_entries(self):
+        rows = self.conn.execute(
+            'SELECT h.id, h.name, s.current, s.longest, s.last FROM habits h '
+            'LEFT JOIN streaks s ON s.habit_id = h.id ORDER BY h.id').fetchall()
+        return {name: self._compute_streak(habit_id) if current is None else [current, longest, last]
+                for habit_id, name, current, longest, last in rows}
+
+    def rebuild_streaks(self, data):
+        """Recompute the streaks table from raw history; returns habits whose row was wrong."""
+        stored = dict((name, [current, longest, last]) for name, current, longest, last in self.conn.execute(
+            'SELECT h.name, s.current, s.longest, s.last FROM habits h JOIN streaks s ON s.habit_id = h.id'))
+        mismatches = StreakIndex(stored).mismatches(data)
+        fresh = StreakIndex.from_data(data).entries
+        with self.transaction():
+            self.conn.execute('DELETE FROM streaks')
+            self.conn.executemany(
+                'INSERT INTO streaks SELECT id, ?, ?, ? FROM habits WHERE name = ?',
+                [(*entry, habit) for habit, entry in fresh.items()])
+        return mismatches
+
+    def is_done(self, habit, date):
+        """Whether ``habit`` was completed on ``date``; None if the habit is missing."""
+        row = self.conn.execute(
+            'SELECT EXISTS (SELECT 1 FROM completions c WHERE c.habit_id = h.id AND c.date = ?) '
+            'FROM habits h WHERE h.name = ?', (date, habit)).fetchone()
+        return None if row is None else bool(row[0])
+
+    def completed_between(self, habit, start, end):
+        """Completed dates from ``start`` to ``end`` inclusive; None if the habit is missing."""
+        if not self.has_habit(habit):
+            return None
+        rows = self.conn.execute(
+            'SELECT c.date FROM completions c JOIN habits h ON h.id = c.habit_id '
+            'WHERE h.name = ? AND c.date BETWEEN ? AND ? ORDER BY c.date',
+            (habit, start.isoformat(), end.isoformat()))
+        return [date.fromisoformat(day) for (day,) in rows]
+
+    def iter_completions(self):
+        """(habit, date) rows straight off a cursor; (habit, None) for a habit without completions."""
+        return iter(self.conn.execute(
+            'SELECT h.name, c.date FROM habits h LEFT JOIN completions c ON c.habit_id = h.id '
+            'ORDER BY h.id, c.date'))
+
+    def completion_counts(self):
+        rows = self.conn.execute(
+            'SELECT h.name, COUNT(c.date) FROM habits h '
+            'LEFT JOIN completions c ON c.habit_id = h.id GROUP BY h.id ORDER BY h.id')
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(json_file, db_file, force=False):
+    """Copy an existing habits.json into a SQLite database. Returns the habit count."""
+    return convert(json_file, 'json', db_file, 'sqlite', force=force)
+
+
+def convert(source, source_kind, target, target_kind, force=False):
+    """Copy every habit from one storage into another. Returns the habit count.
+
+    Archived years of the source are copied too, into the target's live
+    data. A target that already holds habits or an archive would be
+    overwritten, so it is refused unless ``force`` is set.
+    """
+    from tracker import HabitTracker  # the tracker joins the live data with the archive
+    data = HabitTracker(source, storage=source_kind).history()
+    storage = make_storage(target, target_kind)
+    stale = target + '.archive'
+    if not force and (storage.load() or os.path.exists(stale)):
+        raise ValueError(f'{target} already has habits; use --force to overwrite them.')
+    if os.path.exists(stale):
+        import shutil
+        shutil.rmtree(stale)  # would otherwise be read back as part of the new history
+    storage.save(data)
+    return len(data)
+
+
+STORAGES = {
+    'json': JsonStorage,
+    'journal': JournalStorage,
+    'sqlite': SqliteStorage,
+    'binary': BinaryStorage,
+}
+
+
+def make_storage(file, kind='json'):
+    """Build the storage backend registered under ``kind``."""
+    try:
+        return STORAGES[kind](file)
+    except KeyError:
+        raise ValueError(f'Unknown storage "{kind}".')
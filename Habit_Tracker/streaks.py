@@ -0,0 +1,153 @@
+# Streak index
+from datetime import date
+from completions import Habit, to_ordinal
+
+
+def compute_streak(days):
+    """[current, longest, last] for a sorted list of unique day ordinals.
+
+    ``current`` is the run that ends on the last completion; whether it is
+    still ongoing depends on today and is decided when the entry is read.
+    """
+    if not days:
+        return [0, 0, None]
+    longest = current = 1
+    for i in range(1, len(days)):
+        if days[i] == days[i - 1] + 1:
+            current += 1
+            longest = max(longest, current)
+        else:
+            current = 1
+    return [current, longest, days[-1]]
+
+
+def join_streaks(earlier, days):
+    """Entry for a history made of ``earlier`` (an entry) followed by sorted day ordinals ``days``.
+
+    Lets an archived summary be combined with live days without reading
+    the archived dates. Returns None when ``days`` reach back to or before
+    the earlier last completion, since that needs the full history.
+    """
+    current, longest, last = earlier
+    if not days:
+        return list(earlier)
+    if last is not None and days[0] <= last:
+        return None
+    live_current, live_longest, live_last = compute_streak(days)
+    lead = 1
+    while lead < len(days) and days[lead] == days[lead - 1] + 1:
+        lead += 1
+    joined = current + lead if last is not None and days[0] == last + 1 else 0
+    if joined and lead == len(days):
+        live_current = joined  # the whole live history continues the earlier run
+    return [live_current, max(longest, live_longest, joined), live_last]
+
+
+def _ordinals(dates):
+    if not isinstance(dates, Habit):
+        dates = Habit(dates)
+    return dates.ordinals()
+
+
+class StreakIndex:
+    """Current streak, longest streak and last completion for every habit."""
+
+    def __init__(self, entries=None):
+        # habit -> [current, longest, last completion as a day ordinal or None]
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls.from_items(data.items())
+
+    @classmethod
+    def from_items(cls, items):
+        """Build from ``(habit, dates)`` pairs, which may be streamed one habit at a time."""
+        return cls({habit: compute_streak(_ordinals(dates)) for habit, dates in items})
+
+    @classmethod
+    def from_json(cls, raw):
+        return cls({habit: [current, longest, to_ordinal(last) if last else None]
+                    for habit, (current, longest, last) in raw.items()})
+
+    def to_json(self):
+        return {habit: [current, longest, date.fromordinal(last).isoformat() if last else None]
+                for habit, (current, longest, last) in self.entries.items()}
+
+    def add(self, habit):
+        self.entries.setdefault(habit, [0, 0, None])
+
+    def remove(self, habit):
+        self.entries.pop(habit, None)
+
+    def record(self, habit, day, dates=()):
+        """Account for a new completion of ``habit`` on day ordinal ``day``.
+
+        Completions later than the last one are O(1). A backfilled day in
+        the past recomputes the habit from ``dates``.
+        """
+        current, longest, last = self.entries.get(habit, [0, 0, None])
+        if last is None or day > last + 1:
+            current = 1
+        elif day == last + 1:
+            current += 1
+        elif day != last:
+            self.entries[habit] = compute_streak(_ordinals(dates))
+            return
+        self.entries[habit] = [current, max(longest, current), day]
+
+    def apply(self, event, data):
+        """Keep the index in step with one add/done/remove event."""
+        op, habit = event['op'], event['habit']
+        if op == 'add':
+            self.add(habit)
+        elif op == 'done':
+            if habit in data:
+                self.record(habit, to_ordinal(event['date']), data[habit])
+        elif op == 'remove':
+            self.remove(habit)
+
+    def apply_many(self, events, data):
+        """``apply`` for a batch of events, with ``data`` already holding all of them.
+
+        A habit that gets backfilled days is recomputed once at the end
+        instead of once per event, so importing old history stays linear.
+        """
+        stale = set()
+        for event in events:
+            habit = event['habit']
+            if event['op'] == 'done' and habit in data:
+                if habit in stale:
+                    continue
+                day = to_ordinal(event['date'])
+                last = self.entries.get(habit, [0, 0, None])[2]
+                if last is not None and day < last:
+                    stale.add(habit)
+                    continue
+                self.record(habit, day)
+            else:
+                self.apply(event, data)
+        for habit in stale:
+            if habit in data:
+                self.entries[habit] = compute_streak(_ordinals(data[habit]))
+
+    def get(self, habit, today=None):
+        """(ongoing streak, longest streak, last completion date) or None if unknown."""
+        entry = self.entries.get(habit)
+        if entry is None:
+            return None
+        return streak_view(entry, today)
+
+    def mismatches(self, data):
+        """Habits whose entry differs from what the raw history says."""
+        fresh = StreakIndex.from_data(data).entries
+        names = set(fresh) | set(self.entries)
+        return sorted(habit for habit in names if fresh.get(habit) != self.entries.get(habit))
+
+
+def streak_view(entry, today=None):
+    """Turn a stored [current, longest, last] entry into what callers display."""
+    current, longest, last = entry
+    today = (today or date.today()).toordinal()
+    ongoing = current if last is not None and last >= today - 1 else 0
+    return ongoing, longest, date.fromordinal(last) if last else None
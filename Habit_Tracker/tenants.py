@@ -0,0 +1,106 @@
+# Per-user data shards
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from storage import atomic_write, file_lock, file_signature
+from tracker import HabitTracker
+
+
+def shard_name(user, storage='json'):
+    """Stable relative path for a user's shard: a hashed bucket, then a readable file name."""
+    digest = hashlib.sha1(user.encode('utf-8')).hexdigest()
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', user)[:40]
+    extension = {'sqlite': 'db', 'binary': 'bin'}.get(storage, 'json')
+    return os.path.join(digest[:2], f'{slug}-{digest[:8]}.{extension}')
+
+
+class TenantStore:
+    """Every user's habits in their own shard file, found through ``index.json``.
+
+    The index only maps user names to shard paths, so opening one user
+    reads the index and that user's shard and nothing else. Trackers are
+    opened on demand and at most ``max_open`` are kept in memory.
+    """
+
+    def __init__(self, root, storage='json', max_open=64):
+        self.root = root
+        self.storage = storage
+        self.max_open = max_open
+        self.index_file = os.path.join(root, 'index.json')
+        self._index = {}
+        self._seen = None
+        self._trackers = OrderedDict()
+
+    def _read_index(self):
+        signature = file_signature(self.index_file)
+        if signature != self._seen:
+            try:
+                with open(self.index_file, 'r') as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {}
+            self._seen = signature
+        return self._index
+
+    def index_changed(self):
+        """Whether another process added or removed users since the index was read."""
+        return file_signature(self.index_file) != self._seen
+
+    def users(self):
+        return sorted(self._read_index())
+
+    def __contains__(self, user):
+        return user in self._read_index()
+
+    def shard_path(self, user, create=False):
+        """Absolute path of ``user``'s shard, registering the user first when ``create`` is set."""
+        shard = self._read_index().get(user)
+        if shard is None:
+            shard = shard_name(user, self.storage)
+            if create:
+                self._update_index(user, shard)
+        return os.path.join(self.root, shard)
+
+    def _update_index(self, user, shard):
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(self.index_file + '.lock'):
+            self._seen = None
+            index = dict(self._read_index())
+            if shard is None:
+                index.pop(user, None)
+            else:
+                index[user] = shard
+            atomic_write(self.index_file, lambda f: json.dump(index, f, indent=4, sort_keys=True))
+            self._index, self._seen = index, file_signature(self.index_file)
+
+    def remove_user(self, user):
+        """Drop ``user`` from the index; their shard file is left on disk."""
+        if user not in self:
+            return False
+        self._trackers.pop(user, None)
+        self._update_index(user, None)
+        return True
+
+    def tracker(self, user, create=False):
+        """HabitTracker for ``user``'s shard, reusing one that is already open.
+
+        Only ``create`` makes directories or files; without it a user who
+        is not in the index is a ValueError, so nothing can be written
+        for them by accident.
+        """
+        if not create and user not in self:
+            self._trackers.pop(user, None)
+            raise ValueError(f'Unknown user "{user}".')
+        path = self.shard_path(user, create=create)
+        tracker = self._trackers.get(user)
+        if tracker is not None:
+            self._trackers.move_to_end(user)
+            return tracker
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tracker = HabitTracker(path, storage=self.storage, user=user)
+        self._trackers[user] = tracker
+        if len(self._trackers) > self.max_open:
+            self._trackers.popitem(last=False)
+        return tracker
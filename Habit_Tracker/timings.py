@@ -0,0 +1,118 @@
+# Per-phase timing for --timings and --profile
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+PHASES = ('load', 'compute', 'render', 'save')
+
+# The Timings being collected, or None; everything below is a no-op then
+active = None
+
+
+class Timings:
+    """Exclusive wall time per phase plus bytes moved to and from disk.
+
+    Phases nest: time spent in an inner phase (a load triggered while
+    computing, say) is counted there and not in the outer one.
+    """
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.started = time.perf_counter()
+        self.total = None
+        self.peak_memory = None
+        self._stack = []  # [phase, start, time spent in nested phases]
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def report(self):
+        total = self.total if self.total is not None else time.perf_counter() - self.started
+        rows = dict(self.phases)
+        # Imports, argument parsing and anything not inside a phase
+        rows['other'] = max(0.0, total - sum(rows.values()))
+        lines = [f"{'phase':<8} {'ms':>10} {'share':>6}"]
+        for name, seconds in rows.items():
+            lines.append(f"{name:<8} {seconds * 1000:10.1f} {seconds / total if total else 0:6.0%}")
+        lines.append(f"{'total':<8} {total * 1000:10.1f}")
+        memory = f", peak memory {self.peak_memory / 1e6:.1f} MB" if self.peak_memory else ""
+        lines.append(f"read {self.bytes_read / 1e3:.1f} kB, written {self.bytes_written / 1e3:.1f} kB{memory}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def phase(name):
+    """Attribute the time spent in the block to ``name``."""
+    if active is None:
+        yield
+        return
+    timings = active
+    timings.enter(name)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def timed(name):
+    """Decorator form of ``phase``."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return function(*args, **kwargs)
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_read(size):
+    if active is not None:
+        active.bytes_read += size
+
+
+def count_written(size):
+    if active is not None:
+        active.bytes_written += size
+
+
+def _peak_memory():
+    """Peak resident set size in bytes, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def session(profile=None):
+    """Collect timings for the block; with ``profile`` also dump cProfile stats to that file."""
+    global active
+    active = timings = Timings()
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield timings
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        timings.total = time.perf_counter() - timings.started
+        timings.peak_memory = _peak_memory()
+        active = None
@@ -1,51 +1,502 @@
 # Core logic
-import json 
-from datetime import datetime
+import atexit
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from storage import apply_event, make_storage
+from completions import Habit, wrap
+from streaks import compute_streak, join_streaks, streak_view
+from timings import phase, timed
+
+def parse_operation(text):
+    """Split "done gym" or "done:gym" into ('done', 'gym')."""
+    op, sep, habit = text.strip().partition(':')
+    if not sep or ' ' in op:
+        op, _, habit = text.strip().partition(' ')
+    return op.strip(), habit.strip()
 
 class HabitTracker:
-    def __init__(self, file='data.json'):
+    def __init__(self, file='data.json', storage='json', user=None):
         self.file = file
-        self.data = self.load_data()
+        self.user = user  # tenant this tracker's shard belongs to, if any
+        if isinstance(storage, str):
+            storage = make_storage(file, storage)
+        self.storage = storage
+        self._data = None
+        self._pending = None  # events held back while inside batch() or in write-behind mode
+        self._write_behind = None  # WriteBehind flusher while in write-behind mode
+        self._archive = None  # Archive, False once known to be absent, None before looking
+        self._today = None  # DayIndex of today's pending and done habits, built on first use
+
+    @property
+    def data(self):
+        # Loaded on first use so indexed storages can answer without a full load
+        if self._data is None:
+            self._data = wrap(self.load_data())
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = wrap(value)
+        self._today = None
+
+    def _use_index(self):
+        return self._data is None and self.storage.indexed
 
+    def _use_ranges(self):
+        # Storages that can read part of one habit's history without a full load
+        return self._data is None and self.storage.ranged
+
+    @timed('load')
     def load_data(self):
-        try:
-            with open(self.file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-    
+        return self.storage.load()
+
+    def reload(self):
+        """Re-read the data if the storage changed since it was last read; returns whether it did.
+
+        File storages compare the file's inode, size and mtime, so an
+        unchanged file costs one stat instead of a full parse.
+        """
+        if self._write_behind is not None:
+            self.flush()  # merges our held-back changes with the other process's
+        if self._data is None:
+            if self._today is not None and self.storage.changed():
+                self._today = None  # answered from the storage, which another process wrote to
+            return False
+        if not self.storage.changed():
+            return False
+        self.data = self.load_data()
+        self._archive = None  # another process may have archived since
+        return True
+
+    @property
+    def archive(self):
+        """Cold history moved out by ``archive_old``, or None if there is none."""
+        if self._archive is None:
+            from archive import Archive  # gzip and the segment code only load when an archive is looked for
+            self._archive = self.storage.archivable and Archive.open(self.file) or False
+        return self._archive or None
+
+    def archive_old(self, keep_years=1, today=None):
+        """Move completions from before January 1st ``keep_years`` years ago into per-year archive segments.
+
+        The live file then only holds the current and the last ``keep_years``
+        years, whatever the length of the history. Returns how many
+        completions moved.
+        """
+        if not self.storage.archivable:
+            raise ValueError('This storage keeps all history in place and cannot be archived.')
+        from archive import Archive, horizon_for
+        horizon = horizon_for(keep_years, today)
+        if horizon > (today or date.today()):
+            raise ValueError(f'Cannot archive up to {horizon}, which is after today.')
+        archive = self.archive or Archive(self.file)
+        with self.batch(), phase('save'):
+            moved = archive.move(self.data, horizon)
+            if moved:
+                self.storage.save(self.data)
+        self._archive = archive
+        return moved
+
+    def history(self):
+        """Every habit's complete history, archived years included; reads every archive segment."""
+        archive = self.archive
+        if archive is None:
+            return self.data
+        history = {}
+        for habit, dates in self.data.items():
+            if habit not in archive:
+                history[habit] = dates
+                continue
+            archived, live = archive.ordinals(habit), dates.ordinals()
+            if not archived or not live or archived[-1] < live[0]:
+                days = archived + live  # the usual case: archived years come strictly before the live ones
+            else:
+                days = sorted(set(archived) | set(live))
+            history[habit] = Habit.from_ordinals(days)
+            history[habit].extra = dates.extra
+        return history
+
+    @timed('save')
     def save_data(self):
-        with open(self.file, 'w') as f:
-            json.dump(self.data, f, indent=4)
-    
-    def add_habit(self, habit):
+        with self.storage.lock():
+            self.storage.save(self.data)
+
+    def compact(self):
+        """Fold any pending log events into a fresh snapshot."""
+        with self.batch(), phase('save'):
+            self.storage.save(self.data)
+
+    def _record(self, op, habit, date=None):
+        event = {'op': op, 'habit': habit}
+        if date is not None:
+            event['date'] = date
+        if self._pending is not None:
+            self._pending.append(event)
+        else:
+            with phase('save'):
+                self.storage.record(self.data, event)
+
+    @contextmanager
+    def batch(self):
+        """Apply mutations in memory and persist them together on exit.
+
+        The storage lock is held for the whole read-modify-write, and data
+        that another process changed since we loaded it is reloaded first.
+        In write-behind mode changes are only held in memory for the flusher.
+        """
+        write_behind = self._write_behind
+        if write_behind is not None:
+            write_behind.lock.acquire()
+            if self._write_behind is write_behind:
+                try:
+                    yield
+                finally:
+                    write_behind.changed(len(self._pending))
+                    write_behind.lock.release()
+                return
+            write_behind.lock.release()  # stopped while we waited; write synchronously below
+        if self._pending is not None:
+            yield
+            return
+        with self.storage.lock():
+            if self._data is not None and self.storage.changed():
+                self.data = self.load_data()
+            self._pending = []
+            try:
+                yield
+            finally:
+                events, self._pending = self._pending, None
+                if events:
+                    with phase('save'):
+                        self.storage.record_many(self.data, events)
+
+    def start_write_behind(self, flush_interval=0.5, max_pending=1000):
+        """Keep mutations in memory and persist them from a background thread.
+
+        Changes are written once the oldest is ``flush_interval`` seconds
+        old or ``max_pending`` have piled up, in one write like a batch().
+        ``flush`` writes them at once and ``stop_write_behind`` writes the
+        rest and returns to writing every change; it also runs at
+        interpreter exit. Safe to mutate from several threads meanwhile.
+        """
+        if self._write_behind is not None:
+            return self._write_behind
+        if self._pending is not None:
+            raise RuntimeError('Write-behind cannot start inside batch().')
+        self.data  # mutations must change the loaded data rather than go straight to the storage
+        self._pending = []
+        from writebehind import WriteBehind  # threading is only needed in write-behind mode
+        self._write_behind = WriteBehind(self.flush, flush_interval, max_pending).start()
+        atexit.register(self.stop_write_behind)
+        return self._write_behind
+
+    def stop_write_behind(self):
+        """Write whatever is still held back and go back to synchronous writes.
+
+        If that write fails the changes stay held and the error propagates,
+        so calling this again retries.
+        """
+        write_behind = self._write_behind
+        if write_behind is None:
+            return
+        write_behind.close()
+        with write_behind.lock:
+            self.flush()
+            self._write_behind = None
+            self._pending = None
+        atexit.unregister(self.stop_write_behind)
+
+    @contextmanager
+    def write_behind(self, flush_interval=0.5, max_pending=1000):
+        """``start_write_behind`` for the block; everything is on disk once it exits."""
+        self.start_write_behind(flush_interval, max_pending)
+        try:
+            yield self
+        finally:
+            self.stop_write_behind()
+
+    def flush(self):
+        """Write the changes held back by write-behind now; returns how many there were.
+
+        If another process wrote meanwhile, its data is loaded and our
+        changes are replayed on top, so neither side's changes are lost.
+        """
+        write_behind = self._write_behind
+        if write_behind is None:
+            return 0
+        with write_behind.lock:
+            events, self._pending = self._pending, []
+            try:
+                if events:
+                    with self.storage.lock():
+                        if self.storage.changed():
+                            data = wrap(self.load_data())
+                            for event in events:
+                                apply_event(data, event)
+                            self.data = data
+                        with phase('save'):
+                            self.storage.record_many(self.data, events)
+            except BaseException:
+                self._pending[:0] = events  # kept for the next attempt
+                raise
+            write_behind.flushed(len(events))
+            return len(events)
+
+    def apply_many(self, operations):
+        """Apply (op, habit) pairs with a single write; returns each operation's message."""
+        actions = {'add': self.add_habit, 'done': self.mark_as_done, 'remove': self.remove_habit}
+        for op, habit in operations:
+            if op not in actions:
+                raise ValueError(f'Unknown operation "{op}".')
+        with self.batch():
+            if len(operations) > 1 and self.storage.streaming and self._use_index():
+                self.data  # load once and write once rather than rewrite the file per operation
+            return [actions[op](habit) for op, habit in operations]
+
+    def _add(self, habit):
+        if self._use_index():
+            with phase('save'):
+                return self.storage.add_habit(habit)
+        if habit in self.data:
+            return False
+        self.data[habit] = Habit()
+        self._record('add', habit)
+        return True
+
+    def _mark(self, habit, date):
+        if self._use_index():
+            with phase('save'):
+                return self.storage.add_completion(habit, date)
+        if habit not in self.data:
+            return None
+        if date in self.data[habit]:
+            return False
+        self.data[habit].append(date)
+        self._record('done', habit, date)
+        return True
+
+    def _remove(self, habit):
+        if self._use_index():
+            with phase('save'):
+                return self.storage.remove_habit(habit)
+        if habit not in self.data:
+            return False
+        del self.data[habit]
+        self._record('remove', habit)
+        return True
+
+    def mark_many(self, habit, dates):
+        """Record completions of ``habit`` on any number of past or future ``dates`` with one write.
+
+        ``dates`` are 'YYYY-MM-DD' strings, dates or datetimes (whose time
+        is dropped); ones already recorded are skipped. Returns how many
+        were new, or None if the habit does not exist.
+        """
+        # Rebuilt as a plain date so a datetime does not keep its time in isoformat()
+        days = sorted({date(day.year, day.month, day.day).isoformat() if isinstance(day, date)
+                       else date.fromisoformat(day).isoformat() for day in dates})
+        with self.batch():
+            added = self._mark_many(habit, days)
+        if added is not None and self._today is not None and self._today.day in days:
+            self._today.mark(habit, self._today.day)
+        return added
+
+    def _mark_many(self, habit, days):
+        if self._use_index():
+            if not self.storage.streaming:
+                with phase('save'):
+                    return self.storage.add_completions(habit, days)
+            self.data  # one load instead of a file rewrite per day
         if habit not in self.data:
-            self.data[habit] = []
-            self.save_data()
+            return None
+        history = self.data[habit]
+        last = history[-1] if history else None
+        new = [day for day in days if day not in history]
+        for day in new:
+            history.append(day)
+            self._record('done', habit, day)
+        if new and last is not None and new[0] < last:
+            history.sort()  # keep backfilled history in date order on disk
+        return len(new)
+
+    def iter_completions(self):
+        """(habit, date) for every completion, habit by habit in date order; (habit, None) for a habit without any."""
+        if self._use_index() and self.archive is None:
+            yield from self.storage.iter_completions()
+            return
+        for habit, dates in self.history().items():
+            if not dates:
+                yield habit, None
+            for day in sorted(dates):
+                yield habit, day
+
+    def add_habit(self, habit):
+        with self.batch():
+            added = self._add(habit)
+        if added and self._today is not None:
+            self._today.add(habit)
+        if added:
             return f'Habit "{habit}" added.'
         return f'Habit "{habit}" already exists.'
-    
+
     def mark_as_done(self, habit):
-        if habit in self.data:
-            today = datetime.now().strftime('%Y-%m-%d')
-            if today not in self.data[habit]:
-                self.data[habit].append(today)
-                self.save_data()
-                return f'Habit "{habit}" marked as done for today.'
-            return f'Habit "{habit}" already marked as done for today.'
-        return f'Habit "{habit}" does not exist.'
-    
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self.batch():
+            added = self._mark(habit, today)
+        if added is not None and self._today is not None:
+            self._today.mark(habit, today)
+        if added is None:
+            return f'Habit "{habit}" does not exist.'
+        if added:
+            return f'Habit "{habit}" marked as done for today.'
+        return f'Habit "{habit}" already marked as done for today.'
+
     def remove_habit(self, habit):
-        if habit in self.data:
-            del self.data[habit]
-            self.save_data()
+        with self.batch():
+            removed = self._remove(habit)
+        if removed and self._today is not None:
+            self._today.remove(habit)
+        if removed and self.archive is not None:
+            self.archive.forget(habit)
+        if removed:
             return f'Habit "{habit}" removed.'
         return f'Habit "{habit}" does not exist.'
-    
-    def list_habits(self):
-        if not self.data:
+
+    def habit_names(self):
+        if self._use_ranges():
+            return self.storage.habit_names()
+        return list(self.data)
+
+    def is_done(self, habit, date):
+        """Whether ``habit`` was completed on ``date``; None if the habit does not exist."""
+        if self._use_index():
+            return self.storage.is_done(habit, date)
+        if habit not in self.data:
+            return None
+        return date in self.data[habit]
+
+    def today_index(self):
+        """DayIndex of the habits done and still pending today.
+
+        Built from the streak index on first use and again on a new day or
+        after another process changed the data; add/done/remove keep it
+        current in between, so checking any number of habits costs a dict
+        lookup each.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        if self._today is None or self._today.day != today:
+            from dayindex import DayIndex
+            with phase('compute'):
+                if not self.storage.indexed:
+                    self.data  # file storages keep the index alongside the loaded data
+                index = DayIndex.from_streaks(today, self.storage.streak_entries(), self.is_done)
+                # Inside batch() the streak index lags behind the events not yet written
+                for event in self._pending or ():
+                    index.apply(event)
+                self._today = index
+        return self._today
+
+    def __contains__(self, habit):
+        if self._use_ranges():
+            return self.storage.has_habit(habit)
+        return habit in self.data
+
+    def _reaches_archive(self, habit, start):
+        archive = self.archive
+        return archive is not None and start < archive.horizon and habit in archive
+
+    def completed_between(self, habit, start, end):
+        """Dates ``habit`` was done from ``start`` to ``end`` inclusive; None if it does not exist."""
+        if self._use_ranges():
+            dates = self.storage.completed_between(habit, start, end)
+        elif habit not in self.data:
+            return None
+        else:
+            dates = self.data[habit].between(start, end)
+        if dates is not None and self._reaches_archive(habit, start):
+            # Only the archived years inside the range are read
+            dates = sorted(set(dates) | set(self.archive.between(habit, start, end)))
+        return dates
+
+    def count_between(self, habit, start, end):
+        """How many days ``habit`` was done from ``start`` to ``end`` inclusive; None if it does not exist."""
+        if self._reaches_archive(habit, start):
+            dates = self.completed_between(habit, start, end)
+            return None if dates is None else len(dates)
+        if self._use_ranges():
+            dates = self.storage.completed_between(habit, start, end)
+            return None if dates is None else len(dates)
+        if habit not in self.data:
+            return None
+        return self.data[habit].count_between(start, end)
+
+    def done_in_last(self, habit, days, today=None):
+        """How many of the last ``days`` days, today included, ``habit`` was done."""
+        today = today or datetime.now().date()
+        return self.count_between(habit, today - timedelta(days=days - 1), today)
+
+    def streak(self, habit, today=None):
+        """(ongoing streak, longest streak, last completion) for ``habit``; None if it does not exist."""
+        if not self.storage.indexed:
+            self.data  # file storages keep the index alongside the loaded data
+        if habit in self._unwritten():
+            entry = self._entry_from_data(habit)
+        else:
+            entry = self.storage.streak(habit)
+        if entry is None:
+            return None
+        return streak_view(self._with_archive(habit, entry), today)
+
+    def streaks(self, today=None):
+        if not self.storage.indexed:
+            self.data
+        entries = self.storage.streak_entries()
+        unwritten = self._unwritten()
+        if unwritten:
+            entries = dict(entries)
+            for habit in unwritten:
+                entries.pop(habit, None)
+                entry = self._entry_from_data(habit)
+                if entry is not None:
+                    entries[habit] = entry
+        return {habit: streak_view(self._with_archive(habit, entry), today)
+                for habit, entry in entries.items()}
+
+    def _unwritten(self):
+        """Habits changed inside batch() or in write-behind mode whose streak index entry lags behind."""
+        return {event['habit'] for event in self._pending or ()}
+
+    def _entry_from_data(self, habit):
+        # Mutations that are held back always change the loaded data first
+        if habit not in self.data:
+            return None
+        return compute_streak(self.data[habit].ordinals())
+
+    def _with_archive(self, habit, entry):
+        """Extend a live streak entry with the archived summary, reading archived dates only if they overlap."""
+        archive = self.archive
+        if archive is None or habit not in archive:
+            return entry
+        live = self.data[habit].ordinals()
+        joined = join_streaks(archive.streaks.entries[habit], live)
+        if joined is None:
+            joined = compute_streak(sorted(set(archive.ordinals(habit)) | set(live)))
+        return joined
+
+    def rebuild_streaks(self):
+        """Recompute the streak index from raw history; returns the habits that were out of date."""
+        return self.storage.rebuild_streaks(self.data)
+
+    def completion_counts(self):
+        if self._use_index():
+            return self.storage.completion_counts()
+        return {habit: len(dates) for habit, dates in self.data.items()}
+
+    def list_habits(self, names=None):
+        if names is None:
+            names = self.habit_names()
+        if not names:
             print('No habits found.')
             return
-        for habit in self.data:
+        for habit in names:
             print(f'- {habit}')
-
@@ -1,83 +1,114 @@
 # Calendar and Streak 
-from datetime import datetime, timedelta
-from rich.console import Console
-from rich.table import Table
+from datetime import date, datetime, timedelta
 from tracker import HabitTracker
+from config import DATA_FILE
+from timings import phase
 
-console = Console()
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
-def show_calendar(habit):
-    tracker = HabitTracker('habits.json')  # Add the same file path used in CLI
-    data = tracker.data
+# rich is imported on first use so plain output never pays for it
+console = None
+
+def _console():
+    global console
+    if console is None:
+        from rich.console import Console
+        console = Console()
+    return console
+
+def _say(text, style, plain):
+    with phase("render"):
+        if plain:
+            print(text)
+        else:
+            _console().print(f"[{style}]{text}[/{style}]")
+
+def month_starts(year, month, months=1):
+    """First day of ``months`` consecutive months starting at ``year``-``month``."""
+    index = year * 12 + month - 1
+    return [date(i // 12, i % 12 + 1, 1) for i in range(index, index + months)]
+
+def month_weeks(start_day, dates):
+    """Calendar rows for the month starting at ``start_day``, done days marked."""
+    next_month = month_starts(start_day.year, start_day.month, 2)[1]
+    weeks = []
+    week = [""] * start_day.weekday()
+    day = start_day
+    while day < next_month:
+        week.append("✅" if day in dates else str(day.day))
+        if len(week) == 7:
+            weeks.append(week)
+            week = []
+        day += timedelta(days=1)
+    if week:
+        weeks.append(week + [""] * (7 - len(week)))
+    return weeks
+
+def show_calendar(habit, tracker=None, plain=False, year=None, month=None, months=1):
+    """Show ``months`` months of ``habit`` starting at ``year``-``month`` (default: this month)."""
+    if tracker is None:
+        tracker = HabitTracker(DATA_FILE)
     
-    if habit not in data:
-        console.print(f"[red]Habit '{habit}' not found![/red]")
+    if habit not in tracker:
+        _say(f"Habit '{habit}' not found!", "red", plain)
         return
 
-    dates = [datetime.strptime(d, "%Y-%m-%d").date() for d in data[habit]]
-    today = datetime.today().date()
-    start_day = today.replace(day=1)
-    table = Table(title=f"{habit} - {today.strftime('%B %Y')}", show_lines=True)
-    table.add_column("Mon")
-    table.add_column("Tue")
-    table.add_column("Wed")
-    table.add_column("Thu")
-    table.add_column("Fri")
-    table.add_column("Sat")
-    table.add_column("Sun")
-
-    week = []
-    for i in range(start_day.weekday()):
-        week.append("")
-
-    for i in range(31):
-        try:
-            day = start_day + timedelta(days=i)
-            if day.month != today.month:
-                break
-            symbol = "✅" if day in dates else str(day.day)
-            week.append(symbol)
-            if len(week) == 7:
+    with phase("compute"):
+        today = datetime.today().date()
+        starts = month_starts(year or today.year, month or today.month, months + 1)
+        # One range query covers every month shown
+        dates = set(tracker.completed_between(habit, starts[0], starts[-1] - timedelta(days=1)))
+        calendars = [(start_day, month_weeks(start_day, dates)) for start_day in starts[:-1]]
+
+    with phase("render"):
+        for start_day, weeks in calendars:
+            title = f"{habit} - {start_day.strftime('%B %Y')}"
+            if plain:
+                print(title)
+                print(" ".join(WEEKDAYS))
+                for week in weeks:
+                    print(" ".join(f"{cell.replace('✅', '✓'):>3}" for cell in week))
+                continue
+
+            from rich.table import Table
+            table = Table(title=title, show_lines=True)
+            for name in WEEKDAYS:
+                table.add_column(name)
+            for week in weeks:
                 table.add_row(*week)
-                week = []
-        except:
-            break
-    if week:
-        while len(week) < 7:
-            week.append("")
-        table.add_row(*week)
 
-    console.print(table)
+            _console().print(table)
 
-def show_streak(habit):
-    tracker = HabitTracker('habits.json')  # Add the same file path used in CLI
-    data = tracker.data
-    
-    if habit not in data:
-        console.print(f"[red]Habit '{habit}' not found![/red]")
-        return
+def show_streak(habit, tracker=None, plain=False):
+    if tracker is None:
+        tracker = HabitTracker(DATA_FILE)
     
-    dates = sorted([datetime.strptime(date, "%Y-%m-%d").date() for date in data[habit]])
-    if not dates:
-        console.print(f"[yellow]No streaks found for habit '{habit}'.[/yellow]")
-        return
+    # Read from the streak index instead of rescanning the history
+    with phase("compute"):
+        streak = tracker.streak(habit) if habit in tracker else None
+    render_streak(habit, streak, plain)
 
-    longest_streak = 0
-    current_streak = 1
-    for i in range(1, len(dates)):
-        if dates[i] == dates[i - 1] + timedelta(days=1):
-            current_streak += 1
-            longest_streak = max(longest_streak, current_streak)
-        else:
-            current_streak = 1
+def render_streak(habit, streak, plain=False):
+    """Print an (ongoing, longest, last completion) streak, computed here or by the serve daemon.
 
-    # Check if the streak is ongoing
-    today = datetime.now().date()
-    ongoing_streak = current_streak if dates[-1] == today - timedelta(days=1) or dates[-1] == today else 0
+    ``streak`` is None when the habit does not exist.
+    """
+    if streak is None:
+        _say(f"Habit '{habit}' not found!", "red", plain)
+        return
+    ongoing_streak, longest_streak, last = streak
+    if last is None:
+        _say(f"No streaks found for habit '{habit}'.", "yellow", plain)
+        return
 
-    console.print(f"[green]Longest streak:[/green] {longest_streak} 🔥")
-    if ongoing_streak:
-        console.print(f"[blue]Ongoing streak:[/blue] {ongoing_streak} 🌟")
-    else:
-        console.print(f"[yellow]No ongoing streak.[/yellow]")
+    with phase("render"):
+        if plain:
+            print(f"Longest streak: {longest_streak}")
+            print(f"Ongoing streak: {ongoing_streak}" if ongoing_streak else "No ongoing streak.")
+            return
 
+        _console().print(f"[green]Longest streak:[/green] {longest_streak} 🔥")
+        if ongoing_streak:
+            _console().print(f"[blue]Ongoing streak:[/blue] {ongoing_streak} 🌟")
+        else:
+            _console().print(f"[yellow]No ongoing streak.[/yellow]")
@@ -0,0 +1,75 @@
+# Background flushing for HabitTracker's write-behind mode
+import threading
+import time
+
+
+class WriteBehind:
+    """Calls ``flush`` from a background thread once changes have waited long enough.
+
+    A flush happens when the oldest unwritten change is ``flush_interval``
+    seconds old or ``max_pending`` changes have piled up, whichever comes
+    first. ``lock`` serialises mutations with flushes, so a mutation only
+    ever waits while a flush is writing. A flush that fails keeps its
+    changes and is retried after another interval; the exception is kept
+    in ``error`` until a flush succeeds.
+    """
+
+    def __init__(self, flush, flush_interval=0.5, max_pending=1000, clock=time.monotonic):
+        self.flush = flush
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.flushes = 0
+        self.error = None
+        self._cond = threading.Condition(self.lock)
+        self._pending = 0
+        self._deadline = None  # when the oldest unwritten change is due on disk
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='habit-write-behind', daemon=True)
+        self._thread.start()
+        return self
+
+    def changed(self, pending):
+        """Note that ``pending`` changes are now unwritten; call with ``lock`` held."""
+        self._pending = pending
+        if pending and self._deadline is None:
+            self._deadline = self.clock() + self.flush_interval
+            self._cond.notify()
+        elif pending >= self.max_pending:
+            self._cond.notify()
+
+    def flushed(self, count):
+        """Note that a flush wrote ``count`` changes; call with ``lock`` held."""
+        self._pending = 0
+        self._deadline = None
+        self.error = None
+        if count:
+            self.flushes += 1
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - self.clock()
+                if remaining > 0 and self._pending < self.max_pending:
+                    self._cond.wait(remaining)
+                    continue
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.error = e
+                    self._deadline = self.clock() + self.flush_interval
+
+    def close(self):
+        """Stop the thread; whatever is still pending is left to the caller's final flush."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()